@@ -0,0 +1,137 @@
+"""Benchmark recall@k and latency of the IVF index against brute-force search"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.rag import LocalVectorIndex, IVFVectorIndex
+
+
+def make_dataset(n_vectors: int, dimension: int, n_clusters: int, seed: int = 0) -> np.ndarray:
+    """
+    Generate clustered synthetic embeddings
+    
+    Args:
+        n_vectors: Number of vectors
+        dimension: Vector dimension
+        n_clusters: Number of latent topics
+        seed: Random seed
+    
+    Returns:
+        Float32 matrix of shape (n_vectors, dimension)
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dimension)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, n_vectors)
+    noise = rng.standard_normal((n_vectors, dimension)).astype(np.float32)
+    return centers[labels] + 0.6 * noise
+
+
+def time_queries(index, queries: np.ndarray, top_k: int):
+    """
+    Run queries and collect result ids and per-query latency
+    
+    Args:
+        index: Vector index
+        queries: Query matrix
+        top_k: Number of results per query
+    
+    Returns:
+        Tuple of (list of id sets, latencies in milliseconds)
+    """
+    results = []
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        response = index.query(query, top_k=top_k, include_metadata=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append({match["id"] for match in response["matches"]})
+    return results, np.array(latencies)
+
+
+def benchmark(
+    n_vectors: int,
+    dimension: int,
+    n_queries: int,
+    top_k: int,
+    n_lists: int | None,
+    probes: list[int]
+):
+    """
+    Compare brute-force and IVF search on the same synthetic data
+    
+    Args:
+        n_vectors: Number of indexed vectors
+        dimension: Vector dimension
+        n_queries: Number of queries
+        top_k: Number of results per query
+        n_lists: Number of IVF lists (default: sqrt of n_vectors)
+        probes: n_probe values to evaluate
+    """
+    print(f"🧪 Generating {n_vectors} vectors ({dimension} dims)...")
+    data = make_dataset(n_vectors, dimension, n_clusters=max(8, n_vectors // 500))
+    queries = make_dataset(n_queries, dimension, n_clusters=max(8, n_vectors // 500), seed=1)
+    vectors = [
+        {"id": f"v{i}", "values": row, "metadata": {}}
+        for i, row in enumerate(data)
+    ]
+    
+    brute = LocalVectorIndex(dimension=dimension)
+    brute.upsert_vectors(vectors)
+    
+    ivf = IVFVectorIndex(dimension=dimension)
+    ivf.upsert_vectors(vectors)
+    
+    print("🏗️  Building IVF index...")
+    start = time.perf_counter()
+    build = ivf.build(n_lists=n_lists)
+    print(f"   {build['n_lists']} lists built in {time.perf_counter() - start:.1f}s")
+    
+    # Query the IVF index through a memory-mapped copy, as the server does
+    with tempfile.TemporaryDirectory() as tmp:
+        ivf.save(tmp)
+        ivf = IVFVectorIndex.load(tmp, mmap=True)
+        
+        truth, brute_latency = time_queries(brute, queries, top_k)
+        
+        print()
+        print(f"{'mode':<16}{'recall@' + str(top_k):>12}{'p50 ms':>10}{'p95 ms':>10}")
+        print(f"{'brute force':<16}{1.0:>12.3f}"
+              f"{np.percentile(brute_latency, 50):>10.3f}{np.percentile(brute_latency, 95):>10.3f}")
+        
+        for n_probe in probes:
+            ivf.n_probe = n_probe
+            found, latency = time_queries(ivf, queries, top_k)
+            recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])
+            print(f"{'ivf n_probe=' + str(n_probe):<16}{recall:>12.3f}"
+                  f"{np.percentile(latency, 50):>10.3f}{np.percentile(latency, 95):>10.3f}")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--lists", type=int, default=None)
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+    
+    print("=" * 50)
+    print("LPDP ANN Benchmark")
+    print("=" * 50)
+    
+    benchmark(args.vectors, args.dimension, args.queries, args.top_k, args.lists, args.probes)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,19 +9,43 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from dotenv import load_dotenv
-from src.document import PDFLoader, TextChunker
-from src.rag import GoogleEmbeddings, PineconeClient
+from src.document import PDFLoader, TextChunker, AllowanceTable, AllowanceTableExtractor
+from src.tools import LPDPTools, WarmAnswers
+from src.rag import (
+    GoogleEmbeddings,
+    EmbeddingCache,
+    ContentStore,
+    BM25Index,
+    DeadlineIndex,
+    LocalVectorIndex,
+    IVFVectorIndex,
+    RAGRetriever,
+    create_vector_client,
+)
+from src.rag.vector_store import (
+    get_data_dir,
+    content_store_only,
+    get_content_store_path,
+    get_lexical_index_path,
+    get_allowance_table_path,
+    get_deadline_index_path,
+    get_warm_answers_path,
+)
 
 load_dotenv()
 
+# Local artifacts (caches, indexes) produced by indexing
+DATA_DIR = get_data_dir()
 
-def index_documents(pdf_path: str, namespace: str = ""):
+
+def index_documents(pdf_path: str, namespace: str = "", warm_answers: bool = True):
     """
     Index PDF document to Pinecone
     
     Args:
         pdf_path: Path to PDF file
         namespace: Pinecone namespace
+        warm_answers: Precompute answers for canonical tool inputs (calls Gemini)
     """
     print(f"📄 Loading PDF: {pdf_path}")
     
@@ -38,34 +62,41 @@ def index_documents(pdf_path: str, namespace: str = ""):
     
     # Initialize embeddings
     print("🧠 Generating embeddings...")
-    embeddings = GoogleEmbeddings()
+    # Reuse vectors of unchanged chunks from previous runs
+    cache_path = os.getenv("EMBEDDING_CACHE_PATH", DATA_DIR / "embedding_cache.sqlite")
+    embeddings = GoogleEmbeddings(cache=EmbeddingCache(cache_path))
     
-    # Initialize Pinecone
-    print("🌲 Connecting to Pinecone...")
-    pinecone = PineconeClient()
+    # Initialize vector store (Pinecone or local, see VECTOR_BACKEND)
+    print("🌲 Connecting to vector store...")
+    pinecone = create_vector_client(load=False)
     pinecone.create_index_if_not_exists()
     
     # Prepare vectors for upsert
     print("📤 Preparing vectors...")
     vectors = []
+    stored_chunks = []
     
-    for i, chunk in enumerate(chunks):
-        # Generate embedding
-        embedding = embeddings.embed_text(chunk.content)
-        
+    # Generate embeddings in batched requests
+    chunk_embeddings = embeddings.embed_texts([chunk.content for chunk in chunks])
+    
+    # Chunk text stays in vector metadata unless the content store ships with the server
+    text_in_metadata = not content_store_only()
+    
+    for i, (chunk, embedding) in enumerate(zip(chunks, chunk_embeddings)):
         # Prepare metadata
         metadata = {
-            "content": chunk.content,
             "source": chunk.metadata.get("source", ""),
             "page_number": chunk.metadata.get("page_number", 0),
             "section": chunk.metadata.get("section", ""),
+            "section_path": chunk.metadata.get("section_path", ""),
             "chunk_index": chunk.metadata.get("chunk_index", i),
         }
+        stored_chunks.append((chunk.chunk_id, chunk.content, metadata))
         
         vector = {
             "id": chunk.chunk_id,
             "values": embedding,
-            "metadata": metadata
+            "metadata": {**metadata, "content": chunk.content} if text_in_metadata else metadata
         }
         vectors.append(vector)
         
@@ -73,16 +104,84 @@ def index_documents(pdf_path: str, namespace: str = ""):
         if (i + 1) % 10 == 0:
             print(f"   Processed {i + 1}/{len(chunks)} chunks...")
     
+    # Write chunk text to the local content store
+    print("🗄️  Writing content store...")
+    content_store = ContentStore(get_content_store_path())
+    content_store.clear()
+    content_store.add_many(stored_chunks)
+    # Local copies of the embeddings let MMR run without fetching vectors from Pinecone
+    content_store.save_vectors({
+        chunk.chunk_id: embedding for chunk, embedding in zip(chunks, chunk_embeddings)
+    })
+    version = content_store.flush()
+    print(f"   Stored {len(content_store)} chunks (version {version})")
+    
+    # Build the BM25 index for hybrid retrieval
+    print("🔤 Building lexical index...")
+    lexical_index = BM25Index()
+    lexical_index.build(stored_chunks)
+    lexical_index.save(get_lexical_index_path())
+    print(f"   Indexed {len(lexical_index)} chunks, {len(lexical_index.vocabulary)} terms")
+    
+    # Extract the living allowance table for direct lookups
+    print("💱 Extracting living allowance table...")
+    allowance_table = AllowanceTable(AllowanceTableExtractor(pdf_path).extract())
+    allowance_table.save(get_allowance_table_path())
+    print(f"   Extracted {len(allowance_table)} rows")
+    if not len(allowance_table):
+        print("   ⚠️  No rows found; info_dana_bulanan will answer through RAG only")
+    
+    # Extract submission deadline rules for direct lookups
+    print("⏰ Extracting deadline rules...")
+    deadline_index = DeadlineIndex.build(stored_chunks)
+    deadline_index.save(get_deadline_index_path())
+    print(f"   Extracted {len(deadline_index)} rules")
+    
     # Upsert to Pinecone
-    print("📥 Uploading to Pinecone...")
+    print("📥 Uploading to vector store...")
     result = pinecone.upsert_vectors(vectors, namespace=namespace)
-    print(f"   Uploaded {result['total_vectors']} vectors in {result['batches']} batches")
+    uploaded = result.get("upserted_vectors", result["total_vectors"])
+    print(f"   Uploaded {uploaded}/{result['total_vectors']} vectors in {result['batches']} batches")
+    
+    for batch in result.get("results", []):
+        if batch["status"] != "ok":
+            print(f"   ⚠️  Batch {batch['batch']} failed after {batch['attempts']} attempts: "
+                  f"{batch['error']}")
+    
+    if isinstance(pinecone, IVFVectorIndex):
+        build = pinecone.build(namespace=namespace)
+        print(f"   Built {build['n_lists']} IVF lists")
+    
+    if isinstance(pinecone, LocalVectorIndex):
+        saved_path = pinecone.save()
+        print(f"   Saved local vector index to {saved_path}")
     
     # Verify
     stats = pinecone.describe_index_stats()
     print(f"\n✅ Indexing complete!")
     print(f"   Total vectors in index: {stats.get('total_vector_count', 'N/A')}")
     
+    if warm_answers:
+        # Answer the templated tools for every section against the new index
+        print("🔥 Building warm answers (rate limited, may take a while)...")
+        tools = LPDPTools(
+            retriever=RAGRetriever(
+                embeddings=embeddings,
+                pinecone_client=pinecone,
+                content_store=content_store,
+                lexical_index=lexical_index
+            ),
+            allowance_table=allowance_table,
+            deadline_index=deadline_index
+        )
+        warm = WarmAnswers.build(
+            tools,
+            version,
+            on_error=lambda tool, argument, e: print(f"   ⚠️  {tool}({argument!r}) failed: {e}")
+        )
+        warm.save(get_warm_answers_path())
+        print(f"   Stored {len(warm)} answers (version {version})")
+    
     return result
 
 
@@ -107,7 +206,7 @@ def main():
     print("LPDP Document Indexing Script")
     print("=" * 50)
     
-    index_documents(str(pdf_path))
+    index_documents(str(pdf_path), warm_answers="--skip-warm-answers" not in sys.argv)
 
 
 if __name__ == "__main__":
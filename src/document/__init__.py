@@ -2,5 +2,6 @@
 
 from .pdf_loader import PDFLoader
 from .chunker import TextChunker
+from .allowance_table import AllowanceTable, AllowanceTableExtractor
 
-__all__ = ["PDFLoader", "TextChunker"]
+__all__ = ["PDFLoader", "TextChunker", "AllowanceTable", "AllowanceTableExtractor"]
@@ -0,0 +1,307 @@
+"""Structured living allowance (Dana Hidup Bulanan) table"""
+
+import difflib
+import json
+import re
+import fitz  # PyMuPDF
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+TABLE_TITLE = "Tabel Besaran Dana Hidup Bulanan"
+DOMESTIC = "Dalam Negeri"
+OTHER_CITIES = "Kota Lain"
+
+_CURRENCY_PATTERN = re.compile(r"^[A-Z]{3}$")
+# US cities are listed as "Boston, MA." and may be run together ("Newton, MA.Pasadena, CA.")
+_US_CITY_PATTERN = re.compile(r"([A-Z][A-Za-z '-]*?),\s*[A-Z]{2}\b")
+_PLACE_NOISE = frozenset({"kota", "kabupaten", "kab", "dki", "city", "provinsi"})
+
+# Other names users give for countries in the table
+COUNTRY_ALIASES = {
+    "indonesia": DOMESTIC,
+    "japan": "Jepang",
+    "amerika": "Amerika Serikat",
+    "usa": "Amerika Serikat",
+    "us": "Amerika Serikat",
+    "united states": "Amerika Serikat",
+    "uk": "Inggris",
+    "united kingdom": "Inggris",
+    "england": "Inggris",
+    "britania raya": "Inggris",
+    "netherlands": "Belanda",
+    "germany": "Jerman",
+    "france": "Perancis",
+    "canada": "Kanada",
+    "korea": "Korea Selatan",
+    "south korea": "Korea Selatan",
+    "china": "Tiongkok",
+    "cina": "Tiongkok",
+    "new zealand": "Selandia Baru",
+}
+
+
+@dataclass
+class AllowanceEntry:
+    """One row of the living allowance table"""
+    country: str
+    cities: List[str]
+    currency: str
+    amount: int
+    page_number: int
+    other_cities: bool = False  # Row applies to cities not listed elsewhere ("Kota Lain")
+
+
+def normalize_place(name: str) -> str:
+    """
+    Normalize a country or city name for matching
+    
+    Args:
+        name: Place name
+    
+    Returns:
+        Lowercase words without punctuation and administrative prefixes
+    """
+    words = re.findall(r"\w+", name.casefold())
+    return " ".join(word for word in words if word not in _PLACE_NOISE)
+
+
+class AllowanceTableExtractor:
+    """Parse the living allowance table from the PDF with PyMuPDF table detection"""
+    
+    def __init__(self, file_path: str | Path):
+        """
+        Initialize extractor
+        
+        Args:
+            file_path: Path to the disbursement guide PDF
+        """
+        self.file_path = Path(file_path)
+    
+    def extract(self) -> List[AllowanceEntry]:
+        """
+        Extract table rows
+        
+        The table starts at or after the first page mentioning TABLE_TITLE
+        (earlier mentions, e.g. "lihat Tabel ...", are skipped over) and may
+        continue over the following pages; once rows have been found,
+        extraction stops at the first page without rows. A city the guide
+        lists again in a later row of the same country (e.g. Pasadena, CA
+        under both USD 2,600 and USD 2,500) keeps only its first listing.
+        
+        Returns:
+            List of AllowanceEntry in table order
+        """
+        entries: List[AllowanceEntry] = []
+        country = ""
+        started = False
+        
+        with fitz.open(self.file_path) as doc:
+            for page_num in range(len(doc)):
+                page = doc[page_num]
+                if not started:
+                    if TABLE_TITLE.lower() not in page.get_text().lower():
+                        continue
+                    started = True
+                
+                found = False
+                for table in page.find_tables().tables:
+                    for row in table.extract():
+                        country, added = self._parse_row(row, country, page_num + 1, entries)
+                        found = found or added
+                
+                if not found and entries:
+                    break
+        
+        return self._drop_repeated_cities(entries)
+    
+    def _parse_row(
+        self,
+        row: List[str | None],
+        country: str,
+        page_number: int,
+        entries: List[AllowanceEntry]
+    ) -> Tuple[str, bool]:
+        """
+        Parse one table row into entries
+        
+        Args:
+            row: Cells [no, country, cities, currency, amount]
+            country: Country of the previous row (rows without one continue it)
+            page_number: 1-based page of the row
+            entries: Entries parsed so far; appended to in place
+        
+        Returns:
+            Tuple of (current country, whether the row was part of the table)
+        """
+        if len(row) < 5:
+            return country, False
+        
+        number, name, cities, currency, amount = [(cell or "").strip() for cell in row[:5]]
+        
+        if not currency and not amount:
+            # Cities spilling over from the previous row (e.g. across a page break)
+            if cities and entries:
+                entries[-1].cities.extend(self._split_cities(cities))
+                return country, True
+            return country, False
+        
+        currencies = currency.split("\n")
+        amounts = amount.split("\n")
+        if len(currencies) != len(amounts) or not all(_CURRENCY_PATTERN.match(c) for c in currencies):
+            # Header row or a different table
+            return country, False
+        
+        if name:
+            country = name.split("\n")[0]
+        elif number and not number.isdigit():
+            # The domestic row carries its region in the number column
+            country = number.split("\n")[0]
+        
+        # With several amounts in one cell, the last city lines belong to the later amounts
+        lines = cities.split("\n") if cities else []
+        extra = len(amounts) - 1
+        groups = [lines[:len(lines) - extra]] + [[line] for line in lines[len(lines) - extra:]]
+        
+        for group, code, value in zip(groups, currencies, amounts):
+            text = " ".join(group)
+            other = normalize_place(text) == normalize_place(OTHER_CITIES)
+            entries.append(AllowanceEntry(
+                country=country,
+                cities=[] if other else self._split_cities(text),
+                currency=code,
+                amount=int(re.sub(r"[^\d]", "", value)),
+                page_number=page_number,
+                other_cities=other
+            ))
+        return country, True
+    
+    @staticmethod
+    def _drop_repeated_cities(entries: List[AllowanceEntry]) -> List[AllowanceEntry]:
+        """Remove cities already listed in an earlier row of the same country"""
+        seen = set()
+        for entry in entries:
+            cities = []
+            for city in entry.cities:
+                key = (entry.country, normalize_place(city))
+                if key not in seen:
+                    seen.add(key)
+                    cities.append(city)
+            entry.cities = cities
+        return entries
+    
+    @staticmethod
+    def _split_cities(text: str) -> List[str]:
+        """Split a cell listing cities into city names"""
+        text = " ".join(text.split())
+        if _US_CITY_PATTERN.search(text):
+            return [city.strip() for city in _US_CITY_PATTERN.findall(text)]
+        return [city.strip() for city in re.split(r"[.,]", text) if city.strip()]
+
+
+class AllowanceTable:
+    """Living allowance lookup by country or city"""
+    
+    def __init__(self, entries: List[AllowanceEntry] | None = None, min_similarity: float = 0.85):
+        """
+        Initialize table
+        
+        Args:
+            entries: Table rows
+            min_similarity: Fuzzy match threshold for misspelled place names
+        """
+        self.entries = entries or []
+        self.min_similarity = min_similarity
+        
+        # Normalized place name -> indexes of matching entries
+        self._countries: Dict[str, List[int]] = {}
+        self._cities: Dict[str, List[int]] = {}
+        for i, entry in enumerate(self.entries):
+            self._countries.setdefault(normalize_place(entry.country), []).append(i)
+            for city in entry.cities:
+                self._cities.setdefault(normalize_place(city), []).append(i)
+        for alias, country in COUNTRY_ALIASES.items():
+            rows = self._countries.get(normalize_place(country))
+            if rows:
+                self._countries.setdefault(alias, rows)
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def lookup(self, location: str) -> List[AllowanceEntry]:
+        """
+        Find the rows for a country or city
+        
+        A city returns its own row; a country returns all its rows (listed
+        cities and "Kota Lain"). A country named with the city narrows an
+        ambiguous city ("Cambridge, Inggris").
+        
+        Args:
+            location: Country and/or city as given by the user
+        
+        Returns:
+            Matching entries in table order (empty if nothing matches)
+        """
+        query = normalize_place(location)
+        if not query:
+            return []
+        
+        countries = self._find(query, self._countries)
+        cities = self._find(query, self._cities)
+        
+        if cities and countries:
+            narrowed = cities & countries
+            cities = narrowed or cities
+        rows = cities or countries
+        
+        if not rows:
+            rows = self._fuzzy(query, self._cities) or self._fuzzy(query, self._countries)
+        
+        return [self.entries[i] for i in sorted(rows)]
+    
+    def save(self, path: str | Path) -> Path:
+        """
+        Write the table as JSON
+        
+        Args:
+            path: Target file
+        
+        Returns:
+            Path written
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"entries": [asdict(entry) for entry in self.entries]}, f, ensure_ascii=False)
+        return path
+    
+    @classmethod
+    def load(cls, path: str | Path) -> "AllowanceTable":
+        """
+        Load a table written by save()
+        
+        Args:
+            path: JSON file
+        
+        Returns:
+            AllowanceTable
+        """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls([AllowanceEntry(**entry) for entry in data["entries"]])
+    
+    @staticmethod
+    def _find(query: str, names: Dict[str, List[int]]) -> set:
+        """Rows of every name occurring as whole words in the query"""
+        padded = f" {query} "
+        return {i for name, rows in names.items() if f" {name} " in padded for i in rows}
+    
+    def _fuzzy(self, query: str, names: Dict[str, List[int]]) -> set:
+        """Rows of the name closest to the query or one of its words, if close enough"""
+        best_score, best_rows = 0.0, set()
+        for candidate in [query] + query.split():
+            for name, rows in names.items():
+                score = difflib.SequenceMatcher(None, candidate, name).ratio()
+                if score > best_score:
+                    best_score, best_rows = score, set(rows)
+        return best_rows if best_score >= self.min_similarity else set()
@@ -47,17 +47,20 @@ class TextChunker:
         
         Args:
             text: Text to split
-            metadata: Base metadata to include in each chunk
+            metadata: Base metadata to include in each chunk; "section_spans" (see
+                PDFLoader.load) sets section and section_path per chunk
             
         Returns:
             List of Chunk objects
         """
-        metadata = metadata or {}
+        metadata = dict(metadata or {})
+        section_spans = metadata.pop("section_spans", None)
         chunks = []
         
         # Split text
         split_texts = self.splitter.split_text(text)
         
+        position = 0
         for i, chunk_text in enumerate(split_texts):
             chunk_metadata = {
                 **metadata,
@@ -65,6 +68,15 @@ class TextChunker:
                 "total_chunks": len(split_texts),
             }
             
+            if section_spans:
+                found = text.find(chunk_text, position)
+                position = found if found != -1 else position
+                # The part covering the middle of the chunk names its section
+                middle = position + len(chunk_text) // 2
+                span = [span for span in section_spans if span["start"] <= middle][-1]
+                chunk_metadata["section"] = span["section"]
+                chunk_metadata["section_path"] = span["section_path"]
+            
             # Generate chunk ID
             source = metadata.get("source", "unknown")
             page = metadata.get("page_number", 0)
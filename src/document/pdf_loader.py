@@ -1,10 +1,46 @@
 """PDF Loader using PyMuPDF"""
 
+import re
 import fitz  # PyMuPDF
+from collections import Counter, defaultdict
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from dataclasses import dataclass
 
+# Canonical section names of the LPDP disbursement guide, shared with query routing
+SECTION_KEYWORDS = (
+    "Dana Pendaftaran",
+    "Dana SPP",
+    "Dana Tunjangan Buku",
+    "Dana Bantuan Penelitian",
+    "Dana Bantuan Seminar",
+    "Dana Bantuan Publikasi",
+    "Dana Transportasi",
+    "Dana Aplikasi Visa",
+    "Dana Asuransi Kesehatan",
+    "Dana Hidup Bulanan",
+    "Dana Kedatangan",
+    "Dana Tunjangan Keluarga",
+    "Insentif Kelulusan",
+    "Dana Keadaan Darurat",
+    "Dana Pelatihan",
+    "Dana Lomba Internasional",
+    "Dana Pendamping Disabilitas",
+)
+
+_CANONICAL_SECTIONS = {keyword.lower(): keyword for keyword in SECTION_KEYWORDS}
+# All section names in one alternation, longest first so no name shadows a longer one
+_SECTION_ALTERNATION = "|".join(
+    re.escape(keyword) for keyword in sorted(SECTION_KEYWORDS, key=len, reverse=True)
+)
+_SECTION_PATTERN = re.compile(rf"\b({_SECTION_ALTERNATION})\b", re.IGNORECASE)
+# A line that is only a section name, optionally numbered ("3.2", "B.") and with a
+# parenthesised English name or trailing colon
+_SECTION_HEADING_PATTERN = re.compile(
+    rf"^(?:[0-9A-Za-z]{{1,3}}[.)]\s*)*({_SECTION_ALTERNATION})\s*(?:\([^)\n]*\))?\s*:?\s*$",
+    re.IGNORECASE | re.MULTILINE
+)
+
 
 @dataclass
 class Document:
@@ -33,12 +69,28 @@ class PDFLoader:
         """
         Load PDF and extract text from each page
         
+        Sections are assigned from the document structure: the PDF outline (TOC)
+        when present, otherwise headings detected by font size. A section carries
+        over page breaks until the next heading at the same or a higher level.
+        
         Returns:
-            List of Document objects with page content and metadata
+            List of Document objects with page content and metadata; pages where
+            the section changes also carry "section_spans" (offset, section and
+            section path of each part) for per-chunk assignment
         """
         documents = []
         
         with fitz.open(self.file_path) as doc:
+            toc = doc.get_toc()
+            outline = self._toc_headings(toc) if toc else self._font_headings(doc)
+            # Without section names in the outline, section heading lines in the text are used
+            scan_lines = not any(
+                self._match_section(title) for headings in outline.values() for _, title in headings
+            )
+            
+            # Section state carried across pages
+            state = {"section": "", "level": 0, "path": []}
+            
             for page_num in range(len(doc)):
                 page = doc[page_num]
                 text = page.get_text()
@@ -50,19 +102,23 @@ class PDFLoader:
                 # Clean text
                 text = self._clean_text(text)
                 
-                # Extract section title if present
-                section = self._extract_section(text)
+                spans = self._assign_sections(text, outline.get(page_num, []), state, scan_lines)
+                main = max(spans, key=lambda span: span["length"])
+                
+                metadata = {
+                    "source": str(self.file_path.name),
+                    "page_number": page_num + 1,
+                    "section": main["section"],
+                    "section_path": main["section_path"],
+                    "total_pages": len(doc)
+                }
+                if len(spans) > 1:
+                    metadata["section_spans"] = [
+                        {key: span[key] for key in ("start", "section", "section_path")}
+                        for span in spans
+                    ]
                 
-                document = Document(
-                    content=text,
-                    metadata={
-                        "source": str(self.file_path.name),
-                        "page_number": page_num + 1,
-                        "section": section,
-                        "total_pages": len(doc)
-                    }
-                )
-                documents.append(document)
+                documents.append(Document(content=text, metadata=metadata))
         
         return documents
     
@@ -87,44 +143,149 @@ class PDFLoader:
         
         return '\n'.join(cleaned_lines)
     
-    def _extract_section(self, text: str) -> str:
+    def _toc_headings(self, toc: List[List[Any]]) -> Dict[int, List[Tuple[int, str]]]:
         """
-        Extract section title from text
+        Group outline entries by page
         
         Args:
-            text: Page text content
+            toc: Entries from fitz.Document.get_toc() as [level, title, page]
             
         Returns:
-            Section title or empty string
+            Dict mapping 0-based page index to (level, title) headings in order
+        """
+        headings = defaultdict(list)
+        for level, title, page in toc:
+            # Entries without a destination have page -1
+            if page >= 1:
+                headings[page - 1].append((level, title.strip()))
+        return headings
+    
+    def _font_headings(
+        self,
+        doc: "fitz.Document",
+        size_ratio: float = 1.15,
+        max_length: int = 120,
+        max_levels: int = 3
+    ) -> Dict[int, List[Tuple[int, str]]]:
         """
-        # Common section patterns in LPDP document
-        section_keywords = [
-            "Dana Pendaftaran",
-            "Dana SPP",
-            "Dana Tunjangan Buku",
-            "Dana Bantuan Penelitian",
-            "Dana Bantuan Seminar",
-            "Dana Bantuan Publikasi",
-            "Dana Transportasi",
-            "Dana Aplikasi Visa",
-            "Dana Asuransi Kesehatan",
-            "Dana Hidup Bulanan",
-            "Dana Kedatangan",
-            "Dana Tunjangan Keluarga",
-            "Insentif Kelulusan",
-            "Dana Keadaan Darurat",
-            "Dana Pelatihan",
-            "Dana Lomba Internasional",
-            "Dana Pendamping Disabilitas",
-        ]
-        
-        first_lines = text[:500].lower()
-        
-        for keyword in section_keywords:
-            if keyword.lower() in first_lines:
-                return keyword
-        
-        return ""
+        Detect headings as short lines set larger than the body text
+        
+        Args:
+            doc: Open PDF document
+            size_ratio: Minimum font size relative to the body size for a heading
+            max_length: Longest line (in characters) treated as a heading
+            max_levels: Number of distinct heading sizes mapped to levels
+            
+        Returns:
+            Dict mapping 0-based page index to (level, title) headings in order;
+            the largest heading size is level 1
+        """
+        lines = []
+        chars_by_size = Counter()
+        for page_num in range(len(doc)):
+            for block in doc[page_num].get_text("dict")["blocks"]:
+                for line in block.get("lines", []):
+                    text = "".join(span["text"] for span in line["spans"]).strip()
+                    if not text:
+                        continue
+                    size = round(max(span["size"] for span in line["spans"]), 1)
+                    chars_by_size[size] += len(text)
+                    lines.append((page_num, size, text))
+        
+        if not chars_by_size:
+            return {}
+        
+        body_size = chars_by_size.most_common(1)[0][0]
+        heading_sizes = sorted(
+            {size for _, size, text in lines if size >= body_size * size_ratio and len(text) <= max_length},
+            reverse=True
+        )[:max_levels]
+        levels = {size: level for level, size in enumerate(heading_sizes, start=1)}
+        
+        headings = defaultdict(list)
+        previous = None
+        for page_num, size, text in lines:
+            heading = size in levels and len(text) <= max_length
+            if heading and previous == (page_num, size):
+                # Heading wrapped over several lines
+                level, title = headings[page_num][-1]
+                headings[page_num][-1] = (level, f"{title} {text}")
+            elif heading:
+                headings[page_num].append((levels[size], text))
+            previous = (page_num, size) if heading else None
+        return headings
+    
+    def _assign_sections(
+        self,
+        text: str,
+        headings: List[Tuple[int, str]],
+        state: Dict[str, Any],
+        scan_lines: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Split a page into parts with a constant section
+        
+        Args:
+            text: Cleaned page text
+            headings: (level, title) headings starting on this page
+            state: Section, its heading level and the heading path in effect at
+                the start of the page; updated in place for the next page
+            scan_lines: Also treat lines consisting of a section name as headings
+            
+        Returns:
+            Parts in page order as dicts with start offset, length, section and
+            section_path (heading titles joined by " > ")
+        """
+        spans = [self._span(0, state)]
+        
+        for level, title in headings:
+            state["path"] = state["path"][:level - 1] + [title]
+            section = self._match_section(title)
+            if section:
+                state["section"], state["level"] = section, level
+            elif level <= state["level"]:
+                # A sibling or parent heading ends the current section
+                state["section"], state["level"] = "", 0
+            spans.append(self._span(self._find_heading(text, title), state))
+        
+        if scan_lines:
+            for match in _SECTION_HEADING_PATTERN.finditer(text):
+                section = _CANONICAL_SECTIONS[match.group(1).lower()]
+                level = state["level"] or 1
+                state["path"] = state["path"][:level - 1] + [section]
+                state["section"], state["level"] = section, level
+                spans.append(self._span(match.start(), state))
+        
+        # Keep the last part starting at each offset, in page order
+        by_start = {span["start"]: span for span in spans}
+        spans = [by_start[start] for start in sorted(by_start)]
+        for span, following in zip(spans, spans[1:] + [None]):
+            span["length"] = (following["start"] if following else len(text)) - span["start"]
+        return spans
+    
+    @staticmethod
+    def _span(start: int, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Page part starting at start with the current section state"""
+        return {
+            "start": start,
+            "section": state["section"],
+            "section_path": " > ".join(state["path"]),
+        }
+    
+    @staticmethod
+    def _match_section(title: str) -> str:
+        """Canonical section named in a heading, or empty string"""
+        match = _SECTION_PATTERN.search(title)
+        return _CANONICAL_SECTIONS[match.group(1).lower()] if match else ""
+    
+    @staticmethod
+    def _find_heading(text: str, title: str) -> int:
+        """Offset of a heading in the page text (0 if it cannot be located)"""
+        words = title.split()
+        if not words:
+            return 0
+        match = re.search(r"\s+".join(map(re.escape, words)), text, re.IGNORECASE)
+        return match.start() if match else 0
     
     def get_full_text(self) -> str:
         """
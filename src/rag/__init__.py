@@ -1,8 +1,56 @@
 """RAG module for LPDP MCP Server"""
 
 from .embeddings import GoogleEmbeddings
+from .embedding_cache import EmbeddingCache
 from .pinecone_client import PineconeClient
 from .gemini_client import GeminiClient
+from .response_cache import ResponseCache
+from .rate_limiter import TokenBucketRateLimiter
+from .query_cache import QueryEmbeddingCache, normalize_query
+from .content_store import ContentStore
+from .bm25_index import BM25Index
+from .answer_cache import SemanticAnswerCache
+from .batch_generator import BatchingGenerator
+from .context_packer import ContextPacker
+from .context_compressor import ContextCompressor
+from .adaptive_selector import AdaptiveSelector
+from .section_router import SectionRouter
+from .deadline_index import DeadlineIndex
+from .local_index import LocalVectorIndex
+from .ivf_index import IVFVectorIndex
+from .vector_store import (
+    create_vector_client,
+    load_allowance_table,
+    load_content_store,
+    load_deadline_index,
+    load_lexical_index,
+)
 from .retriever import RAGRetriever
 
-__all__ = ["GoogleEmbeddings", "PineconeClient", "GeminiClient", "RAGRetriever"]
+__all__ = [
+    "GoogleEmbeddings",
+    "EmbeddingCache",
+    "PineconeClient",
+    "GeminiClient",
+    "ResponseCache",
+    "TokenBucketRateLimiter",
+    "RAGRetriever",
+    "QueryEmbeddingCache",
+    "normalize_query",
+    "ContentStore",
+    "BM25Index",
+    "SemanticAnswerCache",
+    "BatchingGenerator",
+    "ContextPacker",
+    "ContextCompressor",
+    "AdaptiveSelector",
+    "SectionRouter",
+    "DeadlineIndex",
+    "LocalVectorIndex",
+    "IVFVectorIndex",
+    "create_vector_client",
+    "load_content_store",
+    "load_lexical_index",
+    "load_allowance_table",
+    "load_deadline_index",
+]
@@ -0,0 +1,121 @@
+"""Adaptive result-set sizing with score cutoffs and MMR diversification"""
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+
+class AdaptiveSelector:
+    """Pick a small, diverse set of matches instead of a fixed top_k"""
+    
+    def __init__(
+        self,
+        min_score: float = 0.0,
+        relative_score: float = 0.85,
+        max_gap: float = 0.08,
+        min_k: int = 2,
+        mmr_lambda: float = 0.7,
+        fetch_factor: int = 4
+    ):
+        """
+        Initialize adaptive selector
+        
+        Args:
+            min_score: Absolute similarity below which matches are dropped
+            relative_score: Matches scoring below this fraction of the best match are dropped
+            max_gap: Score drop between consecutive matches at which the list is cut
+            min_k: Number of matches always kept (if available), regardless of cutoffs
+            mmr_lambda: Relevance vs. diversity trade-off of MMR (1.0 = relevance only)
+            fetch_factor: Candidates fetched per wanted result, as a multiple of top_k
+        """
+        self.min_score = min_score
+        self.relative_score = relative_score
+        self.max_gap = max_gap
+        self.min_k = max(1, min_k)
+        self.mmr_lambda = mmr_lambda
+        self.fetch_factor = max(1, fetch_factor)
+    
+    def select(
+        self,
+        matches: List[Dict[str, Any]],
+        query_embedding: Sequence[float],
+        max_k: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Cut matches by score and diversify the remainder
+        
+        Args:
+            matches: Vector matches sorted by score, optionally with "values"
+            query_embedding: Query embedding
+            max_k: Upper bound on the number of matches returned
+        
+        Returns:
+            Selected matches, most relevant first; MMR is skipped when matches
+            carry no stored vectors
+        """
+        if not matches or max_k <= 0:
+            return []
+        
+        scores = np.array([match["score"] for match in matches], dtype=np.float32)
+        keep = self.cutoff(scores)
+        candidates = matches[:keep]
+        
+        if len(candidates) <= 1 or any(len(match.get("values", ())) == 0 for match in candidates):
+            return candidates[:max_k]
+        
+        vectors = np.asarray([match["values"] for match in candidates], dtype=np.float32)
+        order = self.mmr(vectors, np.asarray(query_embedding, dtype=np.float32), max_k)
+        return [candidates[i] for i in order]
+    
+    def cutoff(self, scores: np.ndarray) -> int:
+        """
+        Number of leading matches that survive the score threshold and gap cutoff
+        
+        Args:
+            scores: Match scores sorted in descending order
+        
+        Returns:
+            Count of matches to keep (at least min_k when available)
+        """
+        threshold = max(self.min_score, float(scores[0]) * self.relative_score)
+        keep = int(np.count_nonzero(scores >= threshold))
+        
+        gaps = np.flatnonzero(scores[:-1] - scores[1:] > self.max_gap)
+        if gaps.size:
+            keep = min(keep, int(gaps[0]) + 1)
+        
+        return min(len(scores), max(keep, self.min_k))
+    
+    def mmr(self, vectors: np.ndarray, query: np.ndarray, k: int) -> List[int]:
+        """
+        Maximal marginal relevance ordering
+        
+        Args:
+            vectors: Candidate vectors, one per row
+            query: Query vector
+            k: Number of candidates to pick
+        
+        Returns:
+            Indices of the picked candidates in selection order
+        """
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+        query = query / max(float(np.linalg.norm(query)), 1e-9)
+        
+        relevance = vectors @ query
+        similarity = vectors @ vectors.T
+        # Highest similarity of each candidate to anything picked so far
+        redundancy = np.full(len(vectors), -np.inf, dtype=np.float32)
+        available = np.ones(len(vectors), dtype=bool)
+        
+        picked = []
+        for _ in range(min(k, len(vectors))):
+            if picked:
+                marginal = self.mmr_lambda * relevance - (1 - self.mmr_lambda) * redundancy
+            else:
+                marginal = relevance.copy()
+            marginal[~available] = -np.inf
+            best = int(np.argmax(marginal))
+            picked.append(best)
+            available[best] = False
+            redundancy = np.maximum(redundancy, similarity[best])
+        return picked
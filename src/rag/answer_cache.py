@@ -0,0 +1,146 @@
+"""Semantic answer cache keyed by query-embedding similarity"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """Reuse answers for near-identical questions that retrieved the same chunks"""
+    
+    def __init__(self, threshold: float = 0.95, max_entries: int = 512):
+        """
+        Initialize semantic answer cache
+        
+        Args:
+            threshold: Minimum cosine similarity between question embeddings
+            max_entries: Maximum number of cached answers (least recently used are evicted)
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.version = ""
+        self.hits = 0
+        self.misses = 0
+        
+        # entry id -> (chunk key, unit question vector, answer)
+        self._entries: OrderedDict[int, Tuple[Tuple[str, ...], np.ndarray, str]] = OrderedDict()
+        # chunk key -> entry ids, so lookups only compare questions with the same chunks
+        self._groups: Dict[Tuple[str, ...], List[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+    
+    def get(
+        self,
+        query_embedding: Sequence[float],
+        chunk_ids: Sequence[str],
+        version: str = ""
+    ) -> str | None:
+        """
+        Look up a cached answer
+        
+        Args:
+            query_embedding: Embedding of the new question
+            chunk_ids: Ids of the chunks retrieved for the new question
+            version: Current index version (a change clears the cache)
+        
+        Returns:
+            Cached answer, or None if no similar question with the same chunks is cached
+        """
+        key = tuple(chunk_ids)
+        vector = self._unit(query_embedding)
+        
+        with self._lock:
+            self._check_version(version)
+            
+            entry_ids = self._groups.get(key)
+            if not entry_ids:
+                self.misses += 1
+                return None
+            
+            vectors = np.stack([self._entries[entry_id][1] for entry_id in entry_ids])
+            similarities = vectors @ vector
+            best = int(np.argmax(similarities))
+            
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+            
+            entry_id = entry_ids[best]
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            return self._entries[entry_id][2]
+    
+    def put(
+        self,
+        query_embedding: Sequence[float],
+        chunk_ids: Sequence[str],
+        answer: str,
+        version: str = ""
+    ) -> None:
+        """
+        Store an answer
+        
+        Args:
+            query_embedding: Embedding of the question
+            chunk_ids: Ids of the chunks the answer was generated from
+            answer: Generated answer
+            version: Index version the answer was generated against
+        """
+        key = tuple(chunk_ids)
+        vector = self._unit(query_embedding)
+        
+        with self._lock:
+            self._check_version(version)
+            
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (key, vector, answer)
+            self._groups.setdefault(key, []).append(entry_id)
+            
+            while len(self._entries) > self.max_entries:
+                old_id, (old_key, _, _) = self._entries.popitem(last=False)
+                group = self._groups[old_key]
+                group.remove(old_id)
+                if not group:
+                    del self._groups[old_key]
+    
+    def clear(self) -> None:
+        """Remove all cached answers"""
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+        
+        Returns:
+            Dict with size, hits, misses and index version
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "version": self.version,
+            }
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+    
+    def _check_version(self, version: str) -> None:
+        """Drop all answers when the index version changes"""
+        if version != self.version:
+            self._entries.clear()
+            self._groups.clear()
+            self.version = version
+    
+    @staticmethod
+    def _unit(vector: Sequence[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
@@ -0,0 +1,123 @@
+"""Micro-batching of answer generation requests"""
+
+import asyncio
+from typing import Any, Dict, List, Set, Tuple
+
+from .gemini_client import GeminiClient
+
+
+class BatchingGenerator:
+    """Collect concurrent questions for a short window and answer them in one Gemini request"""
+    
+    def __init__(
+        self,
+        gemini_client: GeminiClient,
+        max_batch_size: int = 4,
+        max_wait: float = 0.2
+    ):
+        """
+        Initialize batching generator
+        
+        Args:
+            gemini_client: Client used for batched and fallback requests
+            max_batch_size: Maximum number of questions answered by one request
+            max_wait: Seconds the first queued question waits for others to join
+                while another batch is in flight (an idle batcher sends at once)
+        """
+        self.gemini = gemini_client
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        
+        self._pending: List[Tuple[str, str, asyncio.Future]] = []
+        self._timer: asyncio.Handle | None = None
+        self._running: Set[asyncio.Task] = set()
+        
+        self.batches = 0
+        self.batched_questions = 0
+        self.fallbacks = 0
+    
+    async def generate(self, question: str, context: str) -> str:
+        """
+        Queue a question and wait for its answer
+        
+        Args:
+            question: User's question
+            context: Retrieved context for this question
+        
+        Returns:
+            Generated answer
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((question, context, future))
+        
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None and not self._running:
+            # Nothing in flight: send on the next loop iteration, so only questions
+            # submitted together share the request and a lone one does not wait
+            self._timer = loop.call_soon(self._flush)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        
+        return await future
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get batching statistics
+        
+        Returns:
+            Dict with queued questions, batch count, questions per batch and fallbacks
+        """
+        return {
+            "queued": len(self._pending),
+            "batches": self.batches,
+            "avg_batch_size": self.batched_questions / self.batches if self.batches else 0.0,
+            "fallbacks": self.fallbacks,
+        }
+    
+    def _flush(self) -> None:
+        """Start a request for the oldest queued questions"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        batch = self._pending[:self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size:]
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        
+        # Callers that gave up while queued do not need an answer
+        batch = [item for item in batch if not item[2].done()]
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+    
+    async def _run(self, batch: List[Tuple[str, str, asyncio.Future]]) -> None:
+        """Answer one batch and resolve its futures"""
+        items = [(question, context) for question, context, _ in batch]
+        self.batches += 1
+        self.batched_questions += len(items)
+        
+        try:
+            if len(items) == 1:
+                answers = [await self.gemini.agenerate_response(*items[0])]
+            else:
+                try:
+                    answers = await self.gemini.agenerate_batch(items)
+                except ValueError:
+                    # Unusable batch output: answer each question on its own
+                    self.fallbacks += 1
+                    answers = await asyncio.gather(
+                        *(self.gemini.agenerate_response(question, context) for question, context in items)
+                    )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, _, future), answer in zip(batch, answers):
+            if not future.done():
+                future.set_result(answer)
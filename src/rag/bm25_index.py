@@ -0,0 +1,241 @@
+"""BM25 lexical index with array-backed postings"""
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from .local_index import MetadataIndex
+
+# Very common Indonesian function words that carry no lexical signal
+STOPWORDS = frozenset({
+    "yang", "dan", "di", "ke", "dari", "untuk", "dengan", "atau", "pada", "dalam",
+    "ini", "itu", "adalah", "apa", "saja", "bagaimana", "berapa", "kapan", "oleh",
+    "akan", "dapat", "sebagai", "tersebut", "juga", "the", "of", "and",
+})
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+# Thousands separators inside amounts, e.g. "25.000.000" -> "25000000"
+_DIGIT_GROUP_PATTERN = re.compile(r"(?<=\d)[.,](?=\d{3}\b)")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase lexical tokens
+    
+    Args:
+        text: Text to tokenize
+    
+    Returns:
+        List of tokens without stopwords
+    """
+    text = _DIGIT_GROUP_PATTERN.sub("", text.casefold())
+    return [token for token in _TOKEN_PATTERN.findall(text) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over chunks, with postings stored as flat NumPy arrays"""
+    
+    ARRAYS_FILE = "bm25.npz"
+    MANIFEST_FILE = "bm25.json"
+    
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize an empty BM25 index
+        
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.vocabulary: Dict[str, int] = {}
+        
+        # Postings of term t are doc_ids/term_freqs[offsets[t]:offsets[t + 1]]
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.empty(0, dtype=np.int32)
+        self.term_freqs = np.empty(0, dtype=np.float32)
+        self.doc_lengths = np.empty(0, dtype=np.float32)
+        self.avg_doc_length = 0.0
+        self._length_norm = np.empty(0, dtype=np.float32)
+        self._metadata_index = MetadataIndex()
+    
+    def build(self, documents: Iterable[Tuple[str, str, Dict[str, Any]]]) -> None:
+        """
+        Build the index from scratch
+        
+        Args:
+            documents: Iterable of (id, text, metadata) tuples
+        """
+        postings: Dict[int, Dict[int, int]] = {}
+        vocabulary: Dict[str, int] = {}
+        ids = []
+        metadata = []
+        lengths = []
+        
+        for doc_id, (chunk_id, text, meta) in enumerate(documents):
+            tokens = tokenize(text)
+            ids.append(chunk_id)
+            metadata.append(dict(meta or {}))
+            lengths.append(len(tokens))
+            for token in tokens:
+                term_id = vocabulary.setdefault(token, len(vocabulary))
+                doc_counts = postings.setdefault(term_id, {})
+                doc_counts[doc_id] = doc_counts.get(doc_id, 0) + 1
+        
+        counts = np.array([len(postings[t]) for t in range(len(vocabulary))], dtype=np.int64)
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        
+        doc_ids = np.empty(offsets[-1], dtype=np.int32)
+        term_freqs = np.empty(offsets[-1], dtype=np.float32)
+        for term_id in range(len(vocabulary)):
+            start, end = offsets[term_id], offsets[term_id + 1]
+            doc_ids[start:end] = list(postings[term_id].keys())
+            term_freqs[start:end] = list(postings[term_id].values())
+        
+        self.ids = ids
+        self.metadata = metadata
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = np.array(lengths, dtype=np.float32)
+        self._update_length_norm()
+        self._metadata_index = MetadataIndex.build(metadata)
+    
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        filter: Dict[str, Any] | None = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Rank chunks for a query with BM25
+        
+        Args:
+            query: Query text
+            top_k: Number of results
+            filter: Pinecone-style metadata filter
+        
+        Returns:
+            List of (chunk_id, score) tuples, best first; only chunks sharing
+            at least one term with the query are returned
+        """
+        n_docs = len(self.ids)
+        if n_docs == 0 or top_k <= 0:
+            return []
+        
+        scores = np.zeros(n_docs, dtype=np.float32)
+        
+        for term in set(tokenize(query)):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.doc_ids[start:end]
+            tf = self.term_freqs[start:end]
+            df = end - start
+            idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            # Each document appears once per term, so plain fancy-index add is safe
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + self._length_norm[docs])
+        
+        candidates = np.flatnonzero(scores > 0)
+        if filter:
+            candidates = self._metadata_index.select(self.metadata, filter, candidates)
+        if candidates.size == 0:
+            return []
+        
+        candidate_scores = scores[candidates]
+        k = min(top_k, candidates.size)
+        top = np.argpartition(-candidate_scores, k - 1)[:k]
+        top = top[np.argsort(-candidate_scores[top], kind="stable")]
+        
+        return [(self.ids[candidates[i]], float(candidate_scores[i])) for i in top]
+    
+    def save(self, path: str | Path) -> Path:
+        """
+        Persist the index to a directory
+        
+        Args:
+            path: Target directory
+        
+        Returns:
+            Directory the index was written to
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        
+        np.savez(
+            path / self.ARRAYS_FILE,
+            offsets=self.offsets,
+            doc_ids=self.doc_ids,
+            term_freqs=self.term_freqs,
+            doc_lengths=self.doc_lengths,
+        )
+        with open(path / self.MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "k1": self.k1,
+                    "b": self.b,
+                    "ids": self.ids,
+                    "metadata": self.metadata,
+                    "vocabulary": self.vocabulary,
+                },
+                f,
+                ensure_ascii=False
+            )
+        return path
+    
+    @classmethod
+    def load(cls, path: str | Path) -> "BM25Index":
+        """
+        Load an index previously written by save()
+        
+        Args:
+            path: Directory containing the saved index
+        
+        Returns:
+            BM25Index instance
+        """
+        path = Path(path)
+        manifest_path = path / cls.MANIFEST_FILE
+        if not manifest_path.exists():
+            raise FileNotFoundError(f"BM25 index not found: {path}")
+        
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        
+        index = cls(k1=manifest["k1"], b=manifest["b"])
+        index.ids = manifest["ids"]
+        index.metadata = manifest["metadata"]
+        index.vocabulary = manifest["vocabulary"]
+        
+        with np.load(path / cls.ARRAYS_FILE) as arrays:
+            index.offsets = arrays["offsets"]
+            index.doc_ids = arrays["doc_ids"]
+            index.term_freqs = arrays["term_freqs"]
+            index.doc_lengths = arrays["doc_lengths"]
+        index._update_length_norm()
+        index._metadata_index = MetadataIndex.build(index.metadata)
+        
+        return index
+    
+    @classmethod
+    def exists(cls, path: str | Path) -> bool:
+        """Check whether an index has been saved at path"""
+        return (Path(path) / cls.MANIFEST_FILE).exists()
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def _update_length_norm(self) -> None:
+        """Precompute the per-document BM25 length normalization term"""
+        self.avg_doc_length = float(self.doc_lengths.mean()) if self.doc_lengths.size else 0.0
+        relative_length = self.doc_lengths / max(self.avg_doc_length, 1e-9)
+        self._length_norm = (self.k1 * (1 - self.b + self.b * relative_length)).astype(np.float32)
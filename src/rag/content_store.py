@@ -0,0 +1,233 @@
+"""Local append-only content store for chunk text, read via mmap"""
+
+import hashlib
+import json
+import mmap
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence
+
+import numpy as np
+
+
+class ContentStore:
+    """Chunk text, metadata and embeddings keyed by chunk_id, kept out of vector metadata"""
+    
+    DATA_FILE = "content.bin"
+    INDEX_FILE = "content_index.json"
+    VECTORS_FILE = "vectors.npy"
+    VECTOR_IDS_FILE = "vector_ids.json"
+    
+    def __init__(self, path: str | Path):
+        """
+        Initialize content store
+        
+        Args:
+            path: Directory holding the data and offset index files
+        """
+        self.path = Path(path)
+        self.data_path = self.path / self.DATA_FILE
+        self.index_path = self.path / self.INDEX_FILE
+        
+        self.version = ""
+        self._entries: Dict[str, List[Any]] = {}
+        self._map: mmap.mmap | None = None
+        self._mapped_size = 0
+        self._lock = threading.Lock()
+        # Chunk embeddings, loaded on first use: float32 matrix and chunk_id -> row
+        self._vectors: np.ndarray | None = None
+        self._vector_rows: Dict[str, int] | None = None
+        
+        if self.index_path.exists():
+            with open(self.index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            self.version = index.get("version", "")
+            self._entries = index["entries"]
+    
+    @classmethod
+    def exists(cls, path: str | Path) -> bool:
+        """Check whether a content store has been written at path"""
+        return (Path(path) / cls.INDEX_FILE).exists()
+    
+    def add(self, chunk_id: str, content: str, metadata: Dict[str, Any] | None = None) -> None:
+        """
+        Append one chunk; call flush() to persist the offset index
+        
+        Args:
+            chunk_id: Chunk identifier (same as the vector id)
+            content: Chunk text
+            metadata: Chunk metadata (page number, section, ...)
+        """
+        self.add_many([(chunk_id, content, metadata or {})])
+    
+    def add_many(self, chunks: List[tuple[str, str, Dict[str, Any]]]) -> None:
+        """
+        Append chunks; a chunk_id added again points to its newest content
+        
+        Args:
+            chunks: List of (chunk_id, content, metadata) tuples
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        
+        with self._lock, open(self.data_path, "ab") as f:
+            offset = f.tell()
+            for chunk_id, content, metadata in chunks:
+                data = content.encode("utf-8")
+                f.write(data)
+                self._entries[chunk_id] = [offset, len(data), metadata]
+                offset += len(data)
+    
+    def clear(self) -> None:
+        """Remove all chunks (used before a full re-index)"""
+        with self._lock:
+            self._close_map()
+            self._entries = {}
+            self.version = ""
+            if self.data_path.exists():
+                self.data_path.unlink()
+            if self.index_path.exists():
+                self.index_path.unlink()
+            for name in (self.VECTORS_FILE, self.VECTOR_IDS_FILE):
+                (self.path / name).unlink(missing_ok=True)
+            self._vectors = None
+            self._vector_rows = None
+    
+    def flush(self) -> str:
+        """
+        Persist the offset index and compute the store version
+        
+        Returns:
+            Content hash identifying this build of the store
+        """
+        with self._lock:
+            digest = hashlib.sha256()
+            for chunk_id in sorted(self._entries):
+                digest.update(chunk_id.encode("utf-8"))
+                digest.update(b"\0")
+                digest.update(self._read(chunk_id))
+                digest.update(b"\0")
+            self.version = digest.hexdigest()[:16]
+            
+            self.path.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": self.version, "entries": self._entries}, f, ensure_ascii=False)
+            tmp_path.replace(self.index_path)
+        
+        return self.version
+    
+    def get(self, chunk_id: str) -> Dict[str, Any] | None:
+        """
+        Get a chunk's content and metadata
+        
+        Args:
+            chunk_id: Chunk identifier
+        
+        Returns:
+            Dict with content and metadata, or None if unknown
+        """
+        with self._lock:
+            entry = self._entries.get(chunk_id)
+            if entry is None:
+                return None
+            return {
+                "content": self._read(chunk_id).decode("utf-8"),
+                "metadata": entry[2],
+            }
+    
+    def get_many(self, chunk_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get content and metadata for multiple chunks
+        
+        Args:
+            chunk_ids: Chunk identifiers
+        
+        Returns:
+            Dict mapping known chunk ids to their content and metadata
+        """
+        found = {}
+        for chunk_id in chunk_ids:
+            chunk = self.get(chunk_id)
+            if chunk is not None:
+                found[chunk_id] = chunk
+        return found
+    
+    def save_vectors(self, vectors: Dict[str, Sequence[float]]) -> None:
+        """
+        Store chunk embeddings next to the chunk text
+        
+        They let adaptive retrieval diversify results (MMR) without fetching
+        vector values from a remote vector store.
+        
+        Args:
+            vectors: Dict mapping chunk ids to embedding vectors
+        """
+        chunk_ids = list(vectors)
+        matrix = np.asarray([vectors[chunk_id] for chunk_id in chunk_ids], dtype=np.float32)
+        
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            np.save(self.path / self.VECTORS_FILE, matrix)
+            with open(self.path / self.VECTOR_IDS_FILE, "w", encoding="utf-8") as f:
+                json.dump(chunk_ids, f, ensure_ascii=False)
+            self._vectors = None
+            self._vector_rows = None
+    
+    def get_vectors(self, chunk_ids: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Get stored embeddings for multiple chunks
+        
+        Args:
+            chunk_ids: Chunk identifiers
+        
+        Returns:
+            Dict mapping chunk ids with a stored vector to that vector
+        """
+        with self._lock:
+            if self._vector_rows is None:
+                self._load_vectors()
+            rows = self._vector_rows
+            return {chunk_id: self._vectors[rows[chunk_id]] for chunk_id in chunk_ids if chunk_id in rows}
+    
+    def ids(self) -> Iterator[str]:
+        """Iterate over stored chunk ids"""
+        return iter(list(self._entries))
+    
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._entries
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _read(self, chunk_id: str) -> bytes:
+        """Slice a chunk's bytes out of the memory-mapped data file"""
+        offset, length, _ = self._entries[chunk_id]
+        if length == 0:
+            return b""
+        if self._map is None or offset + length > self._mapped_size:
+            self._remap()
+        return self._map[offset:offset + length]
+    
+    def _load_vectors(self) -> None:
+        """Memory-map the stored embeddings, if any were saved"""
+        ids_path = self.path / self.VECTOR_IDS_FILE
+        if not ids_path.exists():
+            self._vectors, self._vector_rows = None, {}
+            return
+        with open(ids_path, encoding="utf-8") as f:
+            chunk_ids = json.load(f)
+        self._vectors = np.load(self.path / self.VECTORS_FILE, mmap_mode="r")
+        self._vector_rows = {chunk_id: row for row, chunk_id in enumerate(chunk_ids)}
+    
+    def _remap(self) -> None:
+        """(Re)map the data file, e.g. after appends grew it"""
+        self._close_map()
+        with open(self.data_path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mapped_size = len(self._map)
+    
+    def _close_map(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            self._mapped_size = 0
@@ -0,0 +1,163 @@
+"""Query-aware extractive compression of retrieved context"""
+
+import re
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+
+from .bm25_index import tokenize
+
+# Sentence ends: ., ! or ? followed by whitespace and an uppercase letter, digit or
+# opening bracket/quote, or a line break. "Rp 25.000.000" and "No. 5" stay intact
+_SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9(\"'])|\n+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences and list items
+    
+    Args:
+        text: Text to split
+    
+    Returns:
+        Non-empty stripped sentences in order
+    """
+    return [sentence.strip() for sentence in _SENTENCE_PATTERN.split(text) if sentence.strip()]
+
+
+class ContextCompressor:
+    """Keep only the sentences most relevant to the question, up to a target size"""
+    
+    def __init__(
+        self,
+        max_chars: int = 6000,
+        k1: float = 1.2,
+        b: float = 0.75,
+        embed_fn: Callable[[List[str]], List[List[float]]] | None = None,
+        embedding_weight: float = 0.5
+    ):
+        """
+        Initialize context compressor
+        
+        Args:
+            max_chars: Target size of the compressed context in characters
+            k1: BM25 term frequency saturation for sentence scoring
+            b: BM25 length normalization for sentence scoring
+            embed_fn: Function embedding sentences (optional; enables semantic
+                scoring against the query embedding)
+            embedding_weight: Weight of the semantic score when embed_fn is set
+        """
+        self.max_chars = max_chars
+        self.k1 = k1
+        self.b = b
+        self.embed_fn = embed_fn
+        self.embedding_weight = embedding_weight
+    
+    def compress(
+        self,
+        query: str,
+        chunks: List[Dict[str, Any]],
+        query_embedding: Sequence[float] | None = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Compress chunks to their most relevant sentences
+        
+        Chunks already within max_chars are returned unchanged.
+        
+        Args:
+            query: User's question
+            chunks: Chunks (or packed spans) in rank order
+            query_embedding: Query embedding, used when embed_fn is set
+        
+        Returns:
+            Chunks that kept at least one sentence, with content reduced to the
+            selected sentences in their original order
+        """
+        if sum(len(chunk["content"]) for chunk in chunks) <= self.max_chars:
+            return chunks
+        
+        selected = self.select(query, [chunk["content"] for chunk in chunks], query_embedding)
+        return [
+            {**chunk, "content": content}
+            for chunk, content in zip(chunks, selected)
+            if content
+        ]
+    
+    def select(
+        self,
+        query: str,
+        texts: List[str],
+        query_embedding: Sequence[float] | None = None
+    ) -> List[str]:
+        """
+        Select the best sentences across texts within max_chars
+        
+        Args:
+            query: User's question
+            texts: Texts in rank order
+            query_embedding: Query embedding, used when embed_fn is set
+        
+        Returns:
+            One string per input text holding its selected sentences (empty if none)
+        """
+        sentences = []
+        owners = []
+        for owner, text in enumerate(texts):
+            for sentence in split_sentences(text):
+                sentences.append(sentence)
+                owners.append(owner)
+        if not sentences:
+            return ["" for _ in texts]
+        
+        scores = self._score(query, sentences, query_embedding)
+        # Earlier texts rank higher, so they win ties
+        order = np.lexsort((np.array(owners), -scores))
+        
+        keep = np.zeros(len(sentences), dtype=bool)
+        used = 0
+        for i in order:
+            size = len(sentences[i]) + 1
+            if used + size > self.max_chars and keep.any():
+                continue
+            keep[i] = True
+            used += size
+        
+        selected = [[] for _ in texts]
+        for i in np.flatnonzero(keep):
+            selected[owners[i]].append(sentences[i])
+        return [" ".join(parts) for parts in selected]
+    
+    def _score(
+        self,
+        query: str,
+        sentences: List[str],
+        query_embedding: Sequence[float] | None
+    ) -> np.ndarray:
+        """Score sentences with BM25 over the query terms, optionally blended with cosine similarity"""
+        query_terms = {term: i for i, term in enumerate(dict.fromkeys(tokenize(query)))}
+        lengths = np.empty(len(sentences), dtype=np.float32)
+        tf = np.zeros((len(sentences), max(1, len(query_terms))), dtype=np.float32)
+        
+        for row, sentence in enumerate(sentences):
+            tokens = tokenize(sentence)
+            lengths[row] = len(tokens)
+            for token in tokens:
+                column = query_terms.get(token)
+                if column is not None:
+                    tf[row, column] += 1
+        
+        df = np.count_nonzero(tf, axis=0)
+        idf = np.log(1 + (len(sentences) - df + 0.5) / (df + 0.5))
+        norm = self.k1 * (1 - self.b + self.b * lengths / max(float(lengths.mean()), 1e-9))
+        scores = (tf * (self.k1 + 1) / (tf + norm[:, None])) @ idf
+        
+        if self.embed_fn is not None and query_embedding is not None:
+            vectors = np.asarray(self.embed_fn(sentences), dtype=np.float32)
+            query_vector = np.asarray(query_embedding, dtype=np.float32)
+            similarity = vectors @ query_vector / (
+                np.linalg.norm(vectors, axis=1) * np.linalg.norm(query_vector) + 1e-9
+            )
+            lexical = scores / scores.max() if scores.max() > 0 else scores
+            scores = (1 - self.embedding_weight) * lexical + self.embedding_weight * similarity
+        
+        return scores
@@ -0,0 +1,156 @@
+"""Pack retrieved chunks into a compact, budgeted prompt context"""
+
+import math
+from typing import Any, Dict, List, Tuple
+
+from .bm25_index import tokenize
+
+
+class ContextPacker:
+    """Merge overlapping chunks into spans, drop near-duplicates and fit a token budget"""
+    
+    def __init__(
+        self,
+        max_tokens: int = 3000,
+        chars_per_token: float = 4.0,
+        min_overlap: int = 20,
+        duplicate_threshold: float = 0.9
+    ):
+        """
+        Initialize context packer
+        
+        Args:
+            max_tokens: Token budget for the packed context
+            chars_per_token: Characters per token used to estimate prompt size
+            min_overlap: Shortest shared text (in characters) treated as chunk overlap
+            duplicate_threshold: Share of a span's terms found in a better span above
+                which it is dropped as a near-duplicate
+        """
+        self.max_tokens = max_tokens
+        self.chars_per_token = chars_per_token
+        self.min_overlap = min_overlap
+        self.duplicate_threshold = duplicate_threshold
+    
+    def pack(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Pack chunks for the prompt
+        
+        Args:
+            chunks: Retrieved chunks, best first
+        
+        Returns:
+            Spans (chunk dicts with the member chunk ids under "ids") in rank order,
+            whose estimated size fits max_tokens
+        """
+        spans = self._merge(chunks)
+        spans = self._drop_duplicates(spans)
+        return self._fit_budget(spans)
+    
+    def estimate_tokens(self, text: str) -> int:
+        """Rough token count of text"""
+        return math.ceil(len(text) / self.chars_per_token)
+    
+    def _merge(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge chunks from the same page that overlap or are adjacent"""
+        groups: Dict[Tuple[Any, Any], List[Tuple[int, Dict[str, Any]]]] = {}
+        for rank, chunk in enumerate(chunks):
+            metadata = chunk.get("metadata", {})
+            key = (metadata.get("source", ""), metadata.get("page_number"))
+            groups.setdefault(key, []).append((rank, chunk))
+        
+        spans = []
+        for members in groups.values():
+            members.sort(key=lambda item: self._position(item[1], item[0]))
+            
+            current = None
+            for rank, chunk in members:
+                if current is not None:
+                    merged = self._join(current, chunk)
+                    if merged is not None:
+                        current["content"] = merged
+                        current["ids"].append(chunk["id"])
+                        current["rank"] = min(current["rank"], rank)
+                        current["score"] = max(current["score"], chunk["score"])
+                        current["_last"] = chunk
+                        continue
+                    spans.append(current)
+                
+                current = {
+                    **chunk,
+                    "ids": [chunk["id"]],
+                    "rank": rank,
+                    "_last": chunk,
+                }
+            spans.append(current)
+        
+        spans.sort(key=lambda span: span["rank"])
+        for span in spans:
+            del span["_last"]
+        return spans
+    
+    def _join(self, span: Dict[str, Any], chunk: Dict[str, Any]) -> str | None:
+        """Text of span followed by chunk, or None if they are not contiguous"""
+        text = span["content"]
+        addition = chunk["content"]
+        
+        overlap = self._overlap(text, addition)
+        if overlap:
+            return text + addition[overlap:]
+        
+        previous = span["_last"].get("metadata", {}).get("chunk_index")
+        index = chunk.get("metadata", {}).get("chunk_index")
+        if previous is not None and index is not None and index == previous + 1:
+            return text + "\n" + addition
+        return None
+    
+    def _overlap(self, text: str, addition: str) -> int:
+        """Length of the longest suffix of text that is a prefix of addition"""
+        if len(addition) < self.min_overlap:
+            return 0
+        
+        probe = addition[:self.min_overlap]
+        start = max(0, len(text) - len(addition))
+        position = text.find(probe, start)
+        while position != -1:
+            tail = len(text) - position
+            if addition.startswith(text[position:]):
+                return tail
+            position = text.find(probe, position + 1)
+        return 0
+    
+    def _drop_duplicates(self, spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop spans whose terms are almost all contained in a better-ranked span"""
+        kept = []
+        kept_terms = []
+        for span in spans:
+            terms = set(tokenize(span["content"]))
+            duplicate = any(
+                terms and len(terms & other) / len(terms) >= self.duplicate_threshold
+                for other in kept_terms
+            )
+            if not duplicate:
+                kept.append(span)
+                kept_terms.append(terms)
+        return kept
+    
+    def _fit_budget(self, spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep spans in rank order while they fit the token budget"""
+        packed = []
+        remaining = self.max_tokens
+        for span in spans:
+            cost = self.estimate_tokens(span["content"])
+            if cost <= remaining:
+                packed.append(span)
+                remaining -= cost
+            elif not packed:
+                # Never return an empty context: truncate the best span to the budget
+                limit = int(self.max_tokens * self.chars_per_token)
+                packed.append({**span, "content": span["content"][:limit]})
+                remaining = 0
+        return packed
+    
+    @staticmethod
+    def _position(chunk: Dict[str, Any], rank: int) -> Tuple[int, int]:
+        """Document order within a page, falling back to rank when chunk_index is missing"""
+        index = chunk.get("metadata", {}).get("chunk_index")
+        return (index, rank) if index is not None else (rank, rank)
@@ -0,0 +1,219 @@
+"""Deadline rules extracted from chunk text for direct lookup"""
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+from .bm25_index import tokenize
+from .context_compressor import split_sentences
+from .section_router import GENERIC_TERMS, SectionRouter
+
+# Rules start a sentence or clause; mid-sentence mentions ("Tolok ukur batas akhir
+# pengajuan ... adalah tanggal kelulusan") qualify a rule rather than state one
+_CLAUSE_START = r"(?:^|(?<=[.:;] ))"
+# Up to the sentence or numbered clause end
+_RULE_END = r"(?=\.?\s\d+\.\d+\.\s|\.\s+[A-Z]|\.?$)"
+# "Batas akhir pengajuan Dana Aplikasi Visa adalah 6 (enam) bulan setelah memulai studi" or
+# "Batas akhir pengajuan Dana Transportasi: a. ... b. ..."
+_DEADLINE_PATTERN = re.compile(
+    _CLAUSE_START
+    + r"batas akhir pengajuan (?:pencairan )?(?P<subject>(?:dana|insentif) [^.:;]{2,80}?)(?: adalah |: )"
+    r"(?P<rule>.+?)" + _RULE_END,
+    re.IGNORECASE
+)
+# "Dana Bantuan Penelitian Tesis/Disertasi tahap 1 diajukan selambat-lambatnya pada akhir durasi ..."
+_SUBMITTED_BY_PATTERN = re.compile(
+    _CLAUSE_START
+    + r"(?P<subject>(?:dana|insentif) [^.:;]{2,80}?) diajukan "
+    r"(?P<rule>(?:paling lambat|selambat-\s?lambatnya) .+?)" + _RULE_END,
+    re.IGNORECASE
+)
+# "paling lambat 7 hari sebelum tanggal keberangkatan", "selambat-lambatnya H-14 kegiatan"
+_RELATIVE_PATTERN = re.compile(
+    r"\b(?:paling lambat|selambat-lambatnya|maksimal) (?:H[-+]\d+\b|\d+ (?:\([a-z ]+\) )?"
+    r"(?:hari kerja|hari|minggu|bulan|tahun) (?:sebelum|setelah|sesudah|sejak|dari)\b)",
+    re.IGNORECASE
+)
+
+# Start of the next list item or clause left at a chunk boundary ("... Tinggi. 5.9")
+_TRAILING_MARKER_PATTERN = re.compile(r"(?:\.\s+(?:\d+(?:\.\d+)*|[a-z])\.?|\s+(?:\d+(?:\.\d+)*|[a-z])\.)$")
+# Places where an overlong rule can be cut: after punctuation or before a list item ("b.", "c)")
+_CLAUSE_BOUNDARY_PATTERN = re.compile(r"[.,;:](?=\s)|\s(?=(?:\d+|[a-z])[.)]\s)")
+
+
+class DeadlineIndex:
+    """Submission deadlines per fund type, built once at indexing time"""
+    
+    MAX_RULE_CHARS = 500
+    
+    def __init__(
+        self,
+        rules: List[Dict[str, Any]] | None = None,
+        router: SectionRouter | None = None
+    ):
+        """
+        Initialize deadline index
+        
+        Args:
+            rules: Rules as dicts with section, subject, rule, page_number and
+                primary (True for an explicit "Batas akhir pengajuan ... adalah" or
+                "... diajukan selambat-lambatnya" rule)
+            router: Maps a fund type to sections (a default router is created if
+                not provided)
+        """
+        self.rules = rules or []
+        self.router = router if router is not None else SectionRouter()
+    
+    def __len__(self) -> int:
+        return len(self.rules)
+    
+    @classmethod
+    def build(
+        cls,
+        chunks: Iterable[Tuple[str, str, Dict[str, Any]]],
+        router: SectionRouter | None = None
+    ) -> "DeadlineIndex":
+        """
+        Extract deadline rules from chunks
+        
+        Args:
+            chunks: (chunk_id, content, metadata) tuples, as stored in the content store
+            router: Router used to tag explicit rules with the section they name
+        
+        Returns:
+            DeadlineIndex with rules deduplicated across overlapping chunks
+        """
+        index = cls(router=router)
+        seen = set()
+        
+        for _, content, metadata in chunks:
+            text = " ".join(content.split())
+            chunk_section = metadata.get("section", "")
+            
+            rules = [
+                index._explicit_rule(match, chunk_section)
+                for pattern in (_DEADLINE_PATTERN, _SUBMITTED_BY_PATTERN)
+                for match in pattern.finditer(text)
+            ]
+            if chunk_section:
+                # Relative limits ("paling lambat 7 hari sebelum ...") stated in the fund's section
+                rules += [
+                    {"section": chunk_section, "subject": chunk_section, "rule": index._trim(sentence), "primary": False}
+                    for sentence in split_sentences(text)
+                    if _RELATIVE_PATTERN.search(sentence)
+                    and not _DEADLINE_PATTERN.search(sentence)
+                    and not _SUBMITTED_BY_PATTERN.search(sentence)
+                ]
+            
+            for rule in rules:
+                key = (rule["section"], rule["subject"], rule["rule"])
+                if key not in seen:
+                    seen.add(key)
+                    rule["page_number"] = metadata.get("page_number")
+                    index.rules.append(rule)
+        
+        # Chunk overlap leaves partial copies of sentences that were also seen whole
+        index.rules = [
+            rule for rule in index.rules
+            if not any(
+                other["section"] == rule["section"] and len(other["rule"]) > len(rule["rule"])
+                and rule["rule"] in other["rule"]
+                for other in index.rules
+            )
+        ]
+        return index
+    
+    def lookup(self, topic: str) -> List[Dict[str, Any]]:
+        """
+        Find the deadline rules for a fund type
+        
+        A match is confident only when an explicit deadline rule exists for the
+        fund; other rules of the same section are returned along with it.
+        
+        Args:
+            topic: Fund type (e.g. "transportasi", "seminar", "ujian keterampilan")
+        
+        Returns:
+            Matching rules, explicit ones first; empty when there is no confident match
+        """
+        terms = [term for term in tokenize(topic) if term not in GENERIC_TERMS]
+        if not terms:
+            return []
+        
+        # Funds without a canonical section ("Dana Ujian Keterampilan") match on their own name
+        by_subject = [
+            rule for rule in self.rules
+            if rule["primary"] and set(terms) <= set(tokenize(rule["subject"]))
+        ]
+        if by_subject:
+            sections = {rule["section"] for rule in by_subject}
+            primary = by_subject
+        else:
+            routed, confidence = self.router.route(topic)
+            sections = set(routed) if confidence >= self.router.min_confidence else set()
+            primary = [rule for rule in self.rules if rule["primary"] and rule["section"] in sections]
+        
+        if not primary:
+            return []
+        related = [rule for rule in self.rules if not rule["primary"] and rule["section"] in sections]
+        return primary + related
+    
+    def save(self, path: str | Path) -> Path:
+        """
+        Write the rules as JSON
+        
+        Args:
+            path: Target file
+        
+        Returns:
+            Path written
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"rules": self.rules}, f, ensure_ascii=False)
+        return path
+    
+    @classmethod
+    def load(cls, path: str | Path, router: SectionRouter | None = None) -> "DeadlineIndex":
+        """
+        Load rules written by save()
+        
+        Args:
+            path: JSON file
+            router: Router used for lookups
+        
+        Returns:
+            DeadlineIndex
+        """
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["rules"], router)
+    
+    def _explicit_rule(self, match: re.Match, chunk_section: str) -> Dict[str, Any]:
+        """Rule from a "Batas akhir pengajuan <fund> adalah ..." match"""
+        subject = match.group("subject").strip()
+        sections, confidence = self.router.route(subject)
+        return {
+            # Funds outside the canonical sections (e.g. "Dana Ujian Keterampilan") keep the chunk's section
+            "section": sections[0] if len(sections) == 1 and confidence == 1.0 else chunk_section,
+            "subject": subject,
+            "rule": self._trim(match.group("rule")),
+            "primary": True,
+        }
+    
+    def _trim(self, text: str) -> str:
+        """
+        Rule text without trailing punctuation or a cut-off clause number
+        
+        Rules longer than MAX_RULE_CHARS are cut at the last sentence or clause
+        boundary under the limit, so no word is left half-written.
+        """
+        text = _TRAILING_MARKER_PATTERN.sub("", text.strip()).rstrip(" .,;")
+        if len(text) <= self.MAX_RULE_CHARS:
+            return text
+        
+        head = text[:self.MAX_RULE_CHARS + 1]
+        cuts = [match.end() for match in _CLAUSE_BOUNDARY_PATTERN.finditer(head)]
+        cut = cuts[-1] if cuts else head.rfind(" ")
+        return self._trim(text[:cut]) if cut > 0 else text[:self.MAX_RULE_CHARS]
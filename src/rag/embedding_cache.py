@@ -0,0 +1,140 @@
+"""Persistent content-addressed cache for embedding vectors"""
+
+import hashlib
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from .sqlite_lru import SQLiteLRUStore
+
+
+class EmbeddingCache(SQLiteLRUStore):
+    """SQLite-backed embedding cache keyed by a hash of (model, task_type, text)"""
+    
+    TABLE = "embeddings"
+    COLUMNS = "vector BLOB NOT NULL"
+    
+    # SQLite limits the number of bound parameters per statement
+    _QUERY_CHUNK = 500
+    
+    def __init__(self, path: str | Path, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize embedding cache
+        
+        Args:
+            path: Path to the SQLite cache file (created if missing)
+            max_bytes: Maximum total size of stored vectors before eviction
+        """
+        super().__init__(path, max_bytes)
+    
+    @staticmethod
+    def make_key(model: str, task_type: str, text: str) -> str:
+        """
+        Build the content-addressed cache key
+        
+        Args:
+            model: Embedding model name
+            task_type: Embedding task type
+            text: Embedded text
+        
+        Returns:
+            Hex SHA-256 digest of the key components
+        """
+        digest = hashlib.sha256()
+        for part in (model, task_type, text):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> List[float] | None:
+        """
+        Get a cached vector
+        
+        Args:
+            key: Cache key from make_key
+        
+        Returns:
+            Cached vector or None if not present
+        """
+        return self.get_many([key]).get(key)
+    
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        """
+        Get cached vectors for multiple keys
+        
+        Args:
+            keys: Cache keys from make_key
+        
+        Returns:
+            Dict mapping found keys to their vectors
+        """
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        
+        with self._lock:
+            for i in range(0, len(unique_keys), self._QUERY_CHUNK):
+                batch = unique_keys[i:i + self._QUERY_CHUNK]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = self._decode(blob)
+            
+            if found:
+                self._touch(found)
+                self._conn.commit()
+        
+        return found
+    
+    def put(self, key: str, vector: Sequence[float]) -> None:
+        """
+        Store a vector
+        
+        Args:
+            key: Cache key from make_key
+            vector: Embedding vector
+        """
+        self.put_many({key: vector})
+    
+    def put_many(self, items: Dict[str, Sequence[float]]) -> None:
+        """
+        Store multiple vectors and evict least recently used entries if needed
+        
+        Args:
+            items: Dict mapping cache keys to embedding vectors
+        """
+        if not items:
+            return
+        
+        now = time.time()
+        rows = []
+        for key, vector in items.items():
+            blob = self._encode(vector)
+            rows.append((key, blob, len(blob), now))
+        
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._evict()
+            self._conn.commit()
+    
+    def total_bytes(self) -> int:
+        """Get the total size of stored vectors in bytes"""
+        with self._lock:
+            return self._total_bytes()
+    
+    @staticmethod
+    def _encode(vector: Sequence[float]) -> bytes:
+        return array("f", vector).tobytes()
+    
+    @staticmethod
+    def _decode(blob: bytes) -> List[float]:
+        vector = array("f")
+        vector.frombytes(blob)
+        return vector.tolist()
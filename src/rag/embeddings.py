@@ -1,10 +1,13 @@
 """Google AI Embeddings using text-embedding-004"""
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from .embedding_cache import EmbeddingCache
+
 load_dotenv()
 
 
@@ -13,18 +16,41 @@ class GoogleEmbeddings:
     
     MODEL_NAME = "models/text-embedding-004"
     DIMENSION = 768  # text-embedding-004 produces 768-dimensional vectors
+    MAX_BATCH_SIZE = 100  # batchEmbedContents accepts at most 100 texts per request
+    MAX_BATCH_BYTES = 500_000  # Keep each request payload well under the API limit
     
-    def __init__(self, api_key: str | None = None):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        batch_size: int = MAX_BATCH_SIZE,
+        max_batch_bytes: int = MAX_BATCH_BYTES,
+        max_concurrency: int = 4,
+        cache: EmbeddingCache | None = None
+    ):
         """
         Initialize Google Embeddings client
         
         Args:
             api_key: Google AI API key (optional, uses env var if not provided)
+            batch_size: Maximum number of texts sent in one embedding request
+            max_batch_bytes: Maximum UTF-8 payload size of one embedding request
+            max_concurrency: Maximum number of batch requests in flight at once
+            cache: Persistent embedding cache (optional, uses EMBEDDING_CACHE_PATH
+                env var if not provided)
         """
         self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
         if not self.api_key:
             raise ValueError("GOOGLE_API_KEY not found in environment variables")
         
+        self.batch_size = max(1, min(batch_size, self.MAX_BATCH_SIZE))
+        self.max_batch_bytes = max_batch_bytes
+        self.max_concurrency = max(1, max_concurrency)
+        
+        cache_path = os.getenv("EMBEDDING_CACHE_PATH")
+        if cache is None and cache_path:
+            cache = EmbeddingCache(cache_path)
+        self.cache = cache
+        
         genai.configure(api_key=self.api_key)
     
     def embed_text(self, text: str) -> List[float]:
@@ -37,12 +63,7 @@ class GoogleEmbeddings:
         Returns:
             List of floats representing the embedding vector
         """
-        result = genai.embed_content(
-            model=self.MODEL_NAME,
-            content=text,
-            task_type="retrieval_document"
-        )
-        return result['embedding']
+        return self._embed_single(text, "retrieval_document")
     
     def embed_query(self, query: str) -> List[float]:
         """
@@ -54,28 +75,189 @@ class GoogleEmbeddings:
         Returns:
             List of floats representing the embedding vector
         """
+        return self._embed_single(query, "retrieval_query")
+    
+    async def aembed_query(self, query: str) -> List[float]:
+        """
+        Generate embedding for a search query without blocking the event loop
+        
+        Args:
+            query: Query text to embed
+            
+        Returns:
+            List of floats representing the embedding vector
+        """
+        return await self._aembed_single(query, "retrieval_query")
+    
+    def embed_texts(
+        self,
+        texts: List[str],
+        task_type: str = "retrieval_document"
+    ) -> List[List[float]]:
+        """
+        Generate embeddings for multiple texts using batched requests
+        
+        Cached vectors are reused; the remaining texts are split into batches
+        by count and payload size, the batches are embedded concurrently and
+        the vectors are returned in input order.
+        
+        Args:
+            texts: List of texts to embed
+            task_type: Embedding task type
+            
+        Returns:
+            List of embedding vectors
+        """
+        if not texts:
+            return []
+        
+        if self.cache is None:
+            return self._embed_uncached(texts, task_type)
+        
+        keys = [EmbeddingCache.make_key(self.MODEL_NAME, task_type, text) for text in texts]
+        cached = self.cache.get_many(keys)
+        
+        # Embed each missing text once, even if it appears several times
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        
+        if missing:
+            new_embeddings = self._embed_uncached(list(missing.values()), task_type)
+            fresh = dict(zip(missing.keys(), new_embeddings))
+            self.cache.put_many(fresh)
+            cached.update(fresh)
+        
+        return [cached[key] for key in keys]
+    
+    def _embed_single(self, text: str, task_type: str) -> List[float]:
+        """
+        Embed one text, going through the cache when enabled
+        
+        Args:
+            text: Text to embed
+            task_type: Embedding task type
+            
+        Returns:
+            Embedding vector
+        """
+        if self.cache is not None:
+            key = EmbeddingCache.make_key(self.MODEL_NAME, task_type, text)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
         result = genai.embed_content(
             model=self.MODEL_NAME,
-            content=query,
-            task_type="retrieval_query"
+            content=text,
+            task_type=task_type
         )
-        return result['embedding']
+        embedding = result['embedding']
+        
+        if self.cache is not None:
+            self.cache.put(key, embedding)
+        return embedding
+    
+    async def _aembed_single(self, text: str, task_type: str) -> List[float]:
+        """
+        Async counterpart of _embed_single
+        
+        Args:
+            text: Text to embed
+            task_type: Embedding task type
+            
+        Returns:
+            Embedding vector
+        """
+        if self.cache is not None:
+            key = EmbeddingCache.make_key(self.MODEL_NAME, task_type, text)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        result = await genai.embed_content_async(
+            model=self.MODEL_NAME,
+            content=text,
+            task_type=task_type
+        )
+        embedding = result['embedding']
+        
+        if self.cache is not None:
+            self.cache.put(key, embedding)
+        return embedding
     
-    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+    def _embed_uncached(self, texts: List[str], task_type: str) -> List[List[float]]:
         """
-        Generate embeddings for multiple texts
+        Embed texts with concurrent batched requests, bypassing the cache
         
         Args:
             texts: List of texts to embed
+            task_type: Embedding task type
             
         Returns:
-            List of embedding vectors
+            List of embedding vectors in input order
+        """
+        batches = self._split_batches(texts)
+        
+        if len(batches) == 1 or self.max_concurrency == 1:
+            results = [self._embed_batch(batch, task_type) for batch in batches]
+        else:
+            workers = min(self.max_concurrency, len(batches))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                # map() yields results in submission order
+                results = list(pool.map(lambda batch: self._embed_batch(batch, task_type), batches))
+        
+        return [embedding for batch in results for embedding in batch]
+    
+    def _split_batches(self, texts: List[str]) -> List[List[str]]:
+        """
+        Split texts into batches bounded by count and UTF-8 payload size
+        
+        Args:
+            texts: List of texts to split
+            
+        Returns:
+            List of text batches, preserving input order
         """
-        embeddings = []
+        batches = []
+        current = []
+        current_bytes = 0
+        
         for text in texts:
-            embedding = self.embed_text(text)
-            embeddings.append(embedding)
-        return embeddings
+            size = len(text.encode("utf-8"))
+            if current and (
+                len(current) >= self.batch_size
+                or current_bytes + size > self.max_batch_bytes
+            ):
+                batches.append(current)
+                current = []
+                current_bytes = 0
+            current.append(text)
+            current_bytes += size
+        
+        if current:
+            batches.append(current)
+        
+        return batches
+    
+    def _embed_batch(self, texts: List[str], task_type: str) -> List[List[float]]:
+        """
+        Embed one batch of texts in a single API request
+        
+        Args:
+            texts: Batch of texts
+            task_type: Embedding task type
+            
+        Returns:
+            List of embedding vectors for the batch
+        """
+        result = genai.embed_content(
+            model=self.MODEL_NAME,
+            content=texts,
+            task_type=task_type
+        )
+        return result['embedding']
     
     @property
     def dimension(self) -> int:
@@ -1,29 +1,49 @@
 """Gemini 2.0 Flash Client for generating responses"""
 
+import json
 import os
-import time
-from typing import Optional
+import re
+from typing import AsyncIterator, List, Optional, Tuple
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from .context_compressor import ContextCompressor
+from .rate_limiter import TokenBucketRateLimiter
+from .response_cache import ResponseCache
+
 load_dotenv()
 
+# Markdown code fence the model sometimes wraps JSON output in
+_JSON_FENCE_PATTERN = re.compile(r"^```(?:json)?\s*|\s*```$")
+
 
 class GeminiClient:
     """Handle text generation using Gemini 2.0 Flash"""
     
     MODEL_NAME = "models/gemini-2.0-flash"
+    MAX_OUTPUT_TOKENS = 8192  # Output token limit of MODEL_NAME
     REQUESTS_PER_MINUTE = 5  # Rate limit: 5 requests per minute
+    # Rate limit queue priority of combined batch requests: single and streamed
+    # questions (priority 0) are sent ahead of them
+    BATCH_PRIORITY = 1
+    
+    DEFAULT_SYSTEM_PROMPT = """Anda adalah asisten AI yang membantu menjawab pertanyaan tentang pencairan beasiswa LPDP (Lembaga Pengelola Dana Pendidikan).
+
+Gunakan HANYA informasi dari konteks yang diberikan untuk menjawab pertanyaan.
+Jika informasi tidak tersedia dalam konteks, katakan bahwa Anda tidak menemukan informasi tersebut.
+Jawab dalam Bahasa Indonesia dengan jelas dan terstruktur.
+Sertakan referensi ke bagian dokumen jika relevan."""
     
-    # Class-level rate limiting state
-    _last_request_time: float = 0
-    _request_interval: float = 60.0 / REQUESTS_PER_MINUTE  # 12 seconds between requests
+    # Limiter shared by all instances in this process (and across processes via its state file)
+    _shared_rate_limiter: TokenBucketRateLimiter | None = None
     
     def __init__(
         self,
         api_key: str | None = None,
         temperature: float = 0.3,
-        max_output_tokens: int = 2048
+        max_output_tokens: int = 2048,
+        cache: ResponseCache | None = None,
+        rate_limiter: TokenBucketRateLimiter | None = None
     ):
         """
         Initialize Gemini client
@@ -32,6 +52,10 @@ class GeminiClient:
             api_key: Google AI API key (optional, uses env var if not provided)
             temperature: Temperature for response generation (0-1)
             max_output_tokens: Maximum tokens in response
+            cache: Persistent response cache (optional, uses RESPONSE_CACHE_PATH
+                env var if not provided)
+            rate_limiter: Request rate limiter (optional, uses a limiter shared by all
+                clients, configured by RATE_LIMIT_STATE_PATH and RATE_LIMIT_BURST)
         """
         self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
         if not self.api_key:
@@ -39,6 +63,14 @@ class GeminiClient:
         
         genai.configure(api_key=self.api_key)
         
+        cache_path = os.getenv("RESPONSE_CACHE_PATH")
+        if cache is None and cache_path:
+            cache = ResponseCache(cache_path)
+        self.cache = cache
+        self.rate_limiter = rate_limiter or self._default_rate_limiter()
+        # Plain-dict view of the generation settings, part of the cache key
+        self._cache_config = {"temperature": temperature, "max_output_tokens": max_output_tokens}
+        
         self.generation_config = genai.types.GenerationConfig(
             temperature=temperature,
             max_output_tokens=max_output_tokens,
@@ -66,16 +98,104 @@ class GeminiClient:
         Returns:
             Generated response text
         """
-        default_system_prompt = """Anda adalah asisten AI yang membantu menjawab pertanyaan tentang pencairan beasiswa LPDP (Lembaga Pengelola Dana Pendidikan).
-
-Gunakan HANYA informasi dari konteks yang diberikan untuk menjawab pertanyaan.
-Jika informasi tidak tersedia dalam konteks, katakan bahwa Anda tidak menemukan informasi tersebut.
-Jawab dalam Bahasa Indonesia dengan jelas dan terstruktur.
-Sertakan referensi ke bagian dokumen jika relevan."""
-
-        system_prompt = system_prompt or default_system_prompt
+        return self._generate(self._build_prompt(query, context, system_prompt))
+    
+    async def agenerate_response(
+        self,
+        query: str,
+        context: str,
+        system_prompt: str | None = None
+    ) -> str:
+        """
+        Generate response based on query and context without blocking the event loop
+        
+        Args:
+            query: User's question
+            context: Retrieved context from RAG
+            system_prompt: Optional system prompt
+            
+        Returns:
+            Generated response text
+        """
+        return await self._agenerate(self._build_prompt(query, context, system_prompt))
+    
+    async def agenerate_response_stream(
+        self,
+        query: str,
+        context: str,
+        system_prompt: str | None = None
+    ) -> AsyncIterator[str]:
+        """
+        Generate a response and yield text pieces as the model streams them
+        
+        Args:
+            query: User's question
+            context: Retrieved context from RAG
+            system_prompt: Optional system prompt
+            
+        Yields:
+            Consecutive pieces of the response text (a cached response is yielded whole)
+        """
+        prompt = self._build_prompt(query, context, system_prompt)
+        
+        key = None
+        if self.cache is not None:
+            key = ResponseCache.make_key(self.MODEL_NAME, self._cache_config, prompt)
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        
+        await self._await_rate_limit()
+        response = await self.model.generate_content_async(prompt, stream=True)
+        
+        parts = []
+        async for chunk in response:
+            if chunk.text:
+                parts.append(chunk.text)
+                yield chunk.text
+        
+        if key is not None:
+            self.cache.put(key, "".join(parts))
+    
+    async def agenerate_batch(
+        self,
+        items: List[Tuple[str, str]],
+        system_prompt: str | None = None
+    ) -> List[str]:
+        """
+        Answer several questions, each with its own context, in one request
+        
+        Args:
+            items: List of (question, context) pairs
+            system_prompt: Optional system prompt
+            
+        Returns:
+            Answers in the same order as items
+            
+        Raises:
+            ValueError: If the response is not a JSON array with one answer per item
+        """
+        prompt = self._build_batch_prompt(items, system_prompt)
+        # Give every answer the same token budget a single request would get, up to the model limit
+        max_output_tokens = min(
+            self._cache_config["max_output_tokens"] * len(items), self.MAX_OUTPUT_TOKENS
+        )
+        text = await self._agenerate(
+            prompt, max_output_tokens=max_output_tokens, priority=self.BATCH_PRIORITY
+        )
+        return self._parse_batch_answers(text, len(items))
+    
+    def _build_prompt(
+        self,
+        query: str,
+        context: str,
+        system_prompt: str | None = None
+    ) -> str:
+        """Assemble the answer prompt from system prompt, context and question"""
+        system_prompt = system_prompt or self.DEFAULT_SYSTEM_PROMPT
         
-        prompt = f"""{system_prompt}
+        return f"""{system_prompt}
 
 KONTEKS:
 {context}
@@ -84,40 +204,177 @@ PERTANYAAN:
 {query}
 
 JAWABAN:"""
+    
+    def _build_batch_prompt(
+        self,
+        items: List[Tuple[str, str]],
+        system_prompt: str | None = None
+    ) -> str:
+        """Assemble one prompt asking for a JSON array of answers to several questions"""
+        system_prompt = system_prompt or self.DEFAULT_SYSTEM_PROMPT
+        
+        sections = "\n\n".join(
+            f"### PERTANYAAN {i}\n\nKONTEKS:\n{context}\n\nPERTANYAAN:\n{query}"
+            for i, (query, context) in enumerate(items, 1)
+        )
+        
+        return f"""{system_prompt}
 
+Jawab {len(items)} pertanyaan berikut secara terpisah. Setiap pertanyaan HANYA boleh dijawab
+berdasarkan KONTEKS miliknya sendiri.
+Kembalikan HANYA array JSON berisi {len(items)} string jawaban, sesuai urutan pertanyaan,
+tanpa teks lain.
+
+{sections}
+
+JAWABAN (array JSON):"""
+    
+    @staticmethod
+    def _parse_batch_answers(text: str, expected: int) -> List[str]:
+        """Parse the JSON array returned for a batch prompt"""
+        try:
+            answers = json.loads(_JSON_FENCE_PATTERN.sub("", text.strip()))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Batch response is not valid JSON: {e}") from e
+        
+        if not isinstance(answers, list) or len(answers) != expected:
+            raise ValueError(f"Expected a JSON array of {expected} answers")
+        if not all(isinstance(answer, str) for answer in answers):
+            raise ValueError("Batch answers must be strings")
+        return answers
+    
+    def _generate(self, prompt: str) -> str:
+        """
+        Generate text for a full prompt, serving repeated prompts from the cache
+        
+        Args:
+            prompt: Complete prompt string
+        
+        Returns:
+            Generated response text
+        """
+        key = None
+        if self.cache is not None:
+            key = ResponseCache.make_key(self.MODEL_NAME, self._cache_config, prompt)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
         self._wait_for_rate_limit()
         response = self.model.generate_content(prompt)
-        return response.text
+        text = response.text
+        
+        if key is not None:
+            self.cache.put(key, text)
+        return text
     
-    def _wait_for_rate_limit(self):
-        """Wait if necessary to respect rate limit of 5 requests per minute"""
-        current_time = time.time()
-        time_since_last_request = current_time - GeminiClient._last_request_time
+    async def _agenerate(
+        self,
+        prompt: str,
+        max_output_tokens: int | None = None,
+        priority: int = 0
+    ) -> str:
+        """
+        Async counterpart of _generate
+        
+        Args:
+            prompt: Complete prompt string
+            max_output_tokens: Override of the client's output token limit
+            priority: Rate limit queue priority (lower values are served first)
+        
+        Returns:
+            Generated response text
+        """
+        config = dict(self._cache_config)
+        overrides = {}
+        if max_output_tokens is not None:
+            config["max_output_tokens"] = overrides["max_output_tokens"] = max_output_tokens
         
-        if time_since_last_request < self._request_interval:
-            wait_time = self._request_interval - time_since_last_request
-            print(f"⏳ Rate limiting: waiting {wait_time:.1f}s...")
-            time.sleep(wait_time)
+        key = None
+        if self.cache is not None:
+            key = ResponseCache.make_key(self.MODEL_NAME, config, prompt)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
         
-        GeminiClient._last_request_time = time.time()
+        await self._await_rate_limit(priority)
+        if overrides:
+            response = await self.model.generate_content_async(prompt, generation_config=overrides)
+        else:
+            response = await self.model.generate_content_async(prompt)
+        text = response.text
+        
+        if key is not None:
+            self.cache.put(key, text)
+        return text
     
-    def summarize_chunks(self, chunks: list[str], max_length: int = 2000) -> str:
+    def _wait_for_rate_limit(self, priority: int = 0) -> float:
+        """
+        Wait for a slot in the rate limit of 5 requests per minute
+        
+        Args:
+            priority: Queue priority (lower values are served first)
+        
+        Returns:
+            Seconds spent waiting
+        """
+        return self.rate_limiter.acquire(priority)
+    
+    async def _await_rate_limit(self, priority: int = 0) -> float:
+        """
+        Wait for a rate limit slot without blocking the event loop
+        
+        Args:
+            priority: Queue priority (lower values are served first)
+        
+        Returns:
+            Seconds spent waiting
+        """
+        return await self.rate_limiter.acquire_async(priority)
+    
+    @classmethod
+    def _default_rate_limiter(cls) -> TokenBucketRateLimiter:
+        """Get or create the process-wide limiter"""
+        if cls._shared_rate_limiter is None:
+            cls._shared_rate_limiter = TokenBucketRateLimiter(
+                requests_per_minute=cls.REQUESTS_PER_MINUTE,
+                burst=int(os.getenv("RATE_LIMIT_BURST", "1")),
+                state_path=os.getenv("RATE_LIMIT_STATE_PATH") or None,
+                name=cls.MODEL_NAME
+            )
+        return cls._shared_rate_limiter
+    
+    def summarize_chunks(
+        self,
+        chunks: list[str],
+        max_length: int = 2000,
+        query: str | None = None
+    ) -> str:
         """
         Summarize multiple chunks into a coherent context
         
         Args:
             chunks: List of text chunks
             max_length: Maximum length of summary
+            query: Question the context is for (optional); when given, the chunks
+                are shortened locally to their most relevant sentences instead of
+                spending a Gemini request on a summary
             
         Returns:
             Summarized context
         """
-        combined = "\n\n---\n\n".join(chunks)
+        separator = "\n\n---\n\n"
+        combined = separator.join(chunks)
         
         # If combined text is short enough, return as is
         if len(combined) <= max_length:
             return combined
         
+        if query is not None:
+            budget = max(1, max_length - len(separator) * (len(chunks) - 1))
+            selected = ContextCompressor(max_chars=budget).select(query, chunks)
+            return separator.join(text for text in selected if text)
+        
         prompt = f"""Ringkas informasi berikut menjadi teks yang koheren dan informatif.
 Pertahankan detail penting dan angka-angka spesifik.
 Maksimal {max_length} karakter.
@@ -127,6 +384,4 @@ TEKS:
 
 RINGKASAN:"""
 
-        self._wait_for_rate_limit()
-        response = self.model.generate_content(prompt)
-        return response.text
+        return self._generate(prompt)
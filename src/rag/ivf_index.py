@@ -0,0 +1,225 @@
+"""Inverted-file (IVF) approximate nearest-neighbour mode for the local vector index"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+
+from .local_index import LocalVectorIndex, MetadataIndex, _Namespace
+
+
+@dataclass
+class _IVFLists:
+    """Coarse quantizer of one namespace: centroids and contiguous row ranges per list"""
+    centroids: np.ndarray
+    offsets: np.ndarray  # list i covers rows offsets[i]:offsets[i + 1]
+    
+    @property
+    def trained_count(self) -> int:
+        return int(self.offsets[-1])
+
+
+class IVFVectorIndex(LocalVectorIndex):
+    """Local vector index with an IVF coarse quantizer for sub-linear search"""
+    
+    ASSIGN_BATCH = 8192
+    
+    def __init__(
+        self,
+        dimension: int = 768,
+        metric: str = "cosine",
+        path: str | Path | None = None,
+        n_probe: int = 8
+    ):
+        """
+        Initialize IVF vector index
+        
+        Args:
+            dimension: Dimension of embedding vectors
+            metric: Similarity metric (cosine or dotproduct)
+            path: Directory used by save() (optional)
+            n_probe: Number of inverted lists scanned per query
+        """
+        super().__init__(dimension=dimension, metric=metric, path=path)
+        self.n_probe = n_probe
+        self._lists: Dict[str, _IVFLists] = {}
+    
+    def build(
+        self,
+        namespace: str = "",
+        n_lists: int | None = None,
+        iterations: int = 10,
+        sample_size: int = 100_000,
+        seed: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Train the coarse quantizer and reorder vectors into inverted lists
+        
+        Vectors are clustered with k-means and the storage is reordered so each
+        inverted list is a contiguous slice of the matrix. Queries score the
+        centroids, then only the rows of the n_probe closest lists. Vectors
+        upserted after build() are scanned exhaustively until the next build().
+        
+        Args:
+            namespace: Namespace to build
+            n_lists: Number of inverted lists (default: about sqrt of the vector count)
+            iterations: Number of k-means iterations
+            sample_size: Maximum number of vectors used for training
+            seed: Random seed for reproducible builds
+        
+        Returns:
+            Build summary with list count and list size range
+        """
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            if ns is None or ns.count == 0:
+                self._lists.pop(namespace, None)
+                return {"n_lists": 0, "vectors": 0}
+            
+            vectors = np.ascontiguousarray(ns.vectors)
+            n_lists = n_lists or max(1, int(np.sqrt(ns.count)))
+            n_lists = min(n_lists, ns.count)
+            
+            rng = np.random.default_rng(seed)
+            if ns.count > sample_size:
+                sample = vectors[rng.choice(ns.count, sample_size, replace=False)]
+            else:
+                sample = vectors
+            centroids = self._kmeans(sample, n_lists, iterations, rng)
+            
+            assignment = self._assign(vectors, centroids)
+            order = np.argsort(assignment, kind="stable")
+            counts = np.bincount(assignment, minlength=n_lists)
+            offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+            
+            ns.matrix = vectors[order]
+            ns.ids = [ns.ids[row] for row in order]
+            ns.metadata = [ns.metadata[row] for row in order]
+            ns.rows = {vector_id: row for row, vector_id in enumerate(ns.ids)}
+            ns.metadata_index = MetadataIndex.build(ns.metadata)
+            
+            self._lists[namespace] = _IVFLists(centroids=centroids, offsets=offsets)
+        
+        return {
+            "n_lists": n_lists,
+            "vectors": int(ns.count),
+            "min_list_size": int(counts.min()),
+            "max_list_size": int(counts.max()),
+        }
+    
+    def delete_all(self, namespace: str = "") -> None:
+        """
+        Delete all vectors in a namespace
+        
+        Args:
+            namespace: Namespace to delete from
+        """
+        with self._lock:
+            super().delete_all(namespace)
+            self._lists.pop(namespace, None)
+    
+    def describe_index_stats(self) -> Dict[str, Any]:
+        """Get index statistics, including inverted list counts"""
+        stats = super().describe_index_stats()
+        with self._lock:
+            for name, lists in self._lists.items():
+                if name in stats["namespaces"]:
+                    stats["namespaces"][name]["ivf_lists"] = int(lists.centroids.shape[0])
+        return stats
+    
+    def _candidate_rows(
+        self,
+        namespace: str,
+        ns: _Namespace,
+        query: np.ndarray
+    ) -> np.ndarray | None:
+        lists = self._lists.get(namespace)
+        if lists is None:
+            return None
+        
+        n_lists = lists.centroids.shape[0]
+        n_probe = min(self.n_probe, n_lists)
+        probed = self._top_k(lists.centroids @ query, n_probe)
+        
+        ranges = [np.arange(lists.offsets[i], lists.offsets[i + 1]) for i in probed]
+        # Rows upserted after build() are not in any list yet
+        if ns.count > lists.trained_count:
+            ranges.append(np.arange(lists.trained_count, ns.count))
+        
+        return np.concatenate(ranges)
+    
+    def _save_namespace_extras(self, name: str, position: int, target: Path) -> Dict[str, Any]:
+        lists = self._lists.get(name)
+        if lists is None:
+            return {}
+        
+        centroids_file = f"centroids_{position}.npy"
+        offsets_file = f"offsets_{position}.npy"
+        np.save(target / centroids_file, lists.centroids)
+        np.save(target / offsets_file, lists.offsets)
+        return {"centroids_file": centroids_file, "offsets_file": offsets_file}
+    
+    def _load_namespace_extras(
+        self,
+        name: str,
+        entry: Dict[str, Any],
+        path: Path,
+        mmap: bool
+    ) -> None:
+        if "centroids_file" not in entry:
+            return
+        
+        mmap_mode = "r" if mmap else None
+        self._lists[name] = _IVFLists(
+            centroids=np.load(path / entry["centroids_file"], mmap_mode=mmap_mode),
+            offsets=np.load(path / entry["offsets_file"]),
+        )
+    
+    def _kmeans(
+        self,
+        data: np.ndarray,
+        n_lists: int,
+        iterations: int,
+        rng: np.random.Generator
+    ) -> np.ndarray:
+        """
+        Cluster vectors with (spherical, for cosine) k-means
+        
+        Args:
+            data: Training vectors
+            n_lists: Number of clusters
+            iterations: Number of Lloyd iterations
+            rng: Random generator
+        
+        Returns:
+            Centroid matrix of shape (n_lists, dimension)
+        """
+        centroids = data[rng.choice(data.shape[0], n_lists, replace=False)].copy()
+        
+        for _ in range(iterations):
+            assignment = self._assign(data, centroids)
+            order = np.argsort(assignment, kind="stable")
+            counts = np.bincount(assignment, minlength=n_lists)
+            
+            non_empty = np.flatnonzero(counts)
+            starts = np.concatenate(([0], np.cumsum(counts)))[non_empty]
+            sums = np.add.reduceat(data[order], starts, axis=0)
+            centroids[non_empty] = sums / counts[non_empty, None]
+            
+            # Re-seed empty clusters from random vectors
+            empty = np.flatnonzero(counts == 0)
+            if empty.size:
+                centroids[empty] = data[rng.choice(data.shape[0], empty.size, replace=False)]
+            
+            centroids = self._prepare(centroids)
+        
+        return centroids.astype(np.float32)
+    
+    def _assign(self, data: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """Assign each vector to its most similar centroid, in memory-bounded batches"""
+        assignment = np.empty(data.shape[0], dtype=np.int64)
+        for start in range(0, data.shape[0], self.ASSIGN_BATCH):
+            batch = data[start:start + self.ASSIGN_BATCH]
+            assignment[start:start + batch.shape[0]] = np.argmax(batch @ centroids.T, axis=1)
+        return assignment
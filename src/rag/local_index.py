@@ -0,0 +1,528 @@
+"""Local in-process vector index, a drop-in replacement for PineconeClient"""
+
+import json
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Sequence
+
+import numpy as np
+
+# Metadata fields filters test for equality; routed queries filter on the section
+INDEXED_FIELDS = ("section",)
+
+
+def matches_filter(metadata: Dict[str, Any], filter: Dict[str, Any] | None) -> bool:
+    """
+    Evaluate a Pinecone-style metadata filter against one metadata dict
+    
+    Supports implicit equality, $eq, $ne, $gt, $gte, $lt, $lte, $in, $nin,
+    $exists and the $and / $or combinators.
+    
+    Args:
+        metadata: Vector metadata
+        filter: Pinecone metadata filter (None matches everything)
+    
+    Returns:
+        True if the metadata satisfies the filter
+    """
+    if not filter:
+        return True
+    
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict):
+            for op, expected in condition.items():
+                if not _apply_operator(metadata, key, op, expected):
+                    return False
+        elif not _apply_operator(metadata, key, "$eq", condition):
+            return False
+    
+    return True
+
+
+def _apply_operator(metadata: Dict[str, Any], key: str, op: str, expected: Any) -> bool:
+    """Apply a single filter operator to one metadata field"""
+    present = key in metadata
+    value = metadata.get(key)
+    
+    if op == "$exists":
+        return present == bool(expected)
+    if op == "$eq":
+        return present and _equals(value, expected)
+    if op == "$ne":
+        return not (present and _equals(value, expected))
+    if op == "$in":
+        return present and any(_equals(value, item) for item in expected)
+    if op == "$nin":
+        return not (present and any(_equals(value, item) for item in expected))
+    
+    if not present or isinstance(value, (str, list, bool)) or value is None:
+        return False
+    if op == "$gt":
+        return value > expected
+    if op == "$gte":
+        return value >= expected
+    if op == "$lt":
+        return value < expected
+    if op == "$lte":
+        return value <= expected
+    
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def _equals(value: Any, expected: Any) -> bool:
+    # Pinecone list metadata matches if any element equals the expected value
+    if isinstance(value, list):
+        return expected in value
+    return value == expected
+
+
+class MetadataIndex:
+    """Row numbers per metadata value, so equality filters skip the per-row scan"""
+    
+    def __init__(self, fields: Iterable[str] = INDEXED_FIELDS):
+        """
+        Initialize an empty metadata index
+        
+        Args:
+            fields: Metadata fields to index
+        """
+        self.fields = tuple(fields)
+        self._rows: Dict[str, Dict[Any, set]] = {field: {} for field in self.fields}
+        self._arrays: Dict[tuple, np.ndarray] = {}
+    
+    @classmethod
+    def build(
+        cls,
+        metadata: Sequence[Dict[str, Any]],
+        fields: Iterable[str] = INDEXED_FIELDS
+    ) -> "MetadataIndex":
+        """
+        Index the metadata of every row
+        
+        Args:
+            metadata: Metadata per row, in row order
+            fields: Metadata fields to index
+        
+        Returns:
+            MetadataIndex over the rows
+        """
+        index = cls(fields)
+        for row, meta in enumerate(metadata):
+            index.add(row, meta)
+        return index
+    
+    def add(self, row: int, metadata: Dict[str, Any]) -> None:
+        """Record the indexed values of one row"""
+        for field, value in self._values(metadata):
+            self._rows[field].setdefault(value, set()).add(row)
+        self._arrays.clear()
+    
+    def remove(self, row: int, metadata: Dict[str, Any]) -> None:
+        """Forget the indexed values of one row"""
+        for field, value in self._values(metadata):
+            self._rows[field].get(value, set()).discard(row)
+        self._arrays.clear()
+    
+    def select(
+        self,
+        metadata: Sequence[Dict[str, Any]],
+        filter: Dict[str, Any],
+        rows: np.ndarray | None = None
+    ) -> np.ndarray:
+        """
+        Rows passing a Pinecone-style metadata filter
+        
+        Top-level equality and $in conditions on indexed fields are answered
+        from the index; remaining conditions are checked with matches_filter on
+        the rows left after that.
+        
+        Args:
+            metadata: Metadata per row the index was built from
+            filter: Pinecone metadata filter
+            rows: Candidate rows to restrict to, ascending (all rows if None)
+        
+        Returns:
+            Ascending row numbers passing the filter
+        """
+        remaining = {}
+        for key, condition in filter.items():
+            indexed = self._lookup(key, condition)
+            if indexed is None:
+                remaining[key] = condition
+            else:
+                rows = indexed if rows is None else np.intersect1d(rows, indexed, assume_unique=True)
+        
+        if rows is None:
+            rows = np.arange(len(metadata))
+        if remaining and rows.size:
+            rows = rows[np.fromiter(
+                (matches_filter(metadata[row], remaining) for row in rows),
+                dtype=bool,
+                count=rows.size
+            )]
+        return rows
+    
+    def _lookup(self, key: str, condition: Any) -> np.ndarray | None:
+        """Rows for an equality or $in condition on an indexed field, None otherwise"""
+        if key not in self._rows:
+            return None
+        if not isinstance(condition, dict):
+            values = [condition]
+        elif condition.keys() == {"$eq"}:
+            values = [condition["$eq"]]
+        elif condition.keys() == {"$in"}:
+            values = list(condition["$in"])
+        else:
+            return None
+        if not all(isinstance(value, (str, int, float, bool)) for value in values):
+            return None
+        
+        cache_key = (key, *sorted(map(repr, values)))
+        rows = self._arrays.get(cache_key)
+        if rows is None:
+            found = set().union(*(self._rows[key].get(value, ()) for value in values))
+            rows = np.array(sorted(found), dtype=np.int64)
+            self._arrays[cache_key] = rows
+        return rows
+    
+    def _values(self, metadata: Dict[str, Any]):
+        for field in self.fields:
+            value = metadata.get(field)
+            # List metadata matches any of its elements, like Pinecone
+            for item in value if isinstance(value, list) else [value]:
+                if isinstance(item, (str, int, float, bool)):
+                    yield field, item
+
+
+class _Namespace:
+    """Vectors of one namespace stored in a contiguous float32 matrix"""
+    
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self.matrix = np.empty((0, dimension), dtype=np.float32)
+        self.count = 0
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.rows: Dict[str, int] = {}
+        self.metadata_index = MetadataIndex()
+    
+    def reserve(self, extra: int) -> None:
+        """Grow the matrix capacity geometrically to fit extra rows"""
+        needed = self.count + extra
+        # A memory-mapped matrix is read-only and must be copied before writing
+        if needed <= self.matrix.shape[0] and self.matrix.flags.writeable:
+            return
+        capacity = max(needed, 2 * self.matrix.shape[0], 64)
+        grown = np.empty((capacity, self.dimension), dtype=np.float32)
+        grown[:self.count] = self.matrix[:self.count]
+        self.matrix = grown
+    
+    @property
+    def vectors(self) -> np.ndarray:
+        return self.matrix[:self.count]
+
+
+class LocalVectorIndex:
+    """In-process vector index with vectorized cosine top-k search"""
+    
+    SUPPORTED_METRICS = ("cosine", "dotproduct")
+    MANIFEST_FILE = "index.json"
+    
+    def __init__(
+        self,
+        dimension: int = 768,
+        metric: str = "cosine",
+        path: str | Path | None = None
+    ):
+        """
+        Initialize local vector index
+        
+        Args:
+            dimension: Dimension of embedding vectors (768 for Google text-embedding-004)
+            metric: Similarity metric (cosine or dotproduct)
+            path: Directory used by save() (optional)
+        """
+        if metric not in self.SUPPORTED_METRICS:
+            raise ValueError(f"Unsupported metric for local index: {metric}")
+        
+        self.dimension = dimension
+        self.metric = metric
+        self.path = Path(path) if path else None
+        self.index_name = "local"
+        
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._lock = threading.RLock()
+    
+    def create_index_if_not_exists(self) -> None:
+        """No-op kept for PineconeClient compatibility"""
+        print(f"Using local vector index ({self.metric}, {self.dimension} dims)")
+    
+    def get_index(self) -> "LocalVectorIndex":
+        """Return the index itself for PineconeClient compatibility"""
+        return self
+    
+    def upsert_vectors(
+        self,
+        vectors: List[Dict[str, Any]],
+        namespace: str = ""
+    ) -> Dict[str, Any]:
+        """
+        Insert or update vectors
+        
+        Args:
+            vectors: List of vectors with id, values, and metadata
+            namespace: Namespace for the vectors
+        
+        Returns:
+            Upsert summary compatible with PineconeClient.upsert_vectors
+        """
+        if not vectors:
+            return {"batches": 0, "total_vectors": 0}
+        
+        values = np.asarray([v["values"] for v in vectors], dtype=np.float32)
+        if values.ndim != 2 or values.shape[1] != self.dimension:
+            raise ValueError(
+                f"Vector dimension mismatch: expected {self.dimension}, got {values.shape[-1]}"
+            )
+        values = self._prepare(values)
+        
+        with self._lock:
+            ns = self._namespaces.setdefault(namespace, _Namespace(self.dimension))
+            ns.reserve(len(vectors))
+            
+            for vector, row_values in zip(vectors, values):
+                vector_id = vector["id"]
+                row = ns.rows.get(vector_id)
+                if row is None:
+                    row = ns.count
+                    ns.rows[vector_id] = row
+                    ns.ids.append(vector_id)
+                    ns.metadata.append({})
+                    ns.count += 1
+                ns.matrix[row] = row_values
+                ns.metadata_index.remove(row, ns.metadata[row])
+                ns.metadata[row] = dict(vector.get("metadata") or {})
+                ns.metadata_index.add(row, ns.metadata[row])
+        
+        return {"batches": 1, "total_vectors": len(vectors)}
+    
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 5,
+        namespace: str = "",
+        filter: Dict[str, Any] | None = None,
+        include_metadata: bool = True,
+        include_values: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Query for the most similar vectors
+        
+        Args:
+            vector: Query vector
+            top_k: Number of results to return
+            namespace: Namespace to search in
+            filter: Pinecone-style metadata filter
+            include_metadata: Whether to include metadata in results
+            include_values: Whether to include stored vectors in results
+        
+        Returns:
+            Query results with matches, shaped like a Pinecone response
+        """
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            if ns is None or ns.count == 0 or top_k <= 0:
+                return {"matches": [], "namespace": namespace}
+            
+            query = self._prepare(np.asarray(vector, dtype=np.float32)[None, :])[0]
+            
+            if filter:
+                # Score every row that passes the filter: narrowing candidates first
+                # (IVF probing) would leave selective filters with few or no hits
+                rows = ns.metadata_index.select(ns.metadata, filter)
+            else:
+                rows = self._candidate_rows(namespace, ns, query)
+            
+            if rows is None:
+                rows = np.arange(ns.count)
+                scores = ns.vectors @ query
+            else:
+                scores = ns.matrix[rows] @ query
+            
+            matches = []
+            for position in self._top_k(scores, top_k):
+                row = rows[position]
+                match = {"id": ns.ids[row], "score": float(scores[position])}
+                if include_metadata:
+                    match["metadata"] = dict(ns.metadata[row])
+                if include_values:
+                    match["values"] = ns.matrix[row].tolist()
+                matches.append(match)
+        
+        return {"matches": matches, "namespace": namespace}
+    
+    def delete_all(self, namespace: str = "") -> None:
+        """
+        Delete all vectors in a namespace
+        
+        Args:
+            namespace: Namespace to delete from
+        """
+        with self._lock:
+            self._namespaces.pop(namespace, None)
+    
+    def describe_index_stats(self) -> Dict[str, Any]:
+        """Get index statistics"""
+        with self._lock:
+            namespaces = {
+                name: {"vector_count": ns.count}
+                for name, ns in self._namespaces.items()
+            }
+        return {
+            "dimension": self.dimension,
+            "metric": self.metric,
+            "namespaces": namespaces,
+            "total_vector_count": sum(ns["vector_count"] for ns in namespaces.values()),
+        }
+    
+    def save(self, path: str | Path | None = None) -> Path:
+        """
+        Persist the index to a directory
+        
+        Args:
+            path: Target directory (defaults to the path given at construction)
+        
+        Returns:
+            Directory the index was written to
+        """
+        target = Path(path) if path else self.path
+        if target is None:
+            raise ValueError("No path given for saving the local vector index")
+        target.mkdir(parents=True, exist_ok=True)
+        
+        manifest = {
+            "dimension": self.dimension,
+            "metric": self.metric,
+            "namespaces": {},
+        }
+        
+        with self._lock:
+            for i, (name, ns) in enumerate(self._namespaces.items()):
+                vectors_file = f"vectors_{i}.npy"
+                np.save(target / vectors_file, ns.vectors)
+                manifest["namespaces"][name] = {
+                    "vectors_file": vectors_file,
+                    "ids": ns.ids,
+                    "metadata": ns.metadata,
+                    **self._save_namespace_extras(name, i, target),
+                }
+        
+        with open(target / self.MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        
+        return target
+    
+    @classmethod
+    def load(cls, path: str | Path, mmap: bool = False) -> "LocalVectorIndex":
+        """
+        Load an index previously written by save()
+        
+        Args:
+            path: Directory containing the saved index
+            mmap: Memory-map the vector files instead of reading them into memory
+        
+        Returns:
+            LocalVectorIndex instance
+        """
+        path = Path(path)
+        manifest_path = path / cls.MANIFEST_FILE
+        if not manifest_path.exists():
+            raise FileNotFoundError(f"Local vector index not found: {path}")
+        
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        
+        index = cls(dimension=manifest["dimension"], metric=manifest["metric"], path=path)
+        
+        for name, entry in manifest["namespaces"].items():
+            ns = _Namespace(index.dimension)
+            ns.matrix = np.load(path / entry["vectors_file"], mmap_mode="r" if mmap else None)
+            ns.count = ns.matrix.shape[0]
+            ns.ids = list(entry["ids"])
+            ns.metadata = list(entry["metadata"])
+            ns.rows = {vector_id: row for row, vector_id in enumerate(ns.ids)}
+            ns.metadata_index = MetadataIndex.build(ns.metadata)
+            index._namespaces[name] = ns
+            index._load_namespace_extras(name, entry, path, mmap)
+        
+        return index
+    
+    def _prepare(self, values: np.ndarray) -> np.ndarray:
+        """L2-normalize rows for cosine similarity"""
+        if self.metric != "cosine":
+            return values
+        norms = np.linalg.norm(values, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return values / norms
+    
+    def _candidate_rows(
+        self,
+        namespace: str,
+        ns: _Namespace,
+        query: np.ndarray
+    ) -> np.ndarray | None:
+        """
+        Select the rows to score for an unfiltered query
+        
+        Brute force scores every row; subclasses can narrow the candidates.
+        Filtered queries always score every row passing the filter.
+        
+        Args:
+            namespace: Namespace name
+            ns: Namespace storage
+            query: Prepared query vector
+            
+        Returns:
+            Candidate row indices, or None to score all rows
+        """
+        return None
+    
+    def _save_namespace_extras(self, name: str, position: int, target: Path) -> Dict[str, Any]:
+        """Write extra per-namespace files and return their manifest entries"""
+        return {}
+    
+    def _load_namespace_extras(
+        self,
+        name: str,
+        entry: Dict[str, Any],
+        path: Path,
+        mmap: bool
+    ) -> None:
+        """Load extra per-namespace files written by _save_namespace_extras"""
+    
+    @staticmethod
+    def _top_k(scores: np.ndarray, top_k: int) -> np.ndarray:
+        """
+        Select positions with the highest scores, best first
+        
+        Args:
+            scores: Score per candidate
+            top_k: Number of positions to select
+            
+        Returns:
+            Selected positions sorted by descending score
+        """
+        k = min(top_k, scores.shape[0])
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+        if k < scores.shape[0]:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(scores.shape[0])
+        return top[np.argsort(-scores[top], kind="stable")]
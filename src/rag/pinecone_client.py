@@ -1,22 +1,40 @@
 """Pinecone Vector Database Client"""
 
+import json
 import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from pinecone import Pinecone, ServerlessSpec
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Transport failures without an HTTP status, named as in the pinecone client versions
+# we support and the urllib3 / httpx transports underneath them
+_NETWORK_ERROR_NAMES = frozenset({
+    "PineconeConnectionError", "PineconeProtocolError", "PineconeTimeoutError",
+    "MaxRetryError", "NewConnectionError", "ProtocolError", "TransportError",
+})
+
 
 class PineconeClient:
     """Handle Pinecone vector database operations"""
     
+    MAX_REQUEST_BYTES = 2 * 1024 * 1024  # Pinecone rejects upsert requests over 2 MB
+    MAX_BATCH_VECTORS = 1000  # Pinecone accepts at most 1000 vectors per upsert
+    
     def __init__(
         self,
         api_key: str | None = None,
         index_name: str | None = None,
         dimension: int = 768,
-        metric: str = "cosine"
+        metric: str = "cosine",
+        max_batch_bytes: int = 1_500_000,
+        max_workers: int = 4,
+        max_retries: int = 3,
+        retry_base_delay: float = 0.5
     ):
         """
         Initialize Pinecone client
@@ -26,11 +44,19 @@ class PineconeClient:
             index_name: Name of the Pinecone index
             dimension: Dimension of embedding vectors (768 for Google text-embedding-004)
             metric: Distance metric (cosine, euclidean, dotproduct)
+            max_batch_bytes: Maximum serialized size of one upsert batch
+            max_workers: Maximum number of upsert batches sent in parallel
+            max_retries: Retries per batch after the first failed attempt
+            retry_base_delay: Base delay in seconds for exponential backoff
         """
         self.api_key = api_key or os.getenv("PINECONE_API_KEY")
         self.index_name = index_name or os.getenv("PINECONE_INDEX_NAME", "lpdp-pencairan")
         self.dimension = dimension
         self.metric = metric
+        self.max_batch_bytes = min(max_batch_bytes, self.MAX_REQUEST_BYTES)
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
         
         if not self.api_key:
             raise ValueError("PINECONE_API_KEY not found in environment variables")
@@ -73,25 +99,142 @@ class PineconeClient:
         """
         Upsert vectors to Pinecone
         
+        Vectors are grouped into batches by serialized size, the batches are
+        upserted in parallel and each batch is retried with jittered
+        exponential backoff. A batch that keeps failing on rate limiting,
+        server or network errors does not abort the others; any other error
+        (validation, auth, dimension mismatch) is raised at once.
+        
         Args:
             vectors: List of vectors with id, values, and metadata
             namespace: Namespace for the vectors
             
         Returns:
-            Upsert response
+            Upsert report with totals and one result entry per batch
+            
+        Raises:
+            Exception: The first upsert error that a retry cannot fix
         """
         index = self.get_index()
+        batches = self._split_batches(vectors)
+        
+        def upsert_batch(numbered_batch):
+            number, (batch, size) = numbered_batch
+            return self._upsert_with_retry(index, number, batch, size, namespace)
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = list(pool.map(upsert_batch, enumerate(batches)))
+        
+        failed = [result for result in results if result["status"] != "ok"]
+        
+        return {
+            "batches": len(results),
+            "total_vectors": len(vectors),
+            "upserted_vectors": sum(r["vectors"] for r in results if r["status"] == "ok"),
+            "failed_batches": len(failed),
+            "results": results
+        }
+    
+    def _split_batches(
+        self,
+        vectors: List[Dict[str, Any]]
+    ) -> List[tuple[List[Dict[str, Any]], int]]:
+        """
+        Group vectors into batches bounded by serialized size and vector count
+        
+        Args:
+            vectors: List of vectors with id, values, and metadata
+            
+        Returns:
+            List of (batch, serialized size in bytes) tuples
+        """
+        batches = []
+        current = []
+        current_bytes = 0
+        
+        for vector in vectors:
+            size = len(json.dumps(vector, ensure_ascii=False).encode("utf-8"))
+            if current and (
+                len(current) >= self.MAX_BATCH_VECTORS
+                or current_bytes + size > self.max_batch_bytes
+            ):
+                batches.append((current, current_bytes))
+                current = []
+                current_bytes = 0
+            current.append(vector)
+            current_bytes += size
         
-        # Batch upsert (Pinecone recommends batches of 100)
-        batch_size = 100
-        responses = []
+        if current:
+            batches.append((current, current_bytes))
         
-        for i in range(0, len(vectors), batch_size):
-            batch = vectors[i:i + batch_size]
-            response = index.upsert(vectors=batch, namespace=namespace)
-            responses.append(response)
+        return batches
+    
+    def _upsert_with_retry(
+        self,
+        index,
+        number: int,
+        batch: List[Dict[str, Any]],
+        size: int,
+        namespace: str
+    ) -> Dict[str, Any]:
+        """
+        Upsert one batch, retrying transient errors with jittered exponential backoff
+        
+        Args:
+            index: Pinecone index handle
+            number: Batch number used in the report
+            batch: Vectors in the batch
+            size: Serialized size of the batch in bytes
+            namespace: Namespace for the vectors
+            
+        Returns:
+            Result entry for the batch report
+        """
+        result = {
+            "batch": number,
+            "vectors": len(batch),
+            "bytes": size,
+            "attempts": 0,
+            "status": "ok",
+            "error": None
+        }
+        
+        for attempt in range(self.max_retries + 1):
+            result["attempts"] = attempt + 1
+            try:
+                index.upsert(vectors=batch, namespace=namespace)
+                result["error"] = None
+                return result
+            except Exception as e:
+                if not self._is_retryable(e):
+                    raise
+                result["error"] = str(e)
+                if attempt < self.max_retries:
+                    # Full jitter: sleep a random fraction of the exponential delay
+                    delay = self.retry_base_delay * (2 ** attempt)
+                    time.sleep(random.uniform(0, delay))
+        
+        result["status"] = "failed"
+        return result
+    
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """
+        Check whether an upsert error may succeed when retried
         
-        return {"batches": len(responses), "total_vectors": len(vectors)}
+        Args:
+            error: Exception raised by the upsert
+            
+        Returns:
+            True for rate limiting (429), server errors (5xx) and connection or
+            timeout failures
+        """
+        status = getattr(error, "status_code", None) or getattr(error, "status", None)
+        if isinstance(status, int):
+            return status == 429 or status >= 500
+        if isinstance(error, (ConnectionError, TimeoutError)):
+            return True
+        return any(cls.__name__ in _NETWORK_ERROR_NAMES for cls in type(error).__mro__)
     
     def query(
         self,
@@ -99,7 +242,8 @@ class PineconeClient:
         top_k: int = 5,
         namespace: str = "",
         filter: Dict[str, Any] | None = None,
-        include_metadata: bool = True
+        include_metadata: bool = True,
+        include_values: bool = False
     ) -> Dict[str, Any]:
         """
         Query Pinecone for similar vectors
@@ -110,6 +254,7 @@ class PineconeClient:
             namespace: Namespace to search in
             filter: Metadata filter
             include_metadata: Whether to include metadata in results
+            include_values: Whether to include the stored vectors in results
             
         Returns:
             Query results with matches
@@ -121,7 +266,8 @@ class PineconeClient:
             top_k=top_k,
             namespace=namespace,
             filter=filter,
-            include_metadata=include_metadata
+            include_metadata=include_metadata,
+            include_values=include_values
         )
         
         return results
@@ -0,0 +1,121 @@
+"""In-memory LRU cache for query embeddings"""
+
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normalize a query string for use as a cache key
+    
+    Case-folds the text, strips punctuation and collapses whitespace, so
+    "Dana SPP?" and "  dana  spp " map to the same key.
+    
+    Args:
+        text: Raw query text
+    
+    Returns:
+        Normalized query text
+    """
+    folded = text.casefold()
+    without_punctuation = "".join(
+        " " if unicodedata.category(char).startswith("P") else char
+        for char in folded
+    )
+    return " ".join(without_punctuation.split())
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU cache with TTL for query embedding vectors"""
+    
+    def __init__(self, max_size: int = 1024, ttl_seconds: float | None = 3600.0):
+        """
+        Initialize query embedding cache
+        
+        Args:
+            max_size: Maximum number of cached queries
+            ttl_seconds: Time-to-live of an entry in seconds (None disables expiry)
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        
+        self._entries: OrderedDict[str, Tuple[float, List[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, query: str) -> List[float] | None:
+        """
+        Get the cached embedding for a query
+        
+        Args:
+            query: Raw query text (normalized internally)
+        
+        Returns:
+            Cached embedding vector or None on a miss
+        """
+        key = normalize_query(query)
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry[0]):
+                del self._entries[key]
+                entry = None
+            
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, query: str, embedding: List[float]) -> None:
+        """
+        Store the embedding for a query
+        
+        Args:
+            query: Raw query text (normalized internally)
+            embedding: Query embedding vector
+        """
+        key = normalize_query(query)
+        
+        with self._lock:
+            self._entries[key] = (time.monotonic(), embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Remove all entries and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+        
+        Returns:
+            Dict with size, hits, misses and hit rate
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+    
+    def _is_expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds
@@ -0,0 +1,208 @@
+"""Token-bucket rate limiter with optional cross-process state"""
+
+import asyncio
+import heapq
+import itertools
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+
+class TokenBucketRateLimiter:
+    """Token bucket shared by all callers, served in priority order (lower value first)"""
+    
+    POLL_INTERVAL = 0.05  # How often queued callers check whether they reached the head
+    
+    def __init__(
+        self,
+        requests_per_minute: float,
+        burst: int = 1,
+        state_path: str | Path | None = None,
+        name: str = "default"
+    ):
+        """
+        Initialize rate limiter
+        
+        Args:
+            requests_per_minute: Sustained request rate
+            burst: Bucket capacity, i.e. how many requests may be sent back to back
+            state_path: SQLite file holding the bucket so that every process on the
+                host draws from the same budget (optional, in-process state if not provided)
+            name: Bucket name, so several limits can share one state file
+        """
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(max(1, burst))
+        self.name = name
+        
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._tokens = self.capacity
+        self._updated = time.time()
+        
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        
+        self._conn: sqlite3.Connection | None = None
+        if state_path is not None:
+            Path(state_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(
+                str(state_path),
+                timeout=10.0,
+                isolation_level=None,
+                check_same_thread=False
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS buckets (
+                    name TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL
+                )"""
+            )
+    
+    def try_acquire(self) -> float:
+        """
+        Take a token if one is available, without waiting or queueing
+        
+        Returns:
+            0.0 if a token was taken, otherwise seconds until the next token is due
+        """
+        with self._lock:
+            if self._conn is None:
+                self._tokens, self._updated, wait = self._take(self._tokens, self._updated)
+                return wait
+            
+            # BEGIN IMMEDIATE takes the database write lock, so the read-modify-write
+            # below is atomic across processes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM buckets WHERE name = ?",
+                    (self.name,)
+                ).fetchone()
+                tokens, updated = row if row else (self.capacity, time.time())
+                tokens, updated, wait = self._take(tokens, updated)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                    (self.name, tokens, updated)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return wait
+    
+    def acquire(self, priority: int = 0) -> float:
+        """
+        Block the calling thread until a token is available
+        
+        Args:
+            priority: Queue priority (lower values are served first)
+        
+        Returns:
+            Seconds spent waiting
+        """
+        ticket = self._enqueue(priority)
+        start = time.monotonic()
+        try:
+            while True:
+                delay = self._poll(ticket)
+                if delay == 0.0:
+                    break
+                time.sleep(delay)
+        finally:
+            self._dequeue(ticket)
+        return self._record(time.monotonic() - start)
+    
+    async def acquire_async(self, priority: int = 0) -> float:
+        """
+        Wait for a token without blocking the event loop
+        
+        Args:
+            priority: Queue priority (lower values are served first)
+        
+        Returns:
+            Seconds spent waiting
+        """
+        ticket = self._enqueue(priority)
+        start = time.monotonic()
+        try:
+            while True:
+                delay = await self._apoll(ticket)
+                if delay == 0.0:
+                    break
+                await asyncio.sleep(delay)
+        finally:
+            self._dequeue(ticket)
+        return self._record(time.monotonic() - start)
+    
+    @property
+    def queue_depth(self) -> int:
+        """Number of callers currently waiting for a token"""
+        with self._lock:
+            return len(self._waiters)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get limiter metrics
+        
+        Returns:
+            Dict with queue depth, acquired count and wait times in seconds
+        """
+        with self._lock:
+            return {
+                "queue_depth": len(self._waiters),
+                "acquired": self.acquired,
+                "total_wait_seconds": self.total_wait,
+                "avg_wait_seconds": self.total_wait / self.acquired if self.acquired else 0.0,
+                "max_wait_seconds": self.max_wait,
+            }
+    
+    def _take(self, tokens: float, updated: float) -> Tuple[float, float, float]:
+        """Refill the bucket up to now and try to take one token"""
+        now = time.time()
+        tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+        if tokens >= 1.0:
+            return tokens - 1.0, now, 0.0
+        return tokens, now, (1.0 - tokens) / self.rate
+    
+    def _enqueue(self, priority: int) -> Tuple[int, int]:
+        ticket = (priority, next(self._sequence))
+        with self._lock:
+            heapq.heappush(self._waiters, ticket)
+        return ticket
+    
+    def _dequeue(self, ticket: Tuple[int, int]) -> None:
+        with self._lock:
+            self._waiters.remove(ticket)
+            heapq.heapify(self._waiters)
+    
+    def _poll(self, ticket: Tuple[int, int]) -> float:
+        """Try to take a token for a queued caller; only the head of the queue may take one"""
+        with self._lock:
+            is_head = self._waiters[0] == ticket
+        if not is_head:
+            return self.POLL_INTERVAL
+        return self.try_acquire()
+    
+    async def _apoll(self, ticket: Tuple[int, int]) -> float:
+        """Async counterpart of _poll"""
+        with self._lock:
+            is_head = self._waiters[0] == ticket
+        if not is_head:
+            return self.POLL_INTERVAL
+        if self._conn is None:
+            return self.try_acquire()
+        # The shared state may wait up to the SQLite busy timeout on another process's lock
+        return await asyncio.to_thread(self.try_acquire)
+    
+    def _record(self, waited: float) -> float:
+        with self._lock:
+            self.acquired += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+        return waited
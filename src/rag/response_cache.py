@@ -0,0 +1,128 @@
+"""Persistent exact-match cache for LLM responses"""
+
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+from .sqlite_lru import SQLiteLRUStore
+
+
+class ResponseCache(SQLiteLRUStore):
+    """SQLite-backed response cache keyed by a hash of (model, generation config, prompt)"""
+    
+    TABLE = "responses"
+    COLUMNS = "response TEXT NOT NULL, created_at REAL NOT NULL"
+    
+    def __init__(
+        self,
+        path: str | Path,
+        ttl_seconds: float | None = 7 * 24 * 3600,
+        max_bytes: int = 64 * 1024 * 1024
+    ):
+        """
+        Initialize response cache
+        
+        Args:
+            path: Path to the SQLite cache file (created if missing)
+            ttl_seconds: Time-to-live of a response in seconds (None disables expiry)
+            max_bytes: Maximum total size of stored responses before eviction
+        """
+        super().__init__(path, max_bytes)
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(model: str, generation_config: Dict[str, Any], prompt: str) -> str:
+        """
+        Build the cache key
+        
+        Args:
+            model: Model name
+            generation_config: Generation parameters (temperature, max tokens, ...)
+            prompt: Full prompt string
+        
+        Returns:
+            Hex SHA-256 digest of the key components
+        """
+        digest = hashlib.sha256()
+        for part in (model, json.dumps(generation_config, sort_keys=True), prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> str | None:
+        """
+        Get a cached response
+        
+        Args:
+            key: Cache key from make_key
+        
+        Returns:
+            Cached response, or None if missing or expired
+        """
+        now = time.time()
+        
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+            
+            if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            
+            if row is None:
+                self.misses += 1
+                return None
+            
+            self._touch([key], now)
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+    
+    def put(self, key: str, response: str) -> None:
+        """
+        Store a response and evict least recently used entries if needed
+        
+        Args:
+            key: Cache key from make_key
+            response: Generated response text
+        """
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now)
+            )
+            self._delete_expired(now)
+            self._evict()
+            self._conn.commit()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+        
+        Returns:
+            Dict with entry count, stored bytes, hits and misses
+        """
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            return {"size": count, "bytes": total, "hits": self.hits, "misses": self.misses}
+    
+    def _delete_expired(self, now: float) -> None:
+        """Drop responses older than ttl_seconds"""
+        if self.ttl_seconds is not None:
+            self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?",
+                (now - self.ttl_seconds,)
+            )
@@ -1,100 +1,297 @@
 """RAG Retriever - combines embeddings, Pinecone, and Gemini for Q&A"""
 
-from typing import List, Dict, Any, Optional
+import asyncio
+import functools
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Awaitable, Callable, Generator, Iterator, Optional
 from .embeddings import GoogleEmbeddings
 from .pinecone_client import PineconeClient
 from .gemini_client import GeminiClient
+from .query_cache import QueryEmbeddingCache, normalize_query
+from .single_flight import AsyncSingleFlight, SingleFlight
+from .content_store import ContentStore
+from .bm25_index import BM25Index
+from .answer_cache import SemanticAnswerCache
+from .batch_generator import BatchingGenerator
+from .context_packer import ContextPacker
+from .context_compressor import ContextCompressor
+from .adaptive_selector import AdaptiveSelector
+from .section_router import SectionRouter
+from .local_index import LocalVectorIndex
+from .vector_store import create_vector_client
 
 
 class RAGRetriever:
     """Retrieval Augmented Generation for LPDP Q&A"""
     
+    RRF_K = 60  # Reciprocal-rank fusion damping constant
+    HYBRID_CANDIDATE_FACTOR = 3  # Candidates fetched per side, as a multiple of top_k
+    NO_RESULTS_ANSWER = "Maaf, saya tidak menemukan informasi yang relevan dengan pertanyaan Anda dalam dokumen panduan pencairan LPDP."
+    
     def __init__(
         self,
         embeddings: GoogleEmbeddings | None = None,
-        pinecone_client: PineconeClient | None = None,
+        pinecone_client: PineconeClient | LocalVectorIndex | None = None,
         gemini_client: GeminiClient | None = None,
-        top_k: int = 5
+        top_k: int = 5,
+        query_cache: QueryEmbeddingCache | None = None,
+        content_store: ContentStore | None = None,
+        lexical_index: BM25Index | None = None,
+        answer_cache: SemanticAnswerCache | None = None,
+        batcher: BatchingGenerator | None = None,
+        context_packer: ContextPacker | None = None,
+        context_compressor: ContextCompressor | None = None,
+        selector: AdaptiveSelector | None = None,
+        section_router: SectionRouter | None = None
     ):
         """
         Initialize RAG Retriever
         
         Args:
             embeddings: GoogleEmbeddings instance
-            pinecone_client: PineconeClient instance
+            pinecone_client: PineconeClient or LocalVectorIndex instance (defaults to
+                the backend selected by VECTOR_BACKEND)
             gemini_client: GeminiClient instance
             top_k: Number of chunks to retrieve
+            query_cache: Cache for query embeddings (a default in-memory cache is
+                created if not provided)
+            content_store: Local store resolving chunk text by id (optional; without
+                it chunk text is read from vector metadata)
+            lexical_index: BM25 index fused with dense results (optional; chunks
+                found only lexically are resolved through content_store)
+            answer_cache: Semantic cache in front of answer generation (a default
+                in-memory cache is created if not provided)
+            batcher: Micro-batching scheduler used by aquery for generation
+                (optional; without it each question is a separate request)
+            context_packer: Merges overlapping chunks and enforces the context token
+                budget in the format stage (a default packer is created if not provided)
+            context_compressor: Reduces packed context to the sentences most relevant
+                to the question (a default compressor is created if not provided)
+            selector: Score cutoff and MMR settings used by adaptive queries (a
+                default selector is created if not provided)
+            section_router: Maps routed topics to section metadata filters (a
+                default router is created if not provided)
         """
         self.embeddings = embeddings or GoogleEmbeddings()
-        self.pinecone = pinecone_client or PineconeClient()
+        self.pinecone = pinecone_client or create_vector_client()
         self.gemini = gemini_client or GeminiClient()
         self.top_k = top_k
+        self.query_cache = query_cache if query_cache is not None else QueryEmbeddingCache()
+        self.content_store = content_store
+        self.lexical_index = lexical_index
+        self.answer_cache = answer_cache if answer_cache is not None else SemanticAnswerCache()
+        self.batcher = batcher
+        self.context_packer = context_packer if context_packer is not None else ContextPacker()
+        self.context_compressor = (
+            context_compressor if context_compressor is not None else ContextCompressor()
+        )
+        self.selector = selector if selector is not None else AdaptiveSelector()
+        self.section_router = section_router if section_router is not None else SectionRouter()
+        # Identical concurrent questions share one embed → search → generate run
+        self._inflight = SingleFlight()
+        self._ainflight = AsyncSingleFlight()
+    
+    @property
+    def index_version(self) -> str:
+        """Version of the indexed corpus, used to invalidate cached answers"""
+        if self.content_store is not None and self.content_store.version:
+            return self.content_store.version
+        return os.getenv("LPDP_INDEX_VERSION", "")
     
     def retrieve(
         self,
         query: str,
         top_k: int | None = None,
-        filter: Dict[str, Any] | None = None
+        filter: Dict[str, Any] | None = None,
+        adaptive: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Retrieve relevant chunks for a query
         
         Args:
             query: User's question
-            top_k: Number of results (overrides default)
+            top_k: Number of results (overrides default; upper bound when adaptive)
             filter: Metadata filter for Pinecone
+            adaptive: Size the result set by score cutoffs and diversify it with MMR
             
         Returns:
             List of retrieved chunks with scores and metadata
         """
-        top_k = top_k or self.top_k
+        _, chunks = self._run_retrieval(query, top_k, filter, timings={}, adaptive=adaptive)
+        return chunks
+    
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Get the query embedding, reusing cached vectors for repeated queries
+        
+        Args:
+            query: User's question
+            
+        Returns:
+            Query embedding vector
+        """
+        embedding = self.query_cache.get(query)
+        if embedding is None:
+            embedding = self.embeddings.embed_query(query)
+            self.query_cache.put(query, embedding)
+        return embedding
+    
+    async def aembed_query(self, query: str) -> List[float]:
+        """
+        Async counterpart of embed_query
         
-        # Generate query embedding
-        query_embedding = self.embeddings.embed_query(query)
+        Args:
+            query: User's question
+            
+        Returns:
+            Query embedding vector
+        """
+        embedding = self.query_cache.get(query)
+        if embedding is None:
+            embedding = await self.embeddings.aembed_query(query)
+            self.query_cache.put(query, embedding)
+        return embedding
+    
+    def search(
+        self,
+        query: str,
+        query_embedding: List[float],
+        top_k: int,
+        filter: Dict[str, Any] | None = None,
+        adaptive: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Search stage: dense (and, if configured, lexical) candidate search
         
-        # Query Pinecone
+        Args:
+            query: User's question
+            query_embedding: Embedding from the embed stage
+            top_k: Number of chunks wanted after post-processing
+            filter: Metadata filter
+            adaptive: Over-fetch for adaptive selection (see _include_values)
+            
+        Returns:
+            Dict with raw dense matches and lexical (chunk_id, score) pairs
+        """
+        fetch_k = self._fetch_k(top_k, adaptive)
+        
+        # Query Pinecone (only ids and scores when text is resolved locally)
         results = self.pinecone.query(
             vector=query_embedding,
-            top_k=top_k,
+            top_k=fetch_k,
             filter=filter,
-            include_metadata=True
+            include_metadata=self.content_store is None,
+            include_values=self._include_values(adaptive)
         )
         
-        # Format results
-        chunks = []
-        for match in results.get("matches", []):
-            chunk = {
-                "id": match["id"],
-                "score": match["score"],
-                "content": match.get("metadata", {}).get("content", ""),
-                "metadata": match.get("metadata", {})
-            }
-            chunks.append(chunk)
+        lexical = []
+        if self.lexical_index is not None:
+            lexical = self.lexical_index.search(query, top_k=fetch_k, filter=filter)
         
-        return chunks
+        return {"matches": results.get("matches", []), "lexical": lexical}
     
-    def get_context(
+    async def asearch(
         self,
         query: str,
-        top_k: int | None = None,
-        filter: Dict[str, Any] | None = None
-    ) -> str:
+        query_embedding: List[float],
+        top_k: int,
+        filter: Dict[str, Any] | None = None,
+        adaptive: bool = False
+    ) -> Dict[str, Any]:
         """
-        Get formatted context from retrieved chunks
+        Async search stage: dense and lexical searches run concurrently in worker threads
         
         Args:
             query: User's question
-            top_k: Number of results
+            query_embedding: Embedding from the embed stage
+            top_k: Number of chunks wanted after post-processing
             filter: Metadata filter
+            adaptive: Over-fetch for adaptive selection (see _include_values)
             
         Returns:
-            Formatted context string
+            Dict with raw dense matches and lexical (chunk_id, score) pairs
+        """
+        fetch_k = self._fetch_k(top_k, adaptive)
+        
+        dense = asyncio.to_thread(
+            self.pinecone.query,
+            vector=query_embedding,
+            top_k=fetch_k,
+            filter=filter,
+            include_metadata=self.content_store is None,
+            include_values=self._include_values(adaptive)
+        )
+        
+        if self.lexical_index is None:
+            results, lexical = await dense, []
+        else:
+            results, lexical = await asyncio.gather(
+                dense,
+                asyncio.to_thread(self.lexical_index.search, query, top_k=fetch_k, filter=filter)
+            )
+        
+        return {"matches": results.get("matches", []), "lexical": lexical}
+    
+    def post_process(
+        self,
+        candidates: Dict[str, Any],
+        top_k: int,
+        query_embedding: List[float] | None = None,
+        adaptive: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Post-process stage: resolve chunk text, fuse rankings and cut to top_k
+        
+        Args:
+            candidates: Output of the search stage
+            top_k: Number of chunks to keep (upper bound when adaptive)
+            query_embedding: Embedding from the embed stage (needed when adaptive)
+            adaptive: Cut dense matches by score and diversify them with MMR, then
+                keep as many fused chunks as dense matches survived
+            
+        Returns:
+            List of chunks with id, score, content and metadata
         """
-        chunks = self.retrieve(query, top_k, filter)
+        matches = candidates["matches"]
+        if adaptive:
+            matches = self.selector.select(self._with_vectors(matches), query_embedding, top_k)
+            top_k = max(1, len(matches))
+        
+        chunks = self._resolve_matches(matches)
+        
+        if self.lexical_index is not None:
+            chunks = self._fuse(chunks, candidates["lexical"])
         
+        return chunks[:top_k]
+    
+    def format_context(
+        self,
+        chunks: List[Dict[str, Any]],
+        query: str | None = None,
+        query_embedding: List[float] | None = None
+    ) -> str:
+        """
+        Format stage: pack chunks into spans, compress them against the question
+        and render them with source headers
+        
+        Args:
+            chunks: Chunks from the post-process stage
+            query: User's question (optional; enables extractive compression)
+            query_embedding: Embedding from the embed stage (optional)
+            
+        Returns:
+            Formatted context string
+        """
         if not chunks:
             return "Tidak ada informasi yang relevan ditemukan."
         
+        chunks = self.context_packer.pack(chunks)
+        if query is not None:
+            chunks = self.context_compressor.compress(query, chunks, query_embedding)
+        
         # Format context with metadata
         context_parts = []
         for i, chunk in enumerate(chunks, 1):
@@ -111,73 +308,530 @@ class RAGRetriever:
         
         return "\n\n---\n\n".join(context_parts)
     
+    def get_context(
+        self,
+        query: str,
+        top_k: int | None = None,
+        filter: Dict[str, Any] | None = None
+    ) -> str:
+        """
+        Get formatted context from retrieved chunks
+        
+        Args:
+            query: User's question
+            top_k: Number of results
+            filter: Metadata filter
+            
+        Returns:
+            Formatted context string
+        """
+        return self.format_context(self.retrieve(query, top_k, filter), query)
+    
     def query(
         self,
         question: str,
         top_k: int | None = None,
         filter: Dict[str, Any] | None = None,
-        include_sources: bool = True
+        include_sources: bool = True,
+        adaptive: bool = False,
+        route: str | None = None
     ) -> Dict[str, Any]:
         """
-        Full RAG query: retrieve context and generate response
+        Full RAG query: embed → search → post-process → format → generate
+        
+        Each stage runs once and hands its output to the next. Concurrent calls
+        with the same normalized question and options share a single run.
         
         Args:
             question: User's question
             top_k: Number of chunks to retrieve
             filter: Metadata filter
             include_sources: Whether to include source references
+            adaptive: Treat top_k as an upper bound and keep only a small, diverse
+                set of relevant chunks
+            route: Topic (e.g. a tool argument) routed to a document section; when
+                the router is confident and no filter is given, search is limited to
+                that section and falls back to the whole index if nothing matches
             
         Returns:
-            Dict with answer, sources, and context
+            Dict with answer, sources, context, per-stage timings in milliseconds
+            and whether the answer came from the answer cache
         """
-        # Retrieve relevant chunks
-        chunks = self.retrieve(question, top_k, filter)
+        key = self._request_key(question, top_k, filter, include_sources, adaptive, route)
+        return dict(self._inflight.do(
+            key, lambda: self._query(question, top_k, filter, include_sources, adaptive, route)
+        ))
+    
+    def _query(
+        self,
+        question: str,
+        top_k: int | None,
+        filter: Dict[str, Any] | None,
+        include_sources: bool,
+        adaptive: bool = False,
+        route: str | None = None
+    ) -> Dict[str, Any]:
+        """Run the query pipeline once (see query())"""
+        return self._run_stages(
+            self._query_stages(question, top_k, filter, include_sources, adaptive, route)
+        )
+    
+    async def aquery(
+        self,
+        question: str,
+        top_k: int | None = None,
+        filter: Dict[str, Any] | None = None,
+        include_sources: bool = True,
+        on_token: Callable[[str], Awaitable[None]] | None = None,
+        adaptive: bool = False,
+        route: str | None = None
+    ) -> Dict[str, Any]:
+        """
+        Async full RAG query; same stages and result as query(), but network calls
+        are awaited so concurrent queries interleave on one event loop
+        
+        Args:
+            question: User's question
+            top_k: Number of chunks to retrieve
+            filter: Metadata filter
+            include_sources: Whether to include source references
+            on_token: Async callback receiving answer text pieces as they are
+                generated; when set the answer is streamed instead of batched, and
+                the call is not shared with concurrent identical ones
+            adaptive: Treat top_k as an upper bound and keep only a small, diverse
+                set of relevant chunks
+            route: Topic (e.g. a tool argument) routed to a document section; when
+                the router is confident and no filter is given, search is limited to
+                that section and falls back to the whole index if nothing matches
+            
+        Returns:
+            Dict with answer, sources, context, per-stage timings in milliseconds
+            and whether the answer came from the answer cache
+        """
+        if on_token is not None:
+            # A shared run would stream to the first caller's callback only
+            return await self._aquery(question, top_k, filter, include_sources, on_token, adaptive, route)
+        
+        key = self._request_key(question, top_k, filter, include_sources, adaptive, route)
+        return dict(await self._ainflight.do(
+            key, lambda: self._aquery(question, top_k, filter, include_sources, on_token, adaptive, route)
+        ))
+    
+    async def _aquery(
+        self,
+        question: str,
+        top_k: int | None,
+        filter: Dict[str, Any] | None,
+        include_sources: bool,
+        on_token: Callable[[str], Awaitable[None]] | None = None,
+        adaptive: bool = False,
+        route: str | None = None
+    ) -> Dict[str, Any]:
+        """Run the async query pipeline once (see aquery())"""
+        return await self._arun_stages(
+            self._query_stages(question, top_k, filter, include_sources, adaptive, route),
+            on_token
+        )
+    
+    def search_by_topic(
+        self,
+        topic: str,
+        top_k: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for chunks related to a specific topic
+        
+        Args:
+            topic: Topic to search for (e.g., "dana transportasi")
+            top_k: Number of results
+            
+        Returns:
+            List of relevant chunks
+        """
+        return self.retrieve(topic, top_k)
+    
+    def _run_retrieval(
+        self,
+        query: str,
+        top_k: int | None,
+        filter: Dict[str, Any] | None,
+        timings: Dict[str, float],
+        adaptive: bool = False,
+        route: str | None = None
+    ) -> tuple[List[float], List[Dict[str, Any]]]:
+        """
+        Run the embed, search and post-process stages once
+        
+        Args:
+            query: User's question
+            top_k: Number of results (overrides default)
+            filter: Metadata filter
+            timings: Dict receiving per-stage durations in milliseconds
+            adaptive: Select chunks adaptively (see post_process)
+            route: Topic routed to a section filter (see query)
+            
+        Returns:
+            Tuple of (query embedding, retrieved chunks)
+        """
+        return self._run_stages(self._retrieval_stages(query, top_k, filter, timings, adaptive, route))
+    
+    def _retrieval_stages(
+        self,
+        query: str,
+        top_k: int | None,
+        filter: Dict[str, Any] | None,
+        timings: Dict[str, float],
+        adaptive: bool = False,
+        route: str | None = None
+    ) -> Generator[tuple[str, tuple], Any, tuple[List[float], List[Dict[str, Any]]]]:
+        """
+        Sequence the embed, search and post-process stages
+        
+        Network-bound stages are yielded as (stage, args) and run by
+        _run_stages or _arun_stages, so query() and aquery() share one pipeline.
+        
+        Args:
+            query: User's question
+            top_k: Number of results (overrides default)
+            filter: Metadata filter
+            timings: Dict receiving per-stage durations in milliseconds
+            adaptive: Select chunks adaptively (see post_process)
+            route: Topic routed to a section filter (see query)
+            
+        Returns:
+            Tuple of (query embedding, retrieved chunks)
+        """
+        top_k = top_k or self.top_k
+        section_filter = self._section_filter(route, filter)
+        
+        with self._timed("embed", timings):
+            query_embedding = yield "embed", (query,)
+        
+        with self._timed("search", timings):
+            candidates = yield "search", (query, query_embedding, top_k, section_filter or filter, adaptive)
+            if section_filter and not any(candidates.values()):
+                # Nothing tagged with the routed section: search the whole index
+                candidates = yield "search", (query, query_embedding, top_k, filter, adaptive)
+        
+        with self._timed("post_process", timings):
+            chunks = self.post_process(candidates, top_k, query_embedding, adaptive)
+        
+        return query_embedding, chunks
+    
+    def _query_stages(
+        self,
+        question: str,
+        top_k: int | None,
+        filter: Dict[str, Any] | None,
+        include_sources: bool,
+        adaptive: bool = False,
+        route: str | None = None
+    ) -> Generator[tuple[str, tuple], Any, Dict[str, Any]]:
+        """Sequence all query stages (see _retrieval_stages and query())"""
+        timings: Dict[str, float] = {}
+        
+        query_embedding, chunks = yield from self._retrieval_stages(
+            question, top_k, filter, timings, adaptive, route
+        )
         
         if not chunks:
             return {
-                "answer": "Maaf, saya tidak menemukan informasi yang relevan dengan pertanyaan Anda dalam dokumen panduan pencairan LPDP.",
+                "answer": self.NO_RESULTS_ANSWER,
                 "sources": [],
-                "context": ""
+                "context": "",
+                "timings": timings,
+                "cached": False
             }
         
-        # Build context
-        context = self.get_context(question, top_k, filter)
-        
-        # Generate response
-        answer = self.gemini.generate_response(question, context)
+        with self._timed("format", timings):
+            context = self.format_context(chunks, question, query_embedding)
         
-        # Extract sources
-        sources = []
-        if include_sources:
-            for chunk in chunks:
-                metadata = chunk.get("metadata", {})
-                source = {
-                    "page": metadata.get("page_number"),
-                    "section": metadata.get("section", ""),
-                    "relevance": round(chunk["score"], 3)
-                }
-                if source not in sources:
-                    sources.append(source)
+        with self._timed("generate", timings):
+            answer, cached = yield "generate", (question, query_embedding, chunks, context)
         
         return {
             "answer": answer,
-            "sources": sources,
-            "context": context
+            "sources": self._extract_sources(chunks) if include_sources else [],
+            "context": context,
+            "timings": timings,
+            "cached": cached
         }
     
-    def search_by_topic(
+    def _run_stages(self, stages: Generator[tuple[str, tuple], Any, Any]) -> Any:
+        """Drive a stage sequence with the blocking stage implementations"""
+        steps = {"embed": self.embed_query, "search": self.search, "generate": self._generate}
+        try:
+            stage, args = next(stages)
+            while True:
+                stage, args = stages.send(steps[stage](*args))
+        except StopIteration as done:
+            return done.value
+    
+    async def _arun_stages(
         self,
-        topic: str,
-        top_k: int = 10
+        stages: Generator[tuple[str, tuple], Any, Any],
+        on_token: Callable[[str], Awaitable[None]] | None = None
+    ) -> Any:
+        """Drive a stage sequence with the async stage implementations"""
+        steps = {
+            "embed": self.aembed_query,
+            "search": self.asearch,
+            "generate": functools.partial(self._agenerate, on_token=on_token),
+        }
+        try:
+            stage, args = next(stages)
+            while True:
+                stage, args = stages.send(await steps[stage](*args))
+        except StopIteration as done:
+            return done.value
+    
+    def _generate(
+        self,
+        question: str,
+        query_embedding: List[float],
+        chunks: List[Dict[str, Any]],
+        context: str
+    ) -> tuple[str, bool]:
+        """
+        Generate stage: answer from the semantic cache or from Gemini
+        
+        Args:
+            question: User's question
+            query_embedding: Embedding from the embed stage
+            chunks: Chunks the context was built from
+            context: Formatted context
+            
+        Returns:
+            Tuple of (answer, whether it was served from the cache)
+        """
+        chunk_ids = [chunk["id"] for chunk in chunks]
+        version = self.index_version
+        
+        answer = self.answer_cache.get(query_embedding, chunk_ids, version=version)
+        if answer is not None:
+            return answer, True
+        
+        answer = self.gemini.generate_response(question, context)
+        self.answer_cache.put(query_embedding, chunk_ids, answer, version=version)
+        return answer, False
+    
+    async def _agenerate(
+        self,
+        question: str,
+        query_embedding: List[float],
+        chunks: List[Dict[str, Any]],
+        context: str,
+        on_token: Callable[[str], Awaitable[None]] | None = None
+    ) -> tuple[str, bool]:
+        """
+        Async counterpart of _generate
+        
+        Args:
+            question: User's question
+            query_embedding: Embedding from the embed stage
+            chunks: Chunks the context was built from
+            context: Formatted context
+            on_token: Async callback receiving answer text pieces (optional)
+            
+        Returns:
+            Tuple of (answer, whether it was served from the cache)
+        """
+        chunk_ids = [chunk["id"] for chunk in chunks]
+        version = self.index_version
+        
+        answer = self.answer_cache.get(query_embedding, chunk_ids, version=version)
+        if answer is not None:
+            if on_token is not None:
+                await on_token(answer)
+            return answer, True
+        
+        if on_token is not None:
+            parts = []
+            async for piece in self.gemini.agenerate_response_stream(question, context):
+                parts.append(piece)
+                await on_token(piece)
+            answer = "".join(parts)
+        elif self.batcher is not None:
+            answer = await self.batcher.generate(question, context)
+        else:
+            answer = await self.gemini.agenerate_response(question, context)
+        self.answer_cache.put(query_embedding, chunk_ids, answer, version=version)
+        return answer, False
+    
+    def _request_key(
+        self,
+        question: str,
+        top_k: int | None,
+        filter: Dict[str, Any] | None,
+        include_sources: bool,
+        adaptive: bool = False,
+        route: str | None = None
+    ) -> tuple:
+        """Identity of a query request, used to coalesce identical concurrent calls"""
+        return (
+            normalize_query(question),
+            top_k or self.top_k,
+            json.dumps(filter, sort_keys=True, default=str),
+            include_sources,
+            adaptive,
+            normalize_query(route) if route else None
+        )
+    
+    def _section_filter(
+        self,
+        route: str | None,
+        filter: Dict[str, Any] | None
+    ) -> Dict[str, Any] | None:
+        """Section filter for a routed topic; an explicit filter always takes precedence"""
+        if not route or filter is not None:
+            return None
+        return self.section_router.filter_for(route)
+    
+    def _include_values(self, adaptive: bool) -> bool:
+        """
+        Whether the vector store should return match vectors
+        
+        Only in-process indexes return them for free; remote matches get their
+        vectors from the content store instead (see _with_vectors), which keeps
+        Pinecone responses to ids and scores.
+        """
+        return adaptive and isinstance(self.pinecone, LocalVectorIndex)
+    
+    def _with_vectors(self, matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Attach vectors stored in the content store to matches returned without them"""
+        if self.content_store is None or all("values" in match for match in matches):
+            return matches
+        
+        vectors = self.content_store.get_vectors(
+            [match["id"] for match in matches if "values" not in match]
+        )
+        return [
+            {**match, "values": vectors[match["id"]]} if match["id"] in vectors else match
+            for match in matches
+        ]
+    
+    def _fetch_k(self, top_k: int, adaptive: bool) -> int:
+        """Number of dense and lexical candidates to fetch for top_k results"""
+        # Over-fetch once so score cutoffs, MMR and fusion have candidates to choose from
+        factor = self.selector.fetch_factor if adaptive else 1
+        if self.lexical_index is not None:
+            factor = max(factor, self.HYBRID_CANDIDATE_FACTOR)
+        return top_k * factor
+    
+    @staticmethod
+    @contextmanager
+    def _timed(stage: str, timings: Dict[str, float]) -> Iterator[None]:
+        """Record the wall-clock duration of a pipeline stage in milliseconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings[stage] = round((time.perf_counter() - start) * 1000, 3)
+    
+    @staticmethod
+    def _extract_sources(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Build deduplicated source references from chunks
+        
+        Args:
+            chunks: Retrieved chunks
+            
+        Returns:
+            List of sources with page, section and relevance
+        """
+        sources = []
+        for chunk in chunks:
+            metadata = chunk.get("metadata", {})
+            source = {
+                "page": metadata.get("page_number"),
+                "section": metadata.get("section", ""),
+                "relevance": round(chunk["score"], 3)
+            }
+            if source not in sources:
+                sources.append(source)
+        return sources
+    
+    def _resolve_matches(self, matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Turn vector matches into chunks with content and metadata
+        
+        Args:
+            matches: Matches from the vector store query
+            
+        Returns:
+            List of chunks with id, score, content and metadata
+        """
+        stored = {}
+        if self.content_store is not None:
+            stored = self.content_store.get_many([match["id"] for match in matches])
+        
+        # Format results
+        chunks = []
+        for match in matches:
+            if self.content_store is not None:
+                # Skip vectors whose chunk is missing from the store (stale index)
+                if match["id"] not in stored:
+                    continue
+                content = stored[match["id"]]["content"]
+                metadata = stored[match["id"]]["metadata"]
+            else:
+                metadata = match.get("metadata", {})
+                content = metadata.get("content", "")
+            
+            chunk = {
+                "id": match["id"],
+                "score": match["score"],
+                "content": content,
+                "metadata": metadata
+            }
+            chunks.append(chunk)
+        
+        return chunks
+    
+    def _fuse(
+        self,
+        dense_chunks: List[Dict[str, Any]],
+        lexical: List[tuple[str, float]]
     ) -> List[Dict[str, Any]]:
         """
-        Search for chunks related to a specific topic
+        Merge dense and BM25 rankings with reciprocal-rank fusion
         
         Args:
-            topic: Topic to search for (e.g., "dana transportasi")
-            top_k: Number of results
+            dense_chunks: Chunks from the vector search, best first
+            lexical: (chunk_id, BM25 score) pairs, best first
             
         Returns:
-            List of relevant chunks
+            Chunks ordered by fused score; "score" keeps the dense similarity
+            (0.0 for chunks found only lexically)
         """
-        return self.retrieve(topic, top_k)
+        fused: Dict[str, float] = {}
+        by_id = {chunk["id"]: chunk for chunk in dense_chunks}
+        
+        for rank, chunk in enumerate(dense_chunks):
+            fused[chunk["id"]] = 1.0 / (self.RRF_K + rank + 1)
+        
+        lexical_only = []
+        for rank, (chunk_id, lexical_score) in enumerate(lexical):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (self.RRF_K + rank + 1)
+            if chunk_id in by_id:
+                by_id[chunk_id]["lexical_score"] = lexical_score
+            else:
+                lexical_only.append((chunk_id, lexical_score))
+        
+        if lexical_only and self.content_store is not None:
+            stored = self.content_store.get_many([chunk_id for chunk_id, _ in lexical_only])
+            for chunk_id, lexical_score in lexical_only:
+                if chunk_id in stored:
+                    by_id[chunk_id] = {
+                        "id": chunk_id,
+                        "score": 0.0,
+                        "lexical_score": lexical_score,
+                        "content": stored[chunk_id]["content"],
+                        "metadata": stored[chunk_id]["metadata"]
+                    }
+        
+        chunks = list(by_id.values())
+        for chunk in chunks:
+            chunk["fusion_score"] = fused[chunk["id"]]
+        chunks.sort(key=lambda chunk: chunk["fusion_score"], reverse=True)
+        return chunks
@@ -0,0 +1,144 @@
+"""Route tool arguments to canonical sections of the disbursement guide"""
+
+import difflib
+from typing import Any, Dict, Iterable, List, Tuple
+
+from ..document.pdf_loader import SECTION_KEYWORDS
+from .bm25_index import tokenize
+
+# Words shared by many section names or tool arguments that do not identify a section
+GENERIC_TERMS = frozenset({
+    "dana", "bantuan", "tunjangan", "biaya", "pengajuan", "pencairan", "lpdp", "beasiswa",
+    "internasional",
+})
+
+# Other ways users refer to each section, besides its own name
+SECTION_SYNONYMS: Dict[str, Tuple[str, ...]] = {
+    "Dana Pendaftaran": ("registrasi", "application fee", "biaya daftar"),
+    "Dana SPP": ("uang kuliah", "biaya kuliah", "ukt", "tuition", "tuition fee"),
+    "Dana Tunjangan Buku": ("book allowance",),
+    "Dana Bantuan Penelitian": ("riset", "research", "tesis", "disertasi"),
+    "Dana Bantuan Seminar": ("konferensi", "conference"),
+    "Dana Bantuan Publikasi": ("jurnal", "journal", "publication"),
+    "Dana Transportasi": ("tiket", "pesawat", "flight", "travel"),
+    "Dana Aplikasi Visa": ("izin tinggal", "residence permit"),
+    "Dana Asuransi Kesehatan": ("insurance", "bpjs"),
+    "Dana Hidup Bulanan": ("living allowance", "biaya hidup", "stipend", "bulanan"),
+    "Dana Kedatangan": ("settlement allowance", "settlement"),
+    "Dana Tunjangan Keluarga": ("istri", "suami", "anak", "family"),
+    "Insentif Kelulusan": ("lulus", "wisuda", "graduation"),
+    "Dana Keadaan Darurat": ("emergency",),
+    "Dana Pelatihan": ("kursus", "training"),
+    "Dana Lomba Internasional": ("kompetisi", "competition"),
+    "Dana Pendamping Disabilitas": ("difabel", "disability"),
+}
+
+
+class SectionRouter:
+    """Map a short topic (e.g. "SPP", "asuransi") to the section(s) it refers to"""
+    
+    def __init__(
+        self,
+        sections: Iterable[str] = SECTION_KEYWORDS,
+        synonyms: Dict[str, Tuple[str, ...]] | None = None,
+        min_confidence: float = 0.8,
+        max_sections: int = 2
+    ):
+        """
+        Initialize section router
+        
+        Args:
+            sections: Canonical section names as stored in chunk metadata
+            synonyms: Extra phrases per section (defaults to SECTION_SYNONYMS)
+            min_confidence: Confidence below which no section filter is produced
+            max_sections: Most sections a single topic may be routed to
+        """
+        self.sections = list(sections)
+        self.min_confidence = min_confidence
+        self.max_sections = max_sections
+        synonyms = SECTION_SYNONYMS if synonyms is None else synonyms
+        
+        # Each section is recognised by its distinctive name terms and its synonyms
+        self._phrases: List[Tuple[Tuple[str, ...], str]] = []
+        self._vocabulary: Dict[str, set] = {}
+        for section in self.sections:
+            phrases = [(term,) for term in self._terms(section)]
+            phrases += [tuple(self._terms(phrase)) for phrase in synonyms.get(section, ())]
+            for phrase in phrases:
+                if not phrase:
+                    continue
+                self._phrases.append((phrase, section))
+                for term in phrase:
+                    self._vocabulary.setdefault(term, set()).add(section)
+    
+    def route(self, topic: str) -> Tuple[List[str], float]:
+        """
+        Find the sections a topic refers to
+        
+        Exact name or synonym matches win; otherwise each topic term is fuzzily
+        matched against the section vocabulary, so typos like "asurnsi" still
+        resolve.
+        
+        Args:
+            topic: Tool argument or short question
+        
+        Returns:
+            Tuple of (matched sections, confidence between 0 and 1); no sections
+            when nothing matches or the topic is ambiguous
+        """
+        terms = self._terms(topic)
+        if not terms:
+            return [], 0.0
+        
+        exact = self._exact_matches(terms)
+        if exact:
+            if len(exact) > self.max_sections:
+                return [], 0.0
+            return exact, 1.0
+        
+        best_score = 0.0
+        best_sections: set = set()
+        for term in terms:
+            if len(term) < 3:
+                continue
+            for candidate, sections in self._vocabulary.items():
+                score = difflib.SequenceMatcher(None, term, candidate).ratio()
+                if score > best_score:
+                    best_score, best_sections = score, set(sections)
+                elif score == best_score:
+                    best_sections |= sections
+        
+        if not best_sections or len(best_sections) > 1:
+            return [], 0.0
+        return list(best_sections), best_score
+    
+    def filter_for(self, topic: str) -> Dict[str, Any] | None:
+        """
+        Build a metadata filter restricting search to the topic's sections
+        
+        Args:
+            topic: Tool argument or short question
+        
+        Returns:
+            Pinecone-style filter on "section", or None when confidence is too low
+        """
+        sections, confidence = self.route(topic)
+        if not sections or confidence < self.min_confidence:
+            return None
+        if len(sections) == 1:
+            return {"section": {"$eq": sections[0]}}
+        return {"section": {"$in": sections}}
+    
+    def _exact_matches(self, terms: List[str]) -> List[str]:
+        """Sections whose name terms or synonyms occur as contiguous phrases, in section order"""
+        matched = set()
+        for phrase, section in self._phrases:
+            size = len(phrase)
+            if any(tuple(terms[i:i + size]) == phrase for i in range(len(terms) - size + 1)):
+                matched.add(section)
+        return [section for section in self.sections if section in matched]
+    
+    @staticmethod
+    def _terms(text: str) -> List[str]:
+        """Tokens of text without terms common to many sections"""
+        return [term for term in tokenize(text) if term not in GENERIC_TERMS]
@@ -0,0 +1,97 @@
+"""Single-flight coalescing of identical concurrent calls"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    """One in-flight computation and its outcome"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Run a function once per key while other threads asking for the same key wait for it"""
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+    
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Run func, or join an identical call already in flight
+        
+        Args:
+            key: Identity of the call
+            func: Zero-argument function computing the result
+        
+        Returns:
+            Result of func (shared by every caller that joined the flight)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """Async counterpart of SingleFlight: identical concurrent awaits share one task"""
+    
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self.shared = 0
+    
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await func(), or join an identical call already in flight
+        
+        The shared task is shielded, so a caller that is cancelled (e.g. by a
+        deadline) does not cancel the computation for the others.
+        
+        Args:
+            key: Identity of the call
+            func: Zero-argument coroutine function computing the result
+        
+        Returns:
+            Result of func (shared by every caller that joined the flight)
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+    
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when every waiter was cancelled
+            task.exception()
@@ -0,0 +1,89 @@
+"""SQLite storage with size-bounded least-recently-used eviction, shared by the persistent caches"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable
+
+
+class SQLiteLRUStore:
+    """Base for SQLite-backed caches that evict least recently used rows beyond max_bytes"""
+    
+    # Set by subclasses: table name and value column definitions (key, size and
+    # last_access columns are added here)
+    TABLE = ""
+    COLUMNS = ""
+    
+    def __init__(self, path: str | Path, max_bytes: int):
+        """
+        Open (or create) the cache database
+        
+        Args:
+            path: Path to the SQLite cache file (created if missing)
+            max_bytes: Maximum total size of stored values before eviction
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"""CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                key TEXT PRIMARY KEY,
+                {self.COLUMNS},
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{self.TABLE}_last_access ON {self.TABLE}(last_access)"
+        )
+        self._conn.commit()
+    
+    def clear(self) -> None:
+        """Remove all cached entries"""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.TABLE}")
+            self._conn.commit()
+    
+    def close(self) -> None:
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.TABLE}").fetchone()[0]
+    
+    # The helpers below expect the caller to hold _lock and to commit
+    
+    def _total_bytes(self) -> int:
+        return self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.TABLE}").fetchone()[0]
+    
+    def _touch(self, keys: Iterable[str], now: float | None = None) -> None:
+        """Mark entries as just used"""
+        now = time.time() if now is None else now
+        self._conn.executemany(
+            f"UPDATE {self.TABLE} SET last_access = ? WHERE key = ?",
+            [(now, key) for key in keys]
+        )
+    
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        excess = self._total_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+        
+        stale = []
+        for key, size in self._conn.execute(
+            f"SELECT key, size FROM {self.TABLE} ORDER BY last_access ASC"
+        ):
+            stale.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        
+        self._conn.executemany(f"DELETE FROM {self.TABLE} WHERE key = ?", stale)
@@ -0,0 +1,168 @@
+"""Vector store backend selection"""
+
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from ..document.allowance_table import AllowanceTable
+from .bm25_index import BM25Index
+from .content_store import ContentStore
+from .deadline_index import DeadlineIndex
+from .local_index import LocalVectorIndex
+from .ivf_index import IVFVectorIndex
+from .pinecone_client import PineconeClient
+
+load_dotenv()
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def get_data_dir() -> Path:
+    """Get the directory for local index artifacts (LPDP_DATA_DIR, default: data/)"""
+    return Path(os.getenv("LPDP_DATA_DIR", PROJECT_ROOT / "data"))
+
+
+def get_local_index_path() -> Path:
+    """Get the directory of the local vector index (LOCAL_INDEX_PATH)"""
+    return Path(os.getenv("LOCAL_INDEX_PATH", get_data_dir() / "local_index"))
+
+
+def get_content_store_path() -> Path:
+    """Get the directory of the chunk content store (CONTENT_STORE_PATH)"""
+    return Path(os.getenv("CONTENT_STORE_PATH", get_data_dir() / "content_store"))
+
+
+def content_store_only() -> bool:
+    """Whether chunk text is kept only in the content store, not in vector metadata (CONTENT_STORE_ONLY)"""
+    return os.getenv("CONTENT_STORE_ONLY", "").lower() in ("1", "true", "yes")
+
+
+def check_content_store() -> None:
+    """
+    Fail when chunk text is kept only in the content store but the store is missing
+    
+    Raises:
+        RuntimeError: If CONTENT_STORE_ONLY is set and no content store exists,
+            in which case every retrieved chunk would have empty text
+    """
+    path = get_content_store_path()
+    if content_store_only() and not ContentStore.exists(path):
+        raise RuntimeError(
+            f"CONTENT_STORE_ONLY is set but no content store was found at {path}; "
+            "ship the store built by scripts/index_documents.py or re-index without CONTENT_STORE_ONLY"
+        )
+
+
+def load_content_store() -> ContentStore | None:
+    """
+    Load the chunk content store written by the indexing script
+    
+    Returns:
+        ContentStore, or None if no store has been built yet
+    
+    Raises:
+        RuntimeError: If CONTENT_STORE_ONLY is set and the store is missing
+    """
+    check_content_store()
+    path = get_content_store_path()
+    if not ContentStore.exists(path):
+        return None
+    return ContentStore(path)
+
+
+def get_lexical_index_path() -> Path:
+    """Get the directory of the BM25 lexical index (LEXICAL_INDEX_PATH)"""
+    return Path(os.getenv("LEXICAL_INDEX_PATH", get_data_dir() / "bm25"))
+
+
+def load_lexical_index() -> BM25Index | None:
+    """
+    Load the BM25 index written by the indexing script
+    
+    Returns:
+        BM25Index, or None if no index has been built yet
+    """
+    path = get_lexical_index_path()
+    if not BM25Index.exists(path):
+        return None
+    return BM25Index.load(path)
+
+
+def get_allowance_table_path() -> Path:
+    """Get the file of the structured living allowance table (ALLOWANCE_TABLE_PATH)"""
+    return Path(os.getenv("ALLOWANCE_TABLE_PATH", get_data_dir() / "allowance_table.json"))
+
+
+def load_allowance_table() -> AllowanceTable | None:
+    """
+    Load the living allowance table written by the indexing script
+    
+    Returns:
+        AllowanceTable, or None if no table has been extracted yet
+    """
+    path = get_allowance_table_path()
+    if not path.exists():
+        return None
+    return AllowanceTable.load(path)
+
+
+def get_deadline_index_path() -> Path:
+    """Get the file of the extracted submission deadline rules (DEADLINE_INDEX_PATH)"""
+    return Path(os.getenv("DEADLINE_INDEX_PATH", get_data_dir() / "deadline_index.json"))
+
+
+def load_deadline_index() -> DeadlineIndex | None:
+    """
+    Load the deadline rules written by the indexing script
+    
+    Returns:
+        DeadlineIndex, or None if no rules have been extracted yet
+    """
+    path = get_deadline_index_path()
+    if not path.exists():
+        return None
+    return DeadlineIndex.load(path)
+
+
+def get_warm_answers_path() -> Path:
+    """Get the file of answers precomputed for canonical tool inputs (WARM_ANSWERS_PATH)"""
+    return Path(os.getenv("WARM_ANSWERS_PATH", get_data_dir() / "warm_answers.json"))
+
+
+def create_vector_client(
+    backend: str | None = None,
+    load: bool = True
+) -> PineconeClient | LocalVectorIndex:
+    """
+    Create the vector store client selected by VECTOR_BACKEND
+    
+    Args:
+        backend: "pinecone", "local" (brute force) or "ivf" (approximate) (optional,
+            uses VECTOR_BACKEND env var, default "pinecone")
+        load: For the local backend, load the saved index instead of starting empty
+    
+    Returns:
+        PineconeClient, LocalVectorIndex or IVFVectorIndex
+    """
+    backend = (backend or os.getenv("VECTOR_BACKEND", "pinecone")).lower()
+    
+    if backend == "pinecone":
+        return PineconeClient()
+    
+    if backend == "local":
+        path = get_local_index_path()
+        if load:
+            return LocalVectorIndex.load(path)
+        return LocalVectorIndex(path=path)
+    
+    if backend == "ivf":
+        path = get_local_index_path()
+        if load:
+            index = IVFVectorIndex.load(path, mmap=True)
+        else:
+            index = IVFVectorIndex(path=path)
+        index.n_probe = int(os.getenv("IVF_N_PROBE", index.n_probe))
+        return index
+    
+    raise ValueError(f"Unknown VECTOR_BACKEND: {backend}")
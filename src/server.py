@@ -2,15 +2,25 @@
 
 import asyncio
 import os
-from typing import Any
+import threading
+from typing import Any, Awaitable, Callable
 from dotenv import load_dotenv
 
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent, Resource
 
-from .rag import RAGRetriever
-from .tools import LPDPTools
+from .rag import (
+    BatchingGenerator,
+    GeminiClient,
+    RAGRetriever,
+    load_allowance_table,
+    load_deadline_index,
+    load_content_store,
+    load_lexical_index,
+)
+from .rag.vector_store import check_content_store, get_warm_answers_path
+from .tools import LPDPTools, ToolExecutor, ToolRejectedError, ToolTimeoutError, WarmAnswers
 
 # Load environment variables
 load_dotenv()
@@ -21,24 +31,78 @@ server = Server("lpdp-pencairan-faq")
 # Lazy-loaded instances
 _retriever = None
 _tools = None
+_executor = None
+_warm_answers = None
+# Tool calls run get_tools() in worker threads; concurrent first calls must not
+# build two retrievers (reentrant because get_tools() calls get_retriever())
+_init_lock = threading.RLock()
 
 
 def get_retriever() -> RAGRetriever:
     """Get or create RAG retriever instance"""
     global _retriever
-    if _retriever is None:
-        _retriever = RAGRetriever()
+    if _retriever is not None:
+        return _retriever
+    with _init_lock:
+        if _retriever is None:
+            gemini = GeminiClient()
+            batch_size = int(os.getenv("GEMINI_BATCH_SIZE", "4"))
+            batcher = None
+            if batch_size > 1:
+                batcher = BatchingGenerator(
+                    gemini,
+                    max_batch_size=batch_size,
+                    max_wait=float(os.getenv("GEMINI_BATCH_WAIT_MS", "200")) / 1000
+                )
+            _retriever = RAGRetriever(
+                gemini_client=gemini,
+                content_store=load_content_store(),
+                lexical_index=load_lexical_index(),
+                batcher=batcher
+            )
     return _retriever
 
 
 def get_tools() -> LPDPTools:
     """Get or create LPDP tools instance"""
     global _tools
-    if _tools is None:
-        _tools = LPDPTools(retriever=get_retriever())
+    if _tools is not None:
+        return _tools
+    with _init_lock:
+        if _tools is None:
+            _tools = LPDPTools(
+                retriever=get_retriever(),
+                allowance_table=load_allowance_table(),
+                deadline_index=load_deadline_index()
+            )
     return _tools
 
 
+def get_warm_answers() -> WarmAnswers:
+    """Get answers precomputed for the current index (empty if stale or not built)"""
+    global _warm_answers
+    if _warm_answers is not None:
+        return _warm_answers
+    with _init_lock:
+        if _warm_answers is None:
+            _warm_answers = WarmAnswers.load(get_warm_answers_path(), get_tools().retriever.index_version)
+    return _warm_answers
+
+
+def get_executor() -> ToolExecutor:
+    """Get or create the tool executor"""
+    global _executor
+    if _executor is None:
+        timeout = float(os.getenv("TOOL_TIMEOUT_SECONDS", "60"))
+        _executor = ToolExecutor(
+            max_workers=int(os.getenv("TOOL_MAX_WORKERS", "8")),
+            default_concurrency=int(os.getenv("TOOL_MAX_CONCURRENCY", "2")),
+            max_queue=int(os.getenv("TOOL_MAX_QUEUE", "16")),
+            timeout=timeout if timeout > 0 else None
+        )
+    return _executor
+
+
 @server.list_tools()
 async def list_tools() -> list[Tool]:
     """List available tools"""
@@ -134,10 +198,24 @@ dana penelitian, seminar internasional, dll.""",
 @server.call_tool()
 async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
     """Handle tool calls"""
-    tools = get_tools()
+    try:
+        return await _run_tool(name, arguments)
+    except ToolRejectedError:
+        return [TextContent(type="text", text="⚠️ Server sedang sibuk, silakan coba lagi beberapa saat lagi.")]
+    except ToolTimeoutError:
+        return [TextContent(type="text", text="⚠️ Permintaan melebihi batas waktu, silakan coba lagi.")]
+
+
+async def _run_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
+    """Run a tool through the executor and format its response"""
+    # First use builds clients and loads indexes; keep that off the event loop
+    tools = await asyncio.to_thread(get_tools)
+    warm_answers = await asyncio.to_thread(get_warm_answers)
+    executor = get_executor()
+    on_token = _progress_reporter()
     
     if name == "tanya_pencairan_lpdp":
-        result = tools.tanya_pencairan_lpdp(arguments["pertanyaan"])
+        result = await executor.run(name, tools.atanya_pencairan_lpdp, arguments["pertanyaan"], on_token)
         response = result["jawaban"]
         if result.get("sumber"):
             response += "\n\n📚 Sumber:"
@@ -148,7 +226,10 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
         return [TextContent(type="text", text=response)]
     
     elif name == "cari_komponen_dana":
-        result = tools.cari_komponen_dana(arguments["komponen"])
+        # Canonical inputs are served from answers built with the index
+        result = warm_answers.get(name, arguments["komponen"]) or await executor.run(
+            name, tools.acari_komponen_dana, arguments["komponen"], on_token
+        )
         response = f"📋 Informasi {result['komponen'].title()}\n\n"
         response += result["informasi"]
         if result.get("sumber"):
@@ -160,7 +241,9 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
         return [TextContent(type="text", text=response)]
     
     elif name == "cek_batas_waktu":
-        result = tools.cek_batas_waktu(arguments["jenis_dana"])
+        result = warm_answers.get(name, arguments["jenis_dana"]) or await executor.run(
+            name, tools.acek_batas_waktu, arguments["jenis_dana"], on_token
+        )
         response = f"⏰ Batas Waktu Pengajuan {result['jenis_dana'].title()}\n\n"
         response += result["batas_waktu"]
         if result.get("sumber"):
@@ -170,7 +253,7 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
         return [TextContent(type="text", text=response)]
     
     elif name == "info_dana_bulanan":
-        result = tools.info_dana_bulanan(arguments["lokasi"])
+        result = await executor.run(name, tools.ainfo_dana_bulanan, arguments["lokasi"], on_token)
         response = f"💰 Dana Hidup Bulanan di {result['lokasi'].title()}\n\n"
         response += result["informasi_dana_bulanan"]
         if result.get("sumber"):
@@ -180,7 +263,9 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
         return [TextContent(type="text", text=response)]
     
     elif name == "cari_dokumen_persyaratan":
-        result = tools.cari_dokumen_persyaratan(arguments["jenis_pengajuan"])
+        result = warm_answers.get(name, arguments["jenis_pengajuan"]) or await executor.run(
+            name, tools.acari_dokumen_persyaratan, arguments["jenis_pengajuan"], on_token
+        )
         response = f"📄 Dokumen Persyaratan untuk {result['jenis_pengajuan'].title()}\n\n"
         response += result["dokumen_persyaratan"]
         if result.get("sumber"):
@@ -193,6 +278,39 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
         return [TextContent(type="text", text=f"Tool '{name}' tidak ditemukan")]
 
 
+def _progress_reporter() -> Callable[[str], Awaitable[None]] | None:
+    """
+    Build a callback that streams partial answer text as MCP progress notifications
+    
+    Returns:
+        Async callback taking the next text piece, or None when the client did not
+        send a progress token with the request
+    """
+    try:
+        ctx = server.request_context
+    except LookupError:
+        return None
+    
+    token = ctx.meta.progressToken if ctx.meta else None
+    if token is None:
+        return None
+    
+    generated = 0
+    
+    async def report(piece: str) -> None:
+        nonlocal generated
+        generated += len(piece)
+        # Only the new piece is sent; progress (characters so far) must increase
+        await ctx.session.send_progress_notification(
+            token,
+            generated,
+            message=piece,
+            related_request_id=ctx.request_id
+        )
+    
+    return report
+
+
 @server.list_resources()
 async def list_resources() -> list[Resource]:
     """List available resources"""
@@ -234,6 +352,9 @@ dokumen "Panduan Pencairan Awardee" yang berlaku sejak 29 Oktober 2025.
 
 async def main():
     """Run the MCP server"""
+    # Refuse to serve answers built from empty chunk text
+    check_content_store()
+    get_executor().install()
     async with stdio_server() as (read_stream, write_stream):
         await server.run(
             read_stream,
@@ -1,5 +1,7 @@
 """MCP Tools module for LPDP"""
 
 from .lpdp_tools import LPDPTools
+from .executor import ToolExecutor, ToolRejectedError, ToolTimeoutError
+from .warm_answers import WarmAnswers
 
-__all__ = ["LPDPTools"]
+__all__ = ["LPDPTools", "ToolExecutor", "ToolRejectedError", "ToolTimeoutError", "WarmAnswers"]
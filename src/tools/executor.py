@@ -0,0 +1,130 @@
+"""Bounded execution of tool calls off the MCP event loop"""
+
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class ToolRejectedError(RuntimeError):
+    """Raised when a tool's queue is full and the call is rejected immediately"""
+
+
+class ToolTimeoutError(TimeoutError):
+    """Raised when a tool call misses its deadline"""
+
+
+class ToolExecutor:
+    """Run tool calls with per-tool concurrency limits, bounded queues and deadlines"""
+    
+    def __init__(
+        self,
+        max_workers: int = 8,
+        default_concurrency: int = 2,
+        concurrency: Dict[str, int] | None = None,
+        max_queue: int = 16,
+        timeout: float | None = 60.0
+    ):
+        """
+        Initialize tool executor
+        
+        Args:
+            max_workers: Size of the thread pool running blocking work
+            default_concurrency: Calls of one tool allowed to run at once
+            concurrency: Per-tool overrides of default_concurrency
+            max_queue: Calls of one tool allowed to wait for a slot; further calls are rejected
+            timeout: Default deadline in seconds per call, including time spent queued
+                (None disables it)
+        """
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self.default_concurrency = max(1, default_concurrency)
+        self.concurrency = dict(concurrency or {})
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._pending: Dict[str, int] = {}
+        self.rejected = 0
+        self.timed_out = 0
+    
+    async def run(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        *args: Any,
+        timeout: float | None = None
+    ) -> Any:
+        """
+        Run one tool call
+        
+        Blocking functions run on the thread pool; coroutine functions are awaited
+        directly. A blocking call that misses its deadline keeps its worker thread
+        until it returns, but the caller is released immediately.
+        
+        Args:
+            name: Tool name the limits apply to
+            func: Tool function (sync or async)
+            *args: Arguments passed to func
+            timeout: Deadline in seconds (overrides the default)
+        
+        Returns:
+            Whatever func returns
+        
+        Raises:
+            ToolRejectedError: If the tool already has max_queue calls waiting
+            ToolTimeoutError: If the call does not finish before its deadline
+        """
+        limit = self.concurrency.get(name, self.default_concurrency)
+        pending = self._pending.get(name, 0)
+        if pending >= limit + self.max_queue:
+            self.rejected += 1
+            raise ToolRejectedError(f"Tool '{name}' is saturated ({pending} calls pending)")
+        
+        self._pending[name] = pending + 1
+        try:
+            return await asyncio.wait_for(
+                self._run_limited(name, limit, func, *args),
+                timeout if timeout is not None else self.timeout
+            )
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise ToolTimeoutError(f"Tool '{name}' missed its deadline") from None
+        finally:
+            self._pending[name] -= 1
+    
+    def install(self, loop: asyncio.AbstractEventLoop | None = None) -> None:
+        """
+        Make the pool the loop's default executor, so asyncio.to_thread work is bounded too
+        
+        Args:
+            loop: Event loop (defaults to the running loop)
+        """
+        (loop or asyncio.get_running_loop()).set_default_executor(self.pool)
+    
+    def shutdown(self) -> None:
+        """Stop the thread pool without waiting for abandoned calls"""
+        self.pool.shutdown(wait=False, cancel_futures=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get executor statistics
+        
+        Returns:
+            Dict with pending calls per tool and rejected / timed out counts
+        """
+        return {
+            "pending": {name: count for name, count in self._pending.items() if count},
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+    
+    async def _run_limited(self, name: str, limit: int, func: Callable[..., Any], *args: Any) -> Any:
+        semaphore = self._semaphores.get(name)
+        if semaphore is None:
+            semaphore = self._semaphores[name] = asyncio.Semaphore(limit)
+        
+        async with semaphore:
+            if inspect.iscoroutinefunction(func):
+                return await func(*args)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.pool, func, *args)
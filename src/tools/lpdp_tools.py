@@ -1,20 +1,41 @@
 """LPDP MCP Tools - Tools untuk menjawab pertanyaan tentang pencairan beasiswa"""
 
-from typing import Dict, Any, Optional
-from ..rag import RAGRetriever
+from typing import Dict, Any, Awaitable, Callable, Optional
+from ..document.allowance_table import AllowanceEntry, AllowanceTable, TABLE_TITLE
+from ..rag import DeadlineIndex, RAGRetriever
 
 
 class LPDPTools:
     """Collection of tools for LPDP scholarship disbursement queries"""
     
-    def __init__(self, retriever: RAGRetriever | None = None):
+    # Retrieval questions built from each templated tool's argument
+    KOMPONEN_QUERY = "Jelaskan tentang {} beasiswa LPDP, termasuk besaran, syarat, dan cara pengajuan"
+    BATAS_WAKTU_QUERY = "Kapan batas waktu atau deadline pengajuan {} LPDP?"
+    DANA_BULANAN_QUERY = "Berapa living allowance atau dana hidup bulanan untuk mahasiswa LPDP di {}?"
+    DOKUMEN_QUERY = "Dokumen apa saja yang diperlukan untuk pengajuan {} LPDP?"
+    
+    # Related rules listed after the explicit deadline in an index answer
+    MAX_KETENTUAN_TERKAIT = 5
+    
+    def __init__(
+        self,
+        retriever: RAGRetriever | None = None,
+        allowance_table: AllowanceTable | None = None,
+        deadline_index: DeadlineIndex | None = None
+    ):
         """
         Initialize LPDP Tools
         
         Args:
             retriever: RAGRetriever instance
+            allowance_table: Living allowance table answering info_dana_bulanan
+                without RAG (optional; without it every lookup goes through RAG)
+            deadline_index: Extracted deadline rules answering cek_batas_waktu
+                without RAG (optional; unknown fund types still go through RAG)
         """
         self.retriever = retriever or RAGRetriever()
+        self.allowance_table = allowance_table
+        self.deadline_index = deadline_index
     
     def tanya_pencairan_lpdp(self, pertanyaan: str) -> Dict[str, Any]:
         """
@@ -26,7 +47,7 @@ class LPDPTools:
         Returns:
             Dict dengan jawaban dan sumber referensi
         """
-        result = self.retriever.query(pertanyaan, top_k=5)
+        result = self.retriever.query(pertanyaan, top_k=5, adaptive=True)
         
         return {
             "jawaban": result["answer"],
@@ -43,8 +64,9 @@ class LPDPTools:
         Returns:
             Dict dengan informasi komponen dana
         """
-        query = f"Jelaskan tentang {komponen} beasiswa LPDP, termasuk besaran, syarat, dan cara pengajuan"
-        result = self.retriever.query(query, top_k=7)
+        result = self.retriever.query(
+            self.KOMPONEN_QUERY.format(komponen), top_k=7, adaptive=True, route=komponen
+        )
         
         return {
             "komponen": komponen,
@@ -62,8 +84,13 @@ class LPDPTools:
         Returns:
             Dict dengan informasi batas waktu
         """
-        query = f"Kapan batas waktu atau deadline pengajuan {jenis_dana} LPDP?"
-        result = self.retriever.query(query, top_k=5)
+        aturan = self._cari_batas_waktu(jenis_dana)
+        if aturan is not None:
+            return aturan
+        
+        result = self.retriever.query(
+            self.BATAS_WAKTU_QUERY.format(jenis_dana), top_k=5, adaptive=True, route=jenis_dana
+        )
         
         return {
             "jenis_dana": jenis_dana,
@@ -81,8 +108,11 @@ class LPDPTools:
         Returns:
             Dict dengan informasi living allowance
         """
-        query = f"Berapa living allowance atau dana hidup bulanan untuk mahasiswa LPDP di {lokasi}?"
-        result = self.retriever.query(query, top_k=5)
+        tabel = self._cari_tabel_dana_bulanan(lokasi)
+        if tabel is not None:
+            return tabel
+        
+        result = self.retriever.query(self.DANA_BULANAN_QUERY.format(lokasi), top_k=5, adaptive=True)
         
         return {
             "lokasi": lokasi,
@@ -100,11 +130,180 @@ class LPDPTools:
         Returns:
             Dict dengan daftar dokumen yang diperlukan
         """
-        query = f"Dokumen apa saja yang diperlukan untuk pengajuan {jenis_pengajuan} LPDP?"
-        result = self.retriever.query(query, top_k=5)
+        result = self.retriever.query(
+            self.DOKUMEN_QUERY.format(jenis_pengajuan), top_k=5, adaptive=True, route=jenis_pengajuan
+        )
+        
+        return {
+            "jenis_pengajuan": jenis_pengajuan,
+            "dokumen_persyaratan": result["answer"],
+            "sumber": result["sources"]
+        }
+    
+    async def atanya_pencairan_lpdp(
+        self,
+        pertanyaan: str,
+        on_token: Callable[[str], Awaitable[None]] | None = None
+    ) -> Dict[str, Any]:
+        """Versi async dari tanya_pencairan_lpdp; on_token menerima potongan jawaban saat dihasilkan"""
+        result = await self.retriever.aquery(pertanyaan, top_k=5, on_token=on_token, adaptive=True)
+        
+        return {
+            "jawaban": result["answer"],
+            "sumber": result["sources"]
+        }
+    
+    async def acari_komponen_dana(
+        self,
+        komponen: str,
+        on_token: Callable[[str], Awaitable[None]] | None = None
+    ) -> Dict[str, Any]:
+        """Versi async dari cari_komponen_dana"""
+        query = self.KOMPONEN_QUERY.format(komponen)
+        result = await self.retriever.aquery(
+            query, top_k=7, on_token=on_token, adaptive=True, route=komponen
+        )
+        
+        return {
+            "komponen": komponen,
+            "informasi": result["answer"],
+            "sumber": result["sources"]
+        }
+    
+    async def acek_batas_waktu(
+        self,
+        jenis_dana: str,
+        on_token: Callable[[str], Awaitable[None]] | None = None
+    ) -> Dict[str, Any]:
+        """Versi async dari cek_batas_waktu"""
+        aturan = self._cari_batas_waktu(jenis_dana)
+        if aturan is not None:
+            if on_token is not None:
+                await on_token(aturan["batas_waktu"])
+            return aturan
+        
+        query = self.BATAS_WAKTU_QUERY.format(jenis_dana)
+        result = await self.retriever.aquery(
+            query, top_k=5, on_token=on_token, adaptive=True, route=jenis_dana
+        )
+        
+        return {
+            "jenis_dana": jenis_dana,
+            "batas_waktu": result["answer"],
+            "sumber": result["sources"]
+        }
+    
+    async def ainfo_dana_bulanan(
+        self,
+        lokasi: str,
+        on_token: Callable[[str], Awaitable[None]] | None = None
+    ) -> Dict[str, Any]:
+        """Versi async dari info_dana_bulanan"""
+        tabel = self._cari_tabel_dana_bulanan(lokasi)
+        if tabel is not None:
+            if on_token is not None:
+                await on_token(tabel["informasi_dana_bulanan"])
+            return tabel
+        
+        query = self.DANA_BULANAN_QUERY.format(lokasi)
+        result = await self.retriever.aquery(query, top_k=5, on_token=on_token, adaptive=True)
+        
+        return {
+            "lokasi": lokasi,
+            "informasi_dana_bulanan": result["answer"],
+            "sumber": result["sources"]
+        }
+    
+    async def acari_dokumen_persyaratan(
+        self,
+        jenis_pengajuan: str,
+        on_token: Callable[[str], Awaitable[None]] | None = None
+    ) -> Dict[str, Any]:
+        """Versi async dari cari_dokumen_persyaratan"""
+        query = self.DOKUMEN_QUERY.format(jenis_pengajuan)
+        result = await self.retriever.aquery(
+            query, top_k=5, on_token=on_token, adaptive=True, route=jenis_pengajuan
+        )
         
         return {
             "jenis_pengajuan": jenis_pengajuan,
             "dokumen_persyaratan": result["answer"],
             "sumber": result["sources"]
         }
+    
+    def _cari_batas_waktu(self, jenis_dana: str) -> Dict[str, Any] | None:
+        """
+        Jawab cek_batas_waktu langsung dari aturan batas waktu yang diekstrak
+        
+        Args:
+            jenis_dana: Jenis dana
+        
+        Returns:
+            Dict seperti cek_batas_waktu, atau None jika jenis dana tidak dikenali
+        """
+        if self.deadline_index is None:
+            return None
+        
+        rules = self.deadline_index.lookup(jenis_dana)
+        if not rules:
+            return None
+        
+        utama = [rule for rule in rules if rule["primary"]]
+        terkait = [rule for rule in rules if not rule["primary"]][:self.MAX_KETENTUAN_TERKAIT]
+        
+        lines = [f"Batas waktu pengajuan {jenis_dana} LPDP:"]
+        lines += [f"- {rule['subject']}: {rule['rule']}" for rule in utama]
+        if terkait:
+            lines.append("\nKetentuan terkait:")
+            lines += [f"- {rule['rule']}" for rule in terkait]
+        lines.append("\nBerdasarkan panduan pencairan.")
+        
+        # Unique (page, section) pairs in answer order
+        sources = dict.fromkeys((rule["page_number"], rule["section"]) for rule in utama + terkait)
+        return {
+            "jenis_dana": jenis_dana,
+            "batas_waktu": "\n".join(lines),
+            "sumber": [
+                {"page": page, "section": section, "relevance": 1.0}
+                for page, section in sources
+            ]
+        }
+    
+    def _cari_tabel_dana_bulanan(self, lokasi: str) -> Dict[str, Any] | None:
+        """
+        Jawab info_dana_bulanan langsung dari tabel living allowance
+        
+        Args:
+            lokasi: Nama negara atau kota
+            
+        Returns:
+            Dict seperti info_dana_bulanan, atau None jika lokasi tidak ada di tabel
+        """
+        if self.allowance_table is None:
+            return None
+        
+        entries = self.allowance_table.lookup(lokasi)
+        if not entries:
+            return None
+        
+        lines = [f"Besaran Dana Hidup Bulanan (living allowance) LPDP untuk {lokasi}:"]
+        for entry in entries:
+            nominal = f"{entry.amount:,}".replace(",", ".")
+            lines.append(f"- {self._label_dana_bulanan(entry)}: {entry.currency} {nominal} per bulan")
+        lines.append(f"\nBerdasarkan {TABLE_TITLE} pada panduan pencairan.")
+        
+        pages = sorted({entry.page_number for entry in entries})
+        return {
+            "lokasi": lokasi,
+            "informasi_dana_bulanan": "\n".join(lines),
+            "sumber": [{"page": page, "section": "Dana Hidup Bulanan", "relevance": 1.0} for page in pages]
+        }
+    
+    @staticmethod
+    def _label_dana_bulanan(entry: AllowanceEntry) -> str:
+        """Nama baris tabel: negara beserta kota yang dicakup"""
+        if entry.other_cities:
+            return f"{entry.country} (kota lain)"
+        if entry.cities:
+            return f"{entry.country} ({', '.join(entry.cities)})"
+        return entry.country
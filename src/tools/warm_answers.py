@@ -0,0 +1,157 @@
+"""Precomputed answers for canonical tool inputs, built at indexing time"""
+
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable
+
+from ..document.pdf_loader import SECTION_KEYWORDS
+from ..rag.query_cache import normalize_query
+from ..rag.section_router import GENERIC_TERMS
+from .lpdp_tools import LPDPTools
+
+# Templated tools taking a fund type, with the name of their argument
+WARM_TOOLS = {
+    "cari_komponen_dana": "komponen",
+    "cek_batas_waktu": "jenis_dana",
+    "cari_dokumen_persyaratan": "jenis_pengajuan",
+}
+
+
+def normalize_input(argument: str) -> str:
+    """
+    Normalize a tool argument for matching against canonical inputs
+    
+    Case, punctuation and generic words are ignored, so "Dana SPP",
+    "spp" and "SPP?" map to the same key.
+    
+    Args:
+        argument: Tool argument as given by the client
+    
+    Returns:
+        Normalized argument
+    """
+    words = normalize_query(argument).split()
+    return " ".join(word for word in words if word not in GENERIC_TERMS)
+
+
+class WarmAnswers:
+    """Tool results for canonical inputs, valid for one index version"""
+    
+    def __init__(
+        self,
+        version: str = "",
+        answers: Dict[str, Dict[str, Dict[str, Any]]] | None = None
+    ):
+        """
+        Initialize warm answers
+        
+        Args:
+            version: Index version the answers were generated against
+            answers: Tool name -> normalized input -> tool result
+        """
+        self.version = version
+        self.answers = answers or {}
+    
+    def __len__(self) -> int:
+        return sum(len(results) for results in self.answers.values())
+    
+    def get(self, tool: str, argument: str) -> Dict[str, Any] | None:
+        """
+        Get the precomputed result of a tool call
+        
+        Args:
+            tool: Tool name
+            argument: Tool argument as given by the client
+        
+        Returns:
+            Tool result echoing the given argument, or None if the input is not canonical
+        """
+        result = self.answers.get(tool, {}).get(normalize_input(argument))
+        if result is None:
+            return None
+        return {**result, WARM_TOOLS[tool]: argument}
+    
+    def put(self, tool: str, argument: str, result: Dict[str, Any]) -> None:
+        """
+        Store the result of a tool call
+        
+        Args:
+            tool: Tool name
+            argument: Canonical argument
+            result: Tool result
+        """
+        self.answers.setdefault(tool, {})[normalize_input(argument)] = result
+    
+    @classmethod
+    def build(
+        cls,
+        tools: LPDPTools,
+        version: str,
+        inputs: Iterable[str] = SECTION_KEYWORDS,
+        on_error: Callable[[str, str, Exception], None] | None = None
+    ) -> "WarmAnswers":
+        """
+        Run every templated tool on every canonical input
+        
+        Calls run one after another through the tools' retriever, so generation
+        waits on the shared Gemini rate limiter like any other request.
+        
+        Args:
+            tools: Tools backed by the freshly built index
+            version: Index version of that build
+            inputs: Canonical arguments (the section names by default)
+            on_error: Called with (tool, argument, error) for calls that fail;
+                failed and unsourced answers are left to the live path
+        
+        Returns:
+            WarmAnswers for the successful calls
+        """
+        warm = cls(version)
+        for tool in WARM_TOOLS:
+            for argument in inputs:
+                try:
+                    result = getattr(tools, tool)(argument)
+                except Exception as e:
+                    if on_error is not None:
+                        on_error(tool, argument, e)
+                    continue
+                if result.get("sumber"):
+                    warm.put(tool, argument, result)
+        return warm
+    
+    def save(self, path: str | Path) -> Path:
+        """
+        Write the answers as JSON
+        
+        Args:
+            path: Target file
+        
+        Returns:
+            Path written
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "answers": self.answers}, f, ensure_ascii=False)
+        return path
+    
+    @classmethod
+    def load(cls, path: str | Path, version: str) -> "WarmAnswers":
+        """
+        Load answers written by save() for the current index
+        
+        Args:
+            path: JSON file
+            version: Current index version
+        
+        Returns:
+            WarmAnswers; empty when the file is missing or was built for another index version
+        """
+        path = Path(path)
+        if not path.exists():
+            return cls(version)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version", "") != version:
+            return cls(version)
+        return cls(version, data["answers"])
@@ -53,6 +53,171 @@ class TestPDFLoader:
         assert len(documents) == 1
         assert "Test content from page 1" in documents[0].content
         assert documents[0].metadata["page_number"] == 1
+    
+    @patch('src.document.pdf_loader.fitz')
+    def test_load_assigns_sections_from_toc(self, mock_fitz, tmp_path):
+        """Test that outline sections carry across pages and split pages where they change"""
+        from src.document.pdf_loader import PDFLoader
+        
+        pdf_file = tmp_path / "test.pdf"
+        pdf_file.write_bytes(b"dummy pdf content")
+        
+        pages = [
+            "Komponen Dana\nDana SPP\nSPP dibayarkan ke kampus.",
+            "Tagihan SPP dikirim setiap semester oleh perguruan tinggi.",
+            "Sisa ketentuan SPP.\nDana Transportasi\nTiket pesawat kelas ekonomi untuk keberangkatan.",
+        ]
+        mock_pages = []
+        for text in pages:
+            mock_page = MagicMock()
+            mock_page.get_text.return_value = text
+            mock_pages.append(mock_page)
+        
+        mock_doc = MagicMock()
+        mock_doc.__enter__ = MagicMock(return_value=mock_doc)
+        mock_doc.__exit__ = MagicMock(return_value=False)
+        mock_doc.__len__ = MagicMock(return_value=len(pages))
+        mock_doc.__getitem__ = MagicMock(side_effect=lambda i: mock_pages[i])
+        mock_doc.get_toc.return_value = [
+            [1, "Komponen Dana", 1],
+            [2, "Dana SPP", 1],
+            [2, "Dana Transportasi", 3],
+        ]
+        mock_fitz.open.return_value = mock_doc
+        
+        documents = PDFLoader(pdf_file).load()
+        
+        assert [doc.metadata["section"] for doc in documents] == [
+            "Dana SPP", "Dana SPP", "Dana Transportasi"
+        ]
+        assert documents[1].metadata["section_path"] == "Komponen Dana > Dana SPP"
+        assert "section_spans" not in documents[1].metadata
+        assert [span["section"] for span in documents[2].metadata["section_spans"]] == [
+            "Dana SPP", "Dana Transportasi"
+        ]
+    
+    def test_load_detects_headings_by_font_size(self, tmp_path):
+        """Test that larger lines are used as headings when the PDF has no outline"""
+        import fitz
+        from src.document.pdf_loader import PDFLoader
+        
+        pdf = fitz.open()
+        page = pdf.new_page()
+        page.insert_text((72, 72), "BAB II Komponen Dana", fontsize=20)
+        page.insert_text((72, 110), "3.1 Dana Aplikasi Visa", fontsize=14)
+        page.insert_text((72, 140), "Biaya visa diganti sesuai tagihan resmi kedutaan.", fontsize=10)
+        page = pdf.new_page()
+        page.insert_text((72, 72), "Bukti pembayaran visa wajib diunggah ke sistem.", fontsize=10)
+        pdf.save(tmp_path / "guide.pdf")
+        pdf.close()
+        
+        documents = PDFLoader(tmp_path / "guide.pdf").load()
+        
+        assert documents[1].metadata["section"] == "Dana Aplikasi Visa"
+        assert documents[1].metadata["section_path"] == "BAB II Komponen Dana > 3.1 Dana Aplikasi Visa"
+
+
+class TestAllowanceTable:
+    """Tests for AllowanceTableExtractor and AllowanceTable"""
+    
+    def _mock_pdf(self, mock_fitz, tables, texts):
+        mock_pages = []
+        for i, rows in enumerate(tables):
+            mock_table = MagicMock()
+            mock_table.extract.return_value = rows
+            mock_page = MagicMock()
+            mock_page.get_text.return_value = texts.get(i, "")
+            mock_page.find_tables.return_value.tables = [mock_table] if rows else []
+            mock_pages.append(mock_page)
+        
+        mock_doc = MagicMock()
+        mock_doc.__enter__ = MagicMock(return_value=mock_doc)
+        mock_doc.__exit__ = MagicMock(return_value=False)
+        mock_doc.__len__ = MagicMock(return_value=len(mock_pages))
+        mock_doc.__getitem__ = MagicMock(side_effect=lambda i: mock_pages[i])
+        mock_fitz.open.return_value = mock_doc
+    
+    @patch('src.document.allowance_table.fitz')
+    def test_extract_parses_table_rows(self, mock_fitz, tmp_path):
+        """Test that table rows become entries, including continuation rows, page breaks and earlier mentions"""
+        from src.document.allowance_table import AllowanceTableExtractor
+        
+        pdf_file = tmp_path / "test.pdf"
+        pdf_file.write_bytes(b"dummy pdf content")
+        
+        tables = [
+            [],
+            [
+                ["Wilayah", None, "Kota", "Valuta", "Nominal"],
+                ["Dalam Negeri\nLuar Negeri", None, "DKI Jakarta. Kota\nSurabaya\nKota Lain", "IDR\nIDR", "5,000,000\n4,500,000"],
+                ["2", "Amerika Serikat", "Boston, MA.\nNewton, MA.Pasadena,\nCA.", "USD", "2,600"],
+            ],
+            [
+                ["", "", "Ann Arbor, MI.", "", ""],
+                ["27", "Jepang", "Tokyo", "JPY", "195,000"],
+                [None, None, "Kota Lain", "JPY", "170,000"],
+            ],
+            [],
+        ]
+        # A cross-reference precedes the page holding the table
+        self._mock_pdf(mock_fitz, tables, {
+            0: "Lihat Tabel Besaran Dana Hidup Bulanan pada bagian G.",
+            1: "G. Tabel Besaran Dana Hidup Bulanan",
+        })
+        
+        entries = AllowanceTableExtractor(pdf_file).extract()
+        
+        assert [(e.country, e.currency, e.amount, e.other_cities) for e in entries] == [
+            ("Dalam Negeri", "IDR", 5000000, False),
+            ("Dalam Negeri", "IDR", 4500000, True),
+            ("Amerika Serikat", "USD", 2600, False),
+            ("Jepang", "JPY", 195000, False),
+            ("Jepang", "JPY", 170000, True),
+        ]
+        assert entries[0].cities == ["DKI Jakarta", "Kota Surabaya"]
+        assert entries[2].cities == ["Boston", "Newton", "Pasadena", "Ann Arbor"]
+        assert entries[3].page_number == 3
+    
+    @patch('src.document.allowance_table.fitz')
+    def test_extract_lists_each_city_in_one_row(self, mock_fitz, tmp_path):
+        """Test that a city repeated in the guide's table maps to a single row per country"""
+        from src.document.allowance_table import AllowanceTable, AllowanceTableExtractor, normalize_place
+        
+        pdf_file = tmp_path / "test.pdf"
+        pdf_file.write_bytes(b"dummy pdf content")
+        
+        self._mock_pdf(mock_fitz, [[
+            ["2", "Amerika Serikat", "Cambridge, MA. Newton, MA.Pasadena, CA.", "USD", "2,600"],
+            [None, None, "Irvine, CA. Pasadena, CA. Claremont, CA.", "USD", "2,500"],
+            ["26", "Inggris", "Cambridge", "GBP", "1,700"],
+        ]], {0: "Tabel Besaran Dana Hidup Bulanan"})
+        
+        entries = AllowanceTableExtractor(pdf_file).extract()
+        
+        listed = [(e.country, normalize_place(city)) for e in entries for city in e.cities]
+        assert len(listed) == len(set(listed))
+        assert entries[1].cities == ["Irvine", "Claremont"]
+        assert [e.amount for e in AllowanceTable(entries).lookup("Pasadena")] == [2600]
+        assert [e.currency for e in AllowanceTable(entries).lookup("Cambridge")] == ["USD", "GBP"]
+    
+    def test_lookup_by_city_country_and_misspelling(self, tmp_path):
+        """Test that lookups match cities, countries, aliases and near misses"""
+        from src.document.allowance_table import AllowanceEntry, AllowanceTable
+        
+        table = AllowanceTable([
+            AllowanceEntry("Amerika Serikat", ["Boston", "Cambridge"], "USD", 2600, 53),
+            AllowanceEntry("Inggris", ["Cambridge"], "GBP", 1700, 54),
+            AllowanceEntry("Jepang", ["Tokyo"], "JPY", 195000, 54),
+            AllowanceEntry("Jepang", [], "JPY", 170000, 54, other_cities=True),
+        ])
+        table = AllowanceTable.load(table.save(tmp_path / "allowance.json"))
+        
+        assert [e.amount for e in table.lookup("Tokyo")] == [195000]
+        assert [e.amount for e in table.lookup("Japan")] == [195000, 170000]
+        assert [e.amount for e in table.lookup("Jepangg")] == [195000, 170000]
+        assert [e.currency for e in table.lookup("Cambridge")] == ["USD", "GBP"]
+        assert [e.currency for e in table.lookup("Cambridge, Inggris")] == ["GBP"]
+        assert table.lookup("Kyoto") == []
 
 
 class TestTextChunker:
@@ -104,3 +269,24 @@ class TestTextChunker:
         assert len(chunks) >= 2
         # Check that global chunk indices are assigned
         assert all("global_chunk_index" in c.metadata for c in chunks)
+    
+    def test_chunk_text_assigns_sections_from_spans(self):
+        """Test that chunks take the section of the page part they fall in"""
+        from src.document.chunker import TextChunker
+        
+        chunker = TextChunker(chunk_size=60, chunk_overlap=0)
+        
+        text = "Tagihan SPP dikirim setiap semester.\nDana Transportasi\nTiket pesawat kelas ekonomi."
+        metadata = {
+            "page_number": 3,
+            "section": "Dana SPP",
+            "section_spans": [
+                {"start": 0, "section": "Dana SPP", "section_path": "Dana SPP"},
+                {"start": 37, "section": "Dana Transportasi", "section_path": "Dana Transportasi"},
+            ],
+        }
+        
+        chunks = chunker.chunk_text(text, metadata)
+        
+        assert [c.metadata["section"] for c in chunks] == ["Dana SPP", "Dana Transportasi"]
+        assert all("section_spans" not in c.metadata for c in chunks)
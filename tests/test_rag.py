@@ -47,6 +47,650 @@ class TestGoogleEmbeddings:
             with patch('src.rag.embeddings.genai'):
                 embeddings = GoogleEmbeddings()
                 assert embeddings.dimension == 768
+    
+    @patch('src.rag.embeddings.genai')
+    def test_embed_texts_batches_requests(self, mock_genai):
+        """Test that embed_texts sends batched requests and keeps input order"""
+        from src.rag.embeddings import GoogleEmbeddings
+        
+        def fake_embed(model, content, task_type):
+            return {'embedding': [[float(text.split()[-1])] for text in content]}
+        
+        mock_genai.embed_content.side_effect = fake_embed
+        
+        with patch.dict('os.environ', {'GOOGLE_API_KEY': 'test_key'}):
+            embeddings = GoogleEmbeddings(batch_size=3, max_concurrency=4)
+            texts = [f"chunk {i}" for i in range(10)]
+            result = embeddings.embed_texts(texts)
+        
+        assert mock_genai.embed_content.call_count == 4
+        assert result == [[float(i)] for i in range(10)]
+    
+    def test_split_batches_respects_payload_size(self):
+        """Test that batches are split by payload size as well as count"""
+        from src.rag.embeddings import GoogleEmbeddings
+        
+        with patch.dict('os.environ', {'GOOGLE_API_KEY': 'test_key'}):
+            with patch('src.rag.embeddings.genai'):
+                embeddings = GoogleEmbeddings(batch_size=100, max_batch_bytes=10)
+                batches = embeddings._split_batches(["aaaa", "bbbb", "cccc", "dddddddddddd"])
+        
+        assert batches == [["aaaa", "bbbb"], ["cccc"], ["dddddddddddd"]]
+
+
+class TestEmbeddingCache:
+    """Tests for EmbeddingCache class"""
+    
+    def test_roundtrip_persists_across_instances(self, tmp_path):
+        """Test that cached vectors survive reopening the cache file"""
+        from src.rag.embedding_cache import EmbeddingCache
+        
+        path = tmp_path / "cache.sqlite"
+        key = EmbeddingCache.make_key("model", "retrieval_document", "Dana SPP")
+        
+        cache = EmbeddingCache(path)
+        cache.put(key, [0.5, 0.25, -1.0])
+        cache.close()
+        
+        reopened = EmbeddingCache(path)
+        assert reopened.get(key) == [0.5, 0.25, -1.0]
+        assert reopened.get("missing") is None
+    
+    def test_key_depends_on_task_type(self):
+        """Test that the same text embedded for different tasks gets distinct keys"""
+        from src.rag.embedding_cache import EmbeddingCache
+        
+        doc_key = EmbeddingCache.make_key("model", "retrieval_document", "Dana SPP")
+        query_key = EmbeddingCache.make_key("model", "retrieval_query", "Dana SPP")
+        
+        assert doc_key != query_key
+    
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Test that size-based eviction drops the least recently used vectors"""
+        from src.rag.embedding_cache import EmbeddingCache
+        
+        # Each 4-dimensional float32 vector takes 16 bytes
+        cache = EmbeddingCache(tmp_path / "cache.sqlite", max_bytes=32)
+        cache.put("a", [1.0] * 4)
+        cache.put("b", [2.0] * 4)
+        cache.get("a")
+        cache.put("c", [3.0] * 4)
+        
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == [1.0] * 4
+        assert cache.total_bytes() <= 32
+    
+    @patch('src.rag.embeddings.genai')
+    def test_embeddings_skip_cached_texts(self, mock_genai, tmp_path):
+        """Test that GoogleEmbeddings only embeds texts missing from the cache"""
+        from src.rag.embeddings import GoogleEmbeddings
+        from src.rag.embedding_cache import EmbeddingCache
+        
+        mock_genai.embed_content.side_effect = lambda model, content, task_type: {
+            'embedding': [[float(len(text))] for text in content]
+        }
+        
+        with patch.dict('os.environ', {'GOOGLE_API_KEY': 'test_key'}):
+            embeddings = GoogleEmbeddings(cache=EmbeddingCache(tmp_path / "cache.sqlite"))
+            first = embeddings.embed_texts(["a", "bb"])
+            second = embeddings.embed_texts(["bb", "ccc", "ccc"])
+        
+        assert first == [[1.0], [2.0]]
+        assert second == [[2.0], [3.0], [3.0]]
+        assert mock_genai.embed_content.call_args_list[-1].kwargs["content"] == ["ccc"]
+
+
+class TestQueryEmbeddingCache:
+    """Tests for QueryEmbeddingCache class"""
+    
+    def test_normalize_query(self):
+        """Test that case, punctuation and whitespace are normalized"""
+        from src.rag.query_cache import normalize_query
+        
+        assert normalize_query("  Kapan batas WAKTU   Dana SPP?") == "kapan batas waktu dana spp"
+        assert normalize_query("Dana SPP") == normalize_query("dana,  spp!")
+    
+    def test_lru_eviction_and_counters(self):
+        """Test that the cache is bounded and counts hits and misses"""
+        from src.rag.query_cache import QueryEmbeddingCache
+        
+        cache = QueryEmbeddingCache(max_size=2)
+        cache.put("a", [1.0])
+        cache.put("b", [2.0])
+        assert cache.get("A!") == [1.0]
+        cache.put("c", [3.0])
+        
+        assert cache.get("b") is None
+        assert cache.get("c") == [3.0]
+        assert cache.stats()["hits"] == 2
+        assert cache.stats()["misses"] == 1
+        assert len(cache) == 2
+    
+    def test_ttl_expiry(self):
+        """Test that expired entries are treated as misses"""
+        from src.rag.query_cache import QueryEmbeddingCache
+        
+        cache = QueryEmbeddingCache(ttl_seconds=10)
+        with patch('src.rag.query_cache.time.monotonic', return_value=100.0):
+            cache.put("dana spp", [1.0])
+        with patch('src.rag.query_cache.time.monotonic', return_value=111.0):
+            assert cache.get("dana spp") is None
+
+
+class TestContentStore:
+    """Tests for ContentStore class"""
+    
+    def test_roundtrip_and_reload(self, tmp_path):
+        """Test that chunks can be read back after reopening the store"""
+        from src.rag.content_store import ContentStore
+        
+        store = ContentStore(tmp_path / "store")
+        store.add("p1_c0", "Dana SPP dibayarkan langsung ke universitas", {"page_number": 1})
+        store.add("p2_c0", "Living allowance di Jepang", {"page_number": 2})
+        version = store.flush()
+        
+        reopened = ContentStore(tmp_path / "store")
+        chunk = reopened.get("p2_c0")
+        
+        assert chunk["content"] == "Living allowance di Jepang"
+        assert chunk["metadata"]["page_number"] == 2
+        assert reopened.get("missing") is None
+        assert reopened.version == version
+        assert len(reopened) == 2
+    
+    def test_readd_points_to_newest_content(self, tmp_path):
+        """Test that re-adding a chunk id appends and replaces the old entry"""
+        from src.rag.content_store import ContentStore
+        
+        store = ContentStore(tmp_path / "store")
+        store.add("p1_c0", "lama")
+        first_version = store.flush()
+        assert store.get("p1_c0")["content"] == "lama"
+        
+        store.add("p1_c0", "baru ✓")
+        
+        assert store.get("p1_c0")["content"] == "baru ✓"
+        assert store.flush() != first_version
+    
+    def test_content_store_only_requires_store(self, tmp_path):
+        """Test that a missing store fails loudly when chunk text is not in vector metadata"""
+        from src.rag.vector_store import load_content_store
+        
+        with patch.dict('os.environ', {'CONTENT_STORE_PATH': str(tmp_path / "missing")}):
+            assert load_content_store() is None
+            with patch.dict('os.environ', {'CONTENT_STORE_ONLY': 'true'}):
+                with pytest.raises(RuntimeError, match="CONTENT_STORE_ONLY"):
+                    load_content_store()
+
+
+class TestBM25Index:
+    """Tests for BM25Index class"""
+    
+    def _build_index(self):
+        from src.rag.bm25_index import BM25Index
+        
+        index = BM25Index()
+        index.build([
+            ("spp", "Dana SPP dibayarkan langsung ke rekening universitas", {"section": "Dana SPP"}),
+            ("loa", "Unggah LoA unconditional sebelum pencairan dana", {"section": ""}),
+            ("riset", "Dana penelitian maksimal Rp 25.000.000 per awardee", {"section": "Dana Bantuan Penelitian"}),
+        ])
+        return index
+    
+    def test_tokenize_normalizes_amounts(self):
+        """Test that tokens are lowercased and thousands separators removed"""
+        from src.rag.bm25_index import tokenize
+        
+        assert tokenize("Berapa dana SPP? Rp 25.000.000") == ["dana", "spp", "rp", "25000000"]
+    
+    def test_search_ranks_exact_terms(self):
+        """Test that exact terms like SPP and LoA find their chunks"""
+        index = self._build_index()
+        
+        assert index.search("kapan LoA diunggah?")[0][0] == "loa"
+        assert index.search("dana SPP")[0][0] == "spp"
+        assert index.search("25.000.000")[0][0] == "riset"
+        assert index.search("visa") == []
+    
+    def test_search_applies_filter_and_persists(self, tmp_path):
+        """Test metadata filters and a save/load roundtrip"""
+        from src.rag.bm25_index import BM25Index
+        
+        index = self._build_index()
+        index.save(tmp_path / "bm25")
+        loaded = BM25Index.load(tmp_path / "bm25")
+        
+        results = loaded.search("dana", filter={"section": "Dana Bantuan Penelitian"})
+        
+        assert [chunk_id for chunk_id, _ in results] == ["riset"]
+        assert loaded.search("dana SPP") == index.search("dana SPP")
+
+
+class TestPineconeClient:
+    """Tests for PineconeClient class"""
+    
+    def _vectors(self, count):
+        return [
+            {"id": f"chunk_{i}", "values": [0.1] * 8, "metadata": {"content": "x" * 200}}
+            for i in range(count)
+        ]
+    
+    @patch('src.rag.pinecone_client.Pinecone')
+    def test_upsert_batches_by_serialized_size(self, mock_pinecone):
+        """Test that batches are bounded by payload size rather than count"""
+        from src.rag.pinecone_client import PineconeClient
+        
+        mock_index = MagicMock()
+        mock_pinecone.return_value.Index.return_value = mock_index
+        
+        client = PineconeClient(api_key="test_key", max_batch_bytes=1000)
+        result = client.upsert_vectors(self._vectors(10))
+        
+        sent = [c.kwargs["vectors"] for c in mock_index.upsert.call_args_list]
+        assert result["batches"] == len(sent) > 1
+        assert sorted(v["id"] for batch in sent for v in batch) == sorted(
+            v["id"] for v in self._vectors(10)
+        )
+        assert all(r["bytes"] <= 1000 for r in result["results"])
+        assert result["upserted_vectors"] == 10
+    
+    @patch('src.rag.pinecone_client.time.sleep')
+    @patch('src.rag.pinecone_client.Pinecone')
+    def test_upsert_retries_and_reports_failures(self, mock_pinecone, mock_sleep):
+        """Test that transient errors are retried and persistent ones reported per batch"""
+        from src.rag.pinecone_client import PineconeClient
+        
+        attempts = {}
+        
+        def flaky_upsert(vectors, namespace):
+            first_id = vectors[0]["id"]
+            attempts[first_id] = attempts.get(first_id, 0) + 1
+            if first_id == "chunk_0" and attempts[first_id] == 1:
+                raise ConnectionError("transient")
+            if first_id == "chunk_1":
+                raise ConnectionError("down")
+        
+        mock_index = MagicMock()
+        mock_index.upsert.side_effect = flaky_upsert
+        mock_pinecone.return_value.Index.return_value = mock_index
+        
+        client = PineconeClient(api_key="test_key", max_batch_bytes=500, max_retries=2)
+        result = client.upsert_vectors(self._vectors(3))
+        
+        by_batch = {r["batch"]: r for r in result["results"]}
+        assert by_batch[0]["status"] == "ok" and by_batch[0]["attempts"] == 2
+        assert by_batch[1]["status"] == "failed" and by_batch[1]["attempts"] == 3
+        assert by_batch[2]["status"] == "ok"
+        assert result["failed_batches"] == 1
+        assert result["upserted_vectors"] == 2
+    
+    @patch('src.rag.pinecone_client.time.sleep')
+    @patch('src.rag.pinecone_client.Pinecone')
+    def test_upsert_raises_non_retryable_errors_at_once(self, mock_pinecone, mock_sleep):
+        """Test that client errors are raised without retrying while 429/5xx are retried"""
+        from src.rag.pinecone_client import PineconeClient
+        
+        class ApiError(Exception):
+            def __init__(self, status_code):
+                super().__init__(f"HTTP {status_code}")
+                self.status_code = status_code
+        
+        mock_index = MagicMock()
+        mock_pinecone.return_value.Index.return_value = mock_index
+        client = PineconeClient(api_key="test_key", max_retries=3)
+        
+        mock_index.upsert.side_effect = ApiError(400)
+        with pytest.raises(ApiError):
+            client.upsert_vectors(self._vectors(1))
+        assert mock_index.upsert.call_count == 1
+        mock_sleep.assert_not_called()
+        
+        mock_index.upsert.reset_mock()
+        mock_index.upsert.side_effect = [ApiError(429), ApiError(503), None]
+        result = client.upsert_vectors(self._vectors(1))
+        assert result["results"][0]["attempts"] == 3 and result["failed_batches"] == 0
+
+
+class TestLocalVectorIndex:
+    """Tests for LocalVectorIndex class"""
+    
+    def _build_index(self):
+        from src.rag.local_index import LocalVectorIndex
+        
+        index = LocalVectorIndex(dimension=3)
+        index.upsert_vectors([
+            {"id": "spp", "values": [1.0, 0.0, 0.0],
+             "metadata": {"section": "Dana SPP", "page_number": 5}},
+            {"id": "visa", "values": [0.9, 0.1, 0.0],
+             "metadata": {"section": "Dana Aplikasi Visa", "page_number": 23}},
+            {"id": "hidup", "values": [0.0, 1.0, 0.0],
+             "metadata": {"section": "Dana Hidup Bulanan", "page_number": 54}},
+        ])
+        return index
+    
+    def test_query_returns_top_k_by_cosine(self):
+        """Test that matches are ranked by cosine similarity"""
+        index = self._build_index()
+        
+        results = index.query([2.0, 0.0, 0.0], top_k=2)
+        
+        assert [m["id"] for m in results["matches"]] == ["spp", "visa"]
+        assert results["matches"][0]["score"] == pytest.approx(1.0)
+        assert results["matches"][0]["metadata"]["page_number"] == 5
+    
+    def test_query_applies_metadata_filter(self):
+        """Test that Pinecone-style metadata filters restrict the matches"""
+        index = self._build_index()
+        
+        results = index.query(
+            [1.0, 0.0, 0.0],
+            top_k=5,
+            filter={"$or": [{"section": "Dana Hidup Bulanan"}, {"page_number": {"$gte": 20, "$lt": 30}}]},
+            include_metadata=False
+        )
+        
+        assert [m["id"] for m in results["matches"]] == ["visa", "hidup"]
+        assert "metadata" not in results["matches"][0]
+    
+    def test_upsert_replaces_existing_id(self):
+        """Test that upserting an existing id updates it in place"""
+        index = self._build_index()
+        
+        index.upsert_vectors([{"id": "spp", "values": [0.0, 0.0, 1.0], "metadata": {}}])
+        
+        assert index.describe_index_stats()["total_vector_count"] == 3
+        assert index.query([0.0, 0.0, 1.0], top_k=1)["matches"][0]["id"] == "spp"
+    
+    def test_section_filter_uses_metadata_index(self):
+        """Test that section filters are answered from the metadata index and follow upserts"""
+        index = self._build_index()
+        
+        with patch('src.rag.local_index.matches_filter') as mock_matches:
+            results = index.query(
+                [1.0, 0.0, 0.0],
+                top_k=5,
+                filter={"section": {"$in": ["Dana SPP", "Dana Hidup Bulanan"]}}
+            )
+        
+        assert [m["id"] for m in results["matches"]] == ["spp", "hidup"]
+        mock_matches.assert_not_called()
+        
+        index.upsert_vectors([{"id": "spp", "values": [1.0, 0.0, 0.0], "metadata": {"section": "Dana Buku"}}])
+        
+        assert index.query([1.0, 0.0, 0.0], filter={"section": "Dana SPP"})["matches"] == []
+        assert index.query(
+            [1.0, 0.0, 0.0],
+            filter={"section": "Dana Buku", "page_number": {"$exists": False}}
+        )["matches"][0]["id"] == "spp"
+    
+    def test_save_and_load_roundtrip(self, tmp_path):
+        """Test that a saved index loads with the same contents"""
+        from src.rag.local_index import LocalVectorIndex
+        
+        index = self._build_index()
+        index.save(tmp_path / "index")
+        
+        loaded = LocalVectorIndex.load(tmp_path / "index")
+        
+        assert loaded.describe_index_stats()["total_vector_count"] == 3
+        assert loaded.query([0.0, 1.0, 0.0], top_k=1)["matches"][0]["id"] == "hidup"
+    
+    def test_delete_all(self):
+        """Test that delete_all empties the namespace"""
+        index = self._build_index()
+        
+        index.delete_all()
+        
+        assert index.query([1.0, 0.0, 0.0])["matches"] == []
+        assert index.describe_index_stats()["total_vector_count"] == 0
+
+
+class TestIVFVectorIndex:
+    """Tests for IVFVectorIndex class"""
+    
+    def _vectors(self, count=400, dimension=16):
+        import numpy as np
+        
+        rng = np.random.default_rng(0)
+        data = rng.standard_normal((count, dimension)).astype("float32")
+        return data, [
+            {"id": f"v{i}", "values": row.tolist(), "metadata": {"page_number": i % 10}}
+            for i, row in enumerate(data)
+        ]
+    
+    def test_full_probe_matches_brute_force(self):
+        """Test that probing every list returns the exact brute-force results"""
+        from src.rag.local_index import LocalVectorIndex
+        from src.rag.ivf_index import IVFVectorIndex
+        
+        data, vectors = self._vectors()
+        brute = LocalVectorIndex(dimension=16)
+        brute.upsert_vectors(vectors)
+        ivf = IVFVectorIndex(dimension=16)
+        ivf.upsert_vectors(vectors)
+        
+        build = ivf.build(n_lists=8)
+        ivf.n_probe = 8
+        
+        assert build["n_lists"] == 8
+        for query in data[:5]:
+            expected = [m["id"] for m in brute.query(query.tolist(), top_k=5)["matches"]]
+            actual = [m["id"] for m in ivf.query(query.tolist(), top_k=5)["matches"]]
+            assert actual == expected
+    
+    def test_vectors_added_after_build_are_searchable(self):
+        """Test that upserts after build() are found before the next rebuild"""
+        from src.rag.ivf_index import IVFVectorIndex
+        
+        _, vectors = self._vectors()
+        ivf = IVFVectorIndex(dimension=16, n_probe=1)
+        ivf.upsert_vectors(vectors)
+        ivf.build(n_lists=8)
+        
+        ivf.upsert_vectors([{"id": "new", "values": [10.0] * 16, "metadata": {}}])
+        
+        assert ivf.query([1.0] * 16, top_k=1)["matches"][0]["id"] == "new"
+    
+    def test_mmap_load_roundtrip_with_filter(self, tmp_path):
+        """Test that a saved IVF index loads via mmap and still applies filters"""
+        from src.rag.ivf_index import IVFVectorIndex
+        
+        data, vectors = self._vectors()
+        ivf = IVFVectorIndex(dimension=16, n_probe=8)
+        ivf.upsert_vectors(vectors)
+        ivf.build(n_lists=8)
+        ivf.save(tmp_path / "ivf")
+        
+        loaded = IVFVectorIndex.load(tmp_path / "ivf", mmap=True)
+        loaded.n_probe = 8
+        results = loaded.query(data[3].tolist(), top_k=3, filter={"page_number": 3})
+        
+        assert results["matches"][0]["id"] == "v3"
+        assert all(m["metadata"]["page_number"] == 3 for m in results["matches"])
+        assert loaded.describe_index_stats()["namespaces"][""]["ivf_lists"] == 8
+    
+    def test_filtered_query_is_not_limited_to_probed_lists(self):
+        """Test that a selective filter still returns top_k hits with a single probe"""
+        from src.rag.local_index import LocalVectorIndex
+        from src.rag.ivf_index import IVFVectorIndex
+        
+        data, vectors = self._vectors()
+        brute = LocalVectorIndex(dimension=16)
+        brute.upsert_vectors(vectors)
+        ivf = IVFVectorIndex(dimension=16, n_probe=1)
+        ivf.upsert_vectors(vectors)
+        ivf.build(n_lists=8)
+        
+        for query in data[:5]:
+            expected = brute.query(query.tolist(), top_k=5, filter={"page_number": 7})["matches"]
+            actual = ivf.query(query.tolist(), top_k=5, filter={"page_number": 7})["matches"]
+            assert [m["id"] for m in actual] == [m["id"] for m in expected]
+            assert len(actual) == 5
+
+
+class TestSemanticAnswerCache:
+    """Tests for SemanticAnswerCache class"""
+    
+    def test_hit_requires_similarity_and_same_chunks(self):
+        """Test that answers are reused only for similar questions over the same chunks"""
+        from src.rag.answer_cache import SemanticAnswerCache
+        
+        cache = SemanticAnswerCache(threshold=0.95)
+        cache.put([1.0, 0.0], ["c1", "c2"], "Jawaban SPP")
+        
+        assert cache.get([0.99, 0.05], ["c1", "c2"]) == "Jawaban SPP"
+        assert cache.get([0.99, 0.05], ["c1", "c3"]) is None
+        assert cache.get([0.5, 0.5], ["c1", "c2"]) is None
+        assert cache.stats()["hits"] == 1
+    
+    def test_version_change_invalidates(self):
+        """Test that a new index version clears cached answers"""
+        from src.rag.answer_cache import SemanticAnswerCache
+        
+        cache = SemanticAnswerCache()
+        cache.put([1.0, 0.0], ["c1"], "lama", version="v1")
+        
+        assert cache.get([1.0, 0.0], ["c1"], version="v2") is None
+        assert len(cache) == 0
+    
+    def test_evicts_least_recently_used(self):
+        """Test that the cache is bounded by max_entries"""
+        from src.rag.answer_cache import SemanticAnswerCache
+        
+        cache = SemanticAnswerCache(max_entries=2)
+        cache.put([1.0, 0.0], ["a"], "A")
+        cache.put([1.0, 0.0], ["b"], "B")
+        cache.get([1.0, 0.0], ["a"])
+        cache.put([1.0, 0.0], ["c"], "C")
+        
+        assert cache.get([1.0, 0.0], ["b"]) is None
+        assert cache.get([1.0, 0.0], ["a"]) == "A"
+        assert len(cache) == 2
+
+
+class TestResponseCache:
+    """Tests for ResponseCache class"""
+    
+    def test_roundtrip_persists_across_instances(self, tmp_path):
+        """Test that cached responses survive reopening the cache file"""
+        from src.rag.response_cache import ResponseCache
+        
+        path = tmp_path / "responses.sqlite"
+        key = ResponseCache.make_key("model", {"temperature": 0.3}, "prompt")
+        
+        cache = ResponseCache(path)
+        cache.put(key, "Jawaban")
+        cache.close()
+        
+        reopened = ResponseCache(path)
+        assert reopened.get(key) == "Jawaban"
+        assert reopened.get("missing") is None
+    
+    def test_key_depends_on_generation_config(self):
+        """Test that the same prompt with different settings gets distinct keys"""
+        from src.rag.response_cache import ResponseCache
+        
+        cold = ResponseCache.make_key("model", {"temperature": 0.0}, "prompt")
+        warm = ResponseCache.make_key("model", {"temperature": 0.7}, "prompt")
+        
+        assert cold != warm
+    
+    def test_expired_responses_are_misses(self, tmp_path):
+        """Test that responses older than the TTL are not served"""
+        from src.rag.response_cache import ResponseCache
+        
+        cache = ResponseCache(tmp_path / "responses.sqlite", ttl_seconds=60)
+        
+        with patch('src.rag.response_cache.time.time', return_value=1000.0):
+            cache.put("a", "old")
+        with patch('src.rag.response_cache.time.time', return_value=1030.0):
+            assert cache.get("a") == "old"
+        with patch('src.rag.response_cache.time.time', return_value=1061.0):
+            assert cache.get("a") is None
+        
+        assert len(cache) == 0
+    
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Test that size-based eviction drops the least recently used responses"""
+        from src.rag.response_cache import ResponseCache
+        
+        cache = ResponseCache(tmp_path / "responses.sqlite", ttl_seconds=None, max_bytes=8)
+        
+        with patch('src.rag.response_cache.time.time', side_effect=[1.0, 2.0, 3.0, 4.0]):
+            cache.put("a", "aaaa")
+            cache.put("b", "bbbb")
+            cache.get("a")
+            cache.put("c", "cccc")
+        
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == "aaaa"
+
+
+class TestTokenBucketRateLimiter:
+    """Tests for TokenBucketRateLimiter class"""
+    
+    def test_burst_then_wait(self):
+        """Test that a full bucket allows a burst and then reports the refill delay"""
+        from src.rag.rate_limiter import TokenBucketRateLimiter
+        
+        limiter = TokenBucketRateLimiter(requests_per_minute=60, burst=2)
+        
+        with patch('src.rag.rate_limiter.time.time', return_value=100.0):
+            assert limiter.try_acquire() == 0.0
+            assert limiter.try_acquire() == 0.0
+            assert limiter.try_acquire() == pytest.approx(1.0)
+        with patch('src.rag.rate_limiter.time.time', return_value=101.0):
+            assert limiter.try_acquire() == 0.0
+    
+    def test_state_is_shared_through_file(self, tmp_path):
+        """Test that limiters backed by the same state file draw from one bucket"""
+        from src.rag.rate_limiter import TokenBucketRateLimiter
+        
+        path = tmp_path / "limits.sqlite"
+        first = TokenBucketRateLimiter(requests_per_minute=1, state_path=path)
+        second = TokenBucketRateLimiter(requests_per_minute=1, state_path=path)
+        
+        assert first.try_acquire() == 0.0
+        assert second.try_acquire() > 0.0
+    
+    async def test_async_shared_state_runs_off_event_loop(self, tmp_path):
+        """Test that the SQLite step of acquire_async runs in a worker thread"""
+        import asyncio
+        from src.rag.rate_limiter import TokenBucketRateLimiter
+        
+        limiter = TokenBucketRateLimiter(requests_per_minute=60, state_path=tmp_path / "limits.sqlite")
+        
+        with patch('src.rag.rate_limiter.asyncio.to_thread', wraps=asyncio.to_thread) as mock_to_thread:
+            await limiter.acquire_async()
+        
+        mock_to_thread.assert_awaited_once_with(limiter.try_acquire)
+    
+    async def test_async_waiters_served_by_priority(self):
+        """Test that queued callers are served lowest priority value first"""
+        import asyncio
+        from src.rag.rate_limiter import TokenBucketRateLimiter
+        
+        limiter = TokenBucketRateLimiter(requests_per_minute=600)
+        limiter.try_acquire()
+        order = []
+        
+        async def call(name, priority):
+            await limiter.acquire_async(priority)
+            order.append(name)
+        
+        background = asyncio.create_task(call("background", 5))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(call("interactive", 0))
+        await asyncio.sleep(0)
+        
+        assert limiter.queue_depth == 2
+        await asyncio.gather(background, interactive)
+        
+        assert order == ["interactive", "background"]
+        assert limiter.stats()["acquired"] == 2
+        assert limiter.stats()["max_wait_seconds"] > 0
 
 
 class TestGeminiClient:
@@ -64,12 +708,565 @@ class TestGeminiClient:
         
         with patch.dict('os.environ', {'GOOGLE_API_KEY': 'test_key'}):
             client = GeminiClient()
-            result = client.generate_response(
-                query="Test question",
-                context="Test context"
+            result = client.generate_response(
+                query="Test question",
+                context="Test context"
+            )
+        
+        assert result == "Test response"
+    
+    @patch('src.rag.gemini_client.genai')
+    def test_cached_prompts_skip_generation(self, mock_genai, tmp_path):
+        """Test that repeated prompts are served from the response cache"""
+        from src.rag.gemini_client import GeminiClient
+        from src.rag.response_cache import ResponseCache
+        
+        mock_model = MagicMock()
+        mock_model.generate_content.return_value = MagicMock(text="Ringkasan")
+        mock_genai.GenerativeModel.return_value = mock_model
+        
+        with patch.dict('os.environ', {'GOOGLE_API_KEY': 'test_key'}):
+            client = GeminiClient(cache=ResponseCache(tmp_path / "responses.sqlite"))
+            client._wait_for_rate_limit = Mock()
+            chunks = ["Dana SPP dibayarkan langsung ke universitas."] * 3
+            first = client.summarize_chunks(chunks, max_length=50)
+            second = client.summarize_chunks(chunks, max_length=50)
+            answer = client.generate_response(query="Q", context="C")
+            again = client.generate_response(query="Q", context="C")
+        
+        assert first == second == answer == again == "Ringkasan"
+        assert mock_model.generate_content.call_count == 2
+        assert client._wait_for_rate_limit.call_count == 2
+    
+    @patch('src.rag.gemini_client.genai')
+    async def test_generate_batch_parses_json_answers(self, mock_genai):
+        """Test that batch generation parses a fenced JSON array into ordered answers"""
+        from unittest.mock import AsyncMock
+        from src.rag.gemini_client import GeminiClient
+        
+        mock_model = MagicMock()
+        mock_model.generate_content_async = AsyncMock(
+            return_value=MagicMock(text='```json\n["Jawaban satu", "Jawaban dua"]\n```')
+        )
+        mock_genai.GenerativeModel.return_value = mock_model
+        
+        with patch.dict('os.environ', {'GOOGLE_API_KEY': 'test_key'}):
+            client = GeminiClient(max_output_tokens=100, rate_limiter=Mock(acquire_async=AsyncMock()))
+            answers = await client.agenerate_batch([("Q1", "C1"), ("Q2", "C2")])
+        
+        assert answers == ["Jawaban satu", "Jawaban dua"]
+        prompt = mock_model.generate_content_async.call_args.args[0]
+        assert "### PERTANYAAN 2" in prompt and "C2" in prompt
+        assert mock_model.generate_content_async.call_args.kwargs["generation_config"] == {"max_output_tokens": 200}
+        client.rate_limiter.acquire_async.assert_awaited_once_with(GeminiClient.BATCH_PRIORITY)
+        
+        with pytest.raises(ValueError):
+            GeminiClient._parse_batch_answers('["hanya satu"]', 2)
+        
+        with patch.dict('os.environ', {'GOOGLE_API_KEY': 'test_key'}):
+            client = GeminiClient(max_output_tokens=4096, rate_limiter=Mock(acquire_async=AsyncMock()))
+            mock_model.generate_content_async.return_value = MagicMock(text='["a", "b", "c"]')
+            await client.agenerate_batch([("Q1", "C1"), ("Q2", "C2"), ("Q3", "C3")])
+        
+        config = mock_model.generate_content_async.call_args.kwargs["generation_config"]
+        assert config == {"max_output_tokens": GeminiClient.MAX_OUTPUT_TOKENS}
+    
+    @patch('src.rag.gemini_client.genai')
+    async def test_generate_response_stream_yields_pieces(self, mock_genai, tmp_path):
+        """Test that streamed pieces are yielded as they arrive and cached as a whole"""
+        from unittest.mock import AsyncMock
+        from src.rag.gemini_client import GeminiClient
+        from src.rag.response_cache import ResponseCache
+        
+        async def chunks():
+            for text in ["Dana SPP ", "dibayarkan ", "per semester."]:
+                yield MagicMock(text=text)
+        
+        mock_model = MagicMock()
+        mock_model.generate_content_async = AsyncMock(side_effect=lambda prompt, stream: chunks())
+        mock_genai.GenerativeModel.return_value = mock_model
+        
+        with patch.dict('os.environ', {'GOOGLE_API_KEY': 'test_key'}):
+            client = GeminiClient(
+                cache=ResponseCache(tmp_path / "responses.sqlite"),
+                rate_limiter=Mock(acquire_async=AsyncMock())
+            )
+            pieces = [piece async for piece in client.agenerate_response_stream("Q", "C")]
+            replay = [piece async for piece in client.agenerate_response_stream("Q", "C")]
+        
+        assert pieces == ["Dana SPP ", "dibayarkan ", "per semester."]
+        assert replay == ["Dana SPP dibayarkan per semester."]
+        assert mock_model.generate_content_async.await_count == 1
+
+
+class TestSingleFlight:
+    """Tests for SingleFlight and AsyncSingleFlight classes"""
+    
+    def test_concurrent_threads_share_one_call(self):
+        """Test that threads asking for the same key wait for the leader's result"""
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from src.rag.single_flight import SingleFlight
+        
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return "jawaban"
+        
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            leader = pool.submit(flight.do, "key", compute)
+            started.wait()
+            followers = [pool.submit(flight.do, "key", compute) for _ in range(2)]
+            while flight.shared < 2:
+                pass
+            release.set()
+            results = [leader.result()] + [f.result() for f in followers]
+        
+        assert results == ["jawaban"] * 3
+        assert len(calls) == 1
+    
+    def test_errors_propagate_and_are_not_cached(self):
+        """Test that a failed call raises for its caller and the next call runs again"""
+        from src.rag.single_flight import SingleFlight
+        
+        flight = SingleFlight()
+        
+        def fail():
+            raise RuntimeError("quota")
+        
+        with pytest.raises(RuntimeError):
+            flight.do("key", fail)
+        assert flight.do("key", lambda: "ok") == "ok"
+    
+    async def test_async_waiters_share_one_task(self):
+        """Test that concurrent awaits of the same key run the coroutine once"""
+        import asyncio
+        from src.rag.single_flight import AsyncSingleFlight
+        
+        flight = AsyncSingleFlight()
+        calls = []
+        
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "jawaban"
+        
+        results = await asyncio.gather(*(flight.do("key", compute) for _ in range(3)))
+        
+        assert results == ["jawaban"] * 3
+        assert len(calls) == 1
+        assert flight.shared == 2
+
+
+class TestBatchingGenerator:
+    """Tests for BatchingGenerator class"""
+    
+    async def test_concurrent_questions_share_one_request(self):
+        """Test that questions arriving together are answered by one batch request"""
+        import asyncio
+        from unittest.mock import AsyncMock
+        from src.rag.batch_generator import BatchingGenerator
+        
+        mock_gemini = Mock()
+        mock_gemini.agenerate_batch = AsyncMock(
+            side_effect=lambda items: [f"Jawaban {question}" for question, _ in items]
+        )
+        batcher = BatchingGenerator(mock_gemini, max_batch_size=3, max_wait=1.0)
+        
+        answers = await asyncio.gather(*(batcher.generate(f"Q{i}", f"C{i}") for i in range(3)))
+        
+        assert answers == ["Jawaban Q0", "Jawaban Q1", "Jawaban Q2"]
+        mock_gemini.agenerate_batch.assert_awaited_once_with([("Q0", "C0"), ("Q1", "C1"), ("Q2", "C2")])
+        assert batcher.stats()["avg_batch_size"] == 3
+    
+    async def test_lone_question_sent_without_waiting(self):
+        """Test that a single question on an idle batcher is sent at once, not after the window"""
+        import asyncio
+        from unittest.mock import AsyncMock
+        from src.rag.batch_generator import BatchingGenerator
+        
+        mock_gemini = Mock()
+        mock_gemini.agenerate_response = AsyncMock(return_value="Jawaban")
+        batcher = BatchingGenerator(mock_gemini, max_batch_size=4, max_wait=60.0)
+        
+        assert await asyncio.wait_for(batcher.generate("Q", "C"), timeout=1.0) == "Jawaban"
+        mock_gemini.agenerate_response.assert_awaited_once_with("Q", "C")
+        mock_gemini.agenerate_batch.assert_not_called()
+    
+    async def test_falls_back_to_individual_requests(self):
+        """Test that unparseable batch output falls back to one request per question"""
+        import asyncio
+        from unittest.mock import AsyncMock
+        from src.rag.batch_generator import BatchingGenerator
+        
+        mock_gemini = Mock()
+        mock_gemini.agenerate_batch = AsyncMock(side_effect=ValueError("not JSON"))
+        mock_gemini.agenerate_response = AsyncMock(side_effect=lambda question, context: f"Jawaban {question}")
+        batcher = BatchingGenerator(mock_gemini, max_batch_size=2, max_wait=1.0)
+        
+        answers = await asyncio.gather(batcher.generate("Q1", "C1"), batcher.generate("Q2", "C2"))
+        
+        assert answers == ["Jawaban Q1", "Jawaban Q2"]
+        assert batcher.stats()["fallbacks"] == 1
+
+
+class TestContextPacker:
+    """Tests for ContextPacker class"""
+    
+    @staticmethod
+    def _chunk(chunk_id, content, score, page=1, index=None):
+        metadata = {"source": "panduan.pdf", "page_number": page, "section": "Dana SPP"}
+        if index is not None:
+            metadata["chunk_index"] = index
+        return {"id": chunk_id, "score": score, "content": content, "metadata": metadata}
+    
+    def test_merges_overlapping_chunks_from_same_page(self):
+        """Test that chunk overlap is emitted once and spans keep the best score"""
+        from src.rag.context_packer import ContextPacker
+        
+        first = "Dana SPP dibayarkan langsung ke rekening perguruan tinggi tujuan studi."
+        second = "ke rekening perguruan tinggi tujuan studi. Pengajuan dilakukan setiap semester."
+        chunks = [
+            self._chunk("c2", second, 0.9, index=2),
+            self._chunk("c1", first, 0.7, index=1),
+            self._chunk("other", "Dana transportasi untuk keberangkatan awardee.", 0.8, page=3, index=0),
+        ]
+        
+        packed = ContextPacker().pack(chunks)
+        
+        assert [span["ids"] for span in packed] == [["c1", "c2"], ["other"]]
+        assert packed[0]["content"] == (
+            "Dana SPP dibayarkan langsung ke rekening perguruan tinggi tujuan studi."
+            " Pengajuan dilakukan setiap semester."
+        )
+        assert packed[0]["score"] == 0.9
+    
+    def test_joins_adjacent_chunks_without_overlap(self):
+        """Test that consecutive chunk indexes on one page form a single span"""
+        from src.rag.context_packer import ContextPacker
+        
+        chunks = [
+            self._chunk("c0", "Bagian pertama.", 0.8, index=0),
+            self._chunk("c1", "Bagian kedua.", 0.6, index=1),
+            self._chunk("c3", "Bagian keempat.", 0.5, index=3),
+        ]
+        
+        packed = ContextPacker().pack(chunks)
+        
+        assert [span["ids"] for span in packed] == [["c0", "c1"], ["c3"]]
+        assert packed[0]["content"] == "Bagian pertama.\nBagian kedua."
+    
+    def test_drops_near_duplicates_and_enforces_budget(self):
+        """Test that repeated text is dropped and spans beyond the budget are skipped"""
+        from src.rag.context_packer import ContextPacker
+        
+        text = "Living allowance Tokyo JPY 195000 per bulan untuk awardee"
+        chunks = [
+            self._chunk("a", text, 0.9, page=1),
+            self._chunk("b", text + " LPDP", 0.8, page=2),
+            self._chunk("c", "x" * 400, 0.7, page=3),
+            self._chunk("d", "Dana kedatangan", 0.6, page=4),
+        ]
+        
+        packed = ContextPacker(max_tokens=30).pack(chunks)
+        
+        assert [span["id"] for span in packed] == ["a", "d"]
+
+
+class TestContextCompressor:
+    """Tests for ContextCompressor class"""
+    
+    def test_split_sentences_keeps_amounts_intact(self):
+        """Test that thousands separators and abbreviations do not end sentences"""
+        from src.rag.context_compressor import split_sentences
+        
+        text = "Dana penelitian maksimal Rp 25.000.000 per awardee. Pengajuan melalui SIMONEV.\n- Invoice"
+        
+        assert split_sentences(text) == [
+            "Dana penelitian maksimal Rp 25.000.000 per awardee.",
+            "Pengajuan melalui SIMONEV.",
+            "- Invoice",
+        ]
+    
+    def test_keeps_most_relevant_sentences_in_order(self):
+        """Test that compression keeps query-relevant sentences within the target size"""
+        from src.rag.context_compressor import ContextCompressor
+        
+        chunks = [
+            {"id": "a", "score": 0.9, "content": (
+                "Awardee wajib melapor setiap semester. "
+                "Dana transportasi diajukan paling lambat 30 hari setelah tiba. "
+                "Laporan akademik diunggah ke SIMONEV."
+            )},
+            {"id": "b", "score": 0.8, "content": "Asuransi kesehatan dibayarkan per tahun."},
+            {"id": "c", "score": 0.7, "content": "Tiket pesawat dana transportasi kelas ekonomi."},
+        ]
+        
+        compressed = ContextCompressor(max_chars=120).compress("batas dana transportasi", chunks)
+        
+        assert [chunk["id"] for chunk in compressed] == ["a", "c"]
+        assert compressed[0]["content"] == "Dana transportasi diajukan paling lambat 30 hari setelah tiba."
+        assert sum(len(chunk["content"]) for chunk in compressed) <= 120
+    
+    def test_short_context_is_unchanged(self):
+        """Test that context already within the target size is not compressed"""
+        from src.rag.context_compressor import ContextCompressor
+        
+        chunks = [{"id": "a", "score": 0.9, "content": "Satu. Dua."}]
+        
+        assert ContextCompressor(max_chars=100).compress("tiga", chunks) is chunks
+    
+    @patch('src.rag.gemini_client.genai')
+    def test_summarize_chunks_with_query_skips_gemini(self, mock_genai):
+        """Test that query-aware summarization is extractive and makes no API call"""
+        from src.rag.gemini_client import GeminiClient
+        
+        mock_model = MagicMock()
+        mock_genai.GenerativeModel.return_value = mock_model
+        
+        with patch.dict('os.environ', {'GOOGLE_API_KEY': 'test_key'}):
+            client = GeminiClient()
+            summary = client.summarize_chunks(
+                ["Dana SPP dibayarkan per semester. Cuti akademik tidak dibiayai.",
+                 "Dana hidup dibayarkan bulanan."],
+                max_length=50,
+                query="kapan dana SPP dibayarkan"
             )
         
-        assert result == "Test response"
+        assert summary == "Dana SPP dibayarkan per semester."
+        mock_model.generate_content.assert_not_called()
+
+
+class TestAdaptiveSelector:
+    """Tests for AdaptiveSelector class"""
+    
+    def test_cutoff_at_threshold_and_gap(self):
+        """Test that matches are cut at a large score gap or below the relative threshold"""
+        import numpy as np
+        from src.rag.adaptive_selector import AdaptiveSelector
+        
+        selector = AdaptiveSelector(relative_score=0.8, max_gap=0.1, min_k=1)
+        
+        assert selector.cutoff(np.array([0.82, 0.80, 0.62, 0.61])) == 2
+        assert selector.cutoff(np.array([0.90, 0.85, 0.80, 0.75])) == 4
+        assert selector.cutoff(np.array([0.90, 0.85, 0.78, 0.70])) == 3
+        assert selector.cutoff(np.array([0.90, 0.60])) == 1
+        assert AdaptiveSelector(min_k=2).cutoff(np.array([0.90, 0.20])) == 2
+    
+    def test_mmr_skips_near_duplicates(self):
+        """Test that MMR prefers a diverse match over a near-copy of the best one"""
+        from src.rag.adaptive_selector import AdaptiveSelector
+        
+        matches = [
+            {"id": "best", "score": 0.90, "values": [1.0, 0.0, 0.0]},
+            {"id": "copy", "score": 0.89, "values": [0.99, -0.05, 0.0]},
+            {"id": "other", "score": 0.88, "values": [0.6, 0.8, 0.0]},
+        ]
+        
+        selected = AdaptiveSelector(mmr_lambda=0.5).select(matches, [0.9, 0.4, 0.0], max_k=2)
+        
+        assert [match["id"] for match in selected] == ["best", "other"]
+    
+    def test_adaptive_retrieval_with_local_index(self):
+        """Test that adaptive retrieval over-fetches with values and returns a small set"""
+        from src.rag.retriever import RAGRetriever
+        from src.rag.local_index import LocalVectorIndex
+        
+        index = LocalVectorIndex(dimension=3)
+        index.upsert_vectors([
+            {"id": "spp", "values": [1.0, 0.0, 0.0], "metadata": {"content": "Dana SPP"}},
+            {"id": "spp_copy", "values": [0.99, -0.05, 0.0], "metadata": {"content": "Dana SPP (salinan)"}},
+            {"id": "semester", "values": [0.7, 0.7, 0.0], "metadata": {"content": "Per semester"}},
+            {"id": "visa", "values": [0.0, 0.0, 1.0], "metadata": {"content": "Dana visa"}},
+        ])
+        
+        mock_embeddings = Mock()
+        mock_embeddings.embed_query.return_value = [0.95, 0.3, 0.0]
+        
+        retriever = RAGRetriever(
+            embeddings=mock_embeddings,
+            pinecone_client=index,
+            gemini_client=Mock()
+        )
+        
+        fixed = retriever.retrieve("dana SPP", top_k=2)
+        adaptive = retriever.retrieve("dana SPP", top_k=2, adaptive=True)
+        
+        assert [chunk["id"] for chunk in fixed] == ["spp", "spp_copy"]
+        assert [chunk["id"] for chunk in adaptive] == ["spp", "semester"]
+    
+    def test_adaptive_retrieval_uses_locally_stored_vectors(self, tmp_path):
+        """Test that remote matches are diversified with content store vectors, not fetched values"""
+        from src.rag.retriever import RAGRetriever
+        from src.rag.content_store import ContentStore
+        
+        store = ContentStore(tmp_path / "store")
+        store.add_many([
+            ("spp", "Dana SPP", {}),
+            ("spp_copy", "Dana SPP (salinan)", {}),
+            ("semester", "Per semester", {}),
+        ])
+        store.save_vectors({
+            "spp": [1.0, 0.0, 0.0],
+            "spp_copy": [0.99, -0.05, 0.0],
+            "semester": [0.7, 0.7, 0.0],
+        })
+        store.flush()
+        
+        mock_pinecone = Mock()
+        mock_pinecone.query.return_value = {"matches": [
+            {"id": "spp", "score": 0.954},
+            {"id": "spp_copy", "score": 0.937},
+            {"id": "semester", "score": 0.887},
+        ]}
+        mock_embeddings = Mock()
+        mock_embeddings.embed_query.return_value = [0.95, 0.3, 0.0]
+        
+        retriever = RAGRetriever(
+            embeddings=mock_embeddings,
+            pinecone_client=mock_pinecone,
+            gemini_client=Mock(),
+            content_store=store
+        )
+        
+        adaptive = retriever.retrieve("dana SPP", top_k=2, adaptive=True)
+        
+        assert [chunk["id"] for chunk in adaptive] == ["spp", "semester"]
+        assert mock_pinecone.query.call_args.kwargs["include_values"] is False
+
+
+class TestSectionRouter:
+    """Tests for SectionRouter class"""
+    
+    def test_routes_names_synonyms_and_typos(self):
+        """Test that names, synonyms and misspellings map to canonical sections"""
+        from src.rag.section_router import SectionRouter
+        
+        router = SectionRouter()
+        
+        assert router.route("SPP") == (["Dana SPP"], 1.0)
+        assert router.route("uang kuliah") == (["Dana SPP"], 1.0)
+        assert router.route("dana penelitian")[0] == ["Dana Bantuan Penelitian"]
+        assert router.filter_for("asurnsi") == {"section": {"$eq": "Dana Asuransi Kesehatan"}}
+        assert router.filter_for("penelitian dan publikasi") == {
+            "section": {"$in": ["Dana Bantuan Penelitian", "Dana Bantuan Publikasi"]}
+        }
+    
+    def test_low_confidence_gives_no_filter(self):
+        """Test that ambiguous or unknown topics are not routed"""
+        from src.rag.section_router import SectionRouter
+        
+        router = SectionRouter()
+        
+        assert router.filter_for("tunjangan") is None
+        assert router.filter_for("xyz") is None
+        assert router.filter_for("") is None
+    
+    def test_routed_retrieval_filters_and_falls_back(self):
+        """Test that routed queries search the section only, or everything when it is empty"""
+        from src.rag.retriever import RAGRetriever
+        from src.rag.local_index import LocalVectorIndex
+        
+        index = LocalVectorIndex(dimension=2)
+        index.upsert_vectors([
+            {"id": "spp", "values": [0.6, 0.8], "metadata": {"content": "SPP", "section": "Dana SPP"}},
+            {"id": "visa", "values": [1.0, 0.0], "metadata": {"content": "Visa", "section": "Dana Aplikasi Visa"}},
+        ])
+        
+        mock_embeddings = Mock()
+        mock_embeddings.embed_query.return_value = [1.0, 0.0]
+        mock_gemini = Mock()
+        mock_gemini.generate_response.return_value = "Jawaban"
+        
+        retriever = RAGRetriever(
+            embeddings=mock_embeddings,
+            pinecone_client=index,
+            gemini_client=mock_gemini,
+            top_k=1
+        )
+        
+        routed = retriever.query("Jelaskan dana SPP", route="SPP")
+        fallback = retriever.query("Jelaskan dana lomba", route="kompetisi")
+        
+        assert [source["section"] for source in routed["sources"]] == ["Dana SPP"]
+        assert [source["section"] for source in fallback["sources"]] == ["Dana Aplikasi Visa"]
+
+
+class TestDeadlineIndex:
+    """Tests for DeadlineIndex class"""
+    
+    def test_build_and_lookup(self, tmp_path):
+        """Test that explicit and relative rules are extracted and looked up by fund type"""
+        from src.rag.deadline_index import DeadlineIndex
+        
+        chunks = [
+            ("c1", "Batas akhir pengajuan Dana Transportasi adalah 3 (tiga) bulan setelah "
+                   "tanggal keberangkatan. Tiket dibeli paling lambat 7 hari sebelum tanggal "
+                   "keberangkatan.", {"section": "Dana Transportasi", "page_number": 20}),
+            ("c2", "Batas akhir pengajuan Dana Ujian Keterampilan adalah 3 (tiga) bulan setelah "
+                   "ujian keterampilan selesai.", {"section": "Dana Pelatihan", "page_number": 40}),
+            ("c3", "Dana SPP dibayarkan langsung ke perguruan tinggi.",
+             {"section": "Dana SPP", "page_number": 10}),
+        ]
+        
+        index = DeadlineIndex.load(DeadlineIndex.build(chunks).save(tmp_path / "deadline.json"))
+        
+        transport = index.lookup("transportasi")
+        assert [rule["rule"] for rule in transport] == [
+            "3 (tiga) bulan setelah tanggal keberangkatan",
+            "Tiket dibeli paling lambat 7 hari sebelum tanggal keberangkatan",
+        ]
+        assert transport[0]["primary"] and transport[0]["page_number"] == 20
+        assert index.lookup("ujian keterampilan")[0]["subject"] == "Dana Ujian Keterampilan"
+        assert index.lookup("SPP") == []
+        assert index.lookup("xyz") == []
+    
+    def test_mid_sentence_mention_is_not_a_rule(self):
+        """Test that a "Tolok ukur batas akhir pengajuan ..." sentence is not indexed as the deadline"""
+        from src.rag.deadline_index import DeadlineIndex
+        
+        chunks = [
+            ("c1", "c. Dana Bantuan Penelitian Tesis/Disertasi tahap 1 diajukan selambat-lambatnya pada "
+                   "akhir durasi pembiayaan LPDP dan Penerima Beasiswa belum dinyatakan lulus studi. "
+                   "Dana Bantuan Penelitian Tesis/Disertasi tahap 2 diajukan selambat- lambatnya 3 bulan "
+                   "setelah dinyatakan lulus studi dan dibuktikan dengan laporan kelulusan yang telah "
+                   "disetujui LPDP. Tolok ukur batas akhir pengajuan pencairan Dana Bantuan Penelitian "
+                   "Tesis/Disertasi tahap 2 adalah tanggal kelulusan, bukan tanggal persetujuan laporan "
+                   "kelulusan dari LPDP. d. Dalam hal Penerima Beasiswa berada dalam masa pemeriksaan",
+             {"section": "Dana Bantuan Penelitian", "page_number": 14}),
+        ]
+        
+        rules = DeadlineIndex.build(chunks).lookup("penelitian")
+        
+        assert [(rule["subject"], rule["rule"]) for rule in rules if rule["primary"]] == [
+            ("Dana Bantuan Penelitian Tesis/Disertasi tahap 1",
+             "selambat-lambatnya pada akhir durasi pembiayaan LPDP dan Penerima Beasiswa belum "
+             "dinyatakan lulus studi"),
+            ("Dana Bantuan Penelitian Tesis/Disertasi tahap 2",
+             "selambat- lambatnya 3 bulan setelah dinyatakan lulus studi dan dibuktikan dengan "
+             "laporan kelulusan yang telah disetujui LPDP"),
+        ]
+        assert not any("tanggal kelulusan, bukan" in rule["rule"] for rule in rules)
+    
+    def test_long_rule_is_cut_at_clause_boundary(self):
+        """Test that rules over MAX_RULE_CHARS end at a clause instead of mid-word"""
+        from src.rag.deadline_index import DeadlineIndex
+        
+        index = DeadlineIndex()
+        index.MAX_RULE_CHARS = 60
+        
+        rule = index._trim(
+            "a. 4 (empat) bulan setelah sampai di negara tujuan, dan b. 4 (empat) bulan "
+            "setelah dinyatakan lulus sebagaimana dimaksud"
+        )
+        
+        assert rule == "a. 4 (empat) bulan setelah sampai di negara tujuan, dan"
 
 
 class TestRAGRetriever:
@@ -113,6 +1310,100 @@ class TestRAGRetriever:
         assert result[0]["score"] == 0.95
         assert result[0]["content"] == "Test content"
     
+    def test_retrieve_reuses_cached_query_embedding(self):
+        """Test that equivalent queries are embedded only once"""
+        from src.rag.retriever import RAGRetriever
+        
+        mock_embeddings = Mock()
+        mock_embeddings.embed_query.return_value = [0.1] * 768
+        
+        mock_pinecone = Mock()
+        mock_pinecone.query.return_value = {"matches": []}
+        
+        retriever = RAGRetriever(
+            embeddings=mock_embeddings,
+            pinecone_client=mock_pinecone,
+            gemini_client=Mock()
+        )
+        
+        retriever.retrieve("Kapan batas waktu dana transportasi LPDP?")
+        retriever.retrieve("kapan batas waktu dana  transportasi LPDP")
+        
+        assert mock_embeddings.embed_query.call_count == 1
+        assert retriever.query_cache.stats()["hits"] == 1
+    
+    def test_retrieve_resolves_content_from_store(self, tmp_path):
+        """Test that chunk text comes from the content store, not vector metadata"""
+        from src.rag.retriever import RAGRetriever
+        from src.rag.content_store import ContentStore
+        
+        store = ContentStore(tmp_path / "store")
+        store.add("chunk_1", "Dana SPP dibayarkan per semester", {"page_number": 7, "section": "Dana SPP"})
+        store.flush()
+        
+        mock_embeddings = Mock()
+        mock_embeddings.embed_query.return_value = [0.1] * 768
+        
+        mock_pinecone = Mock()
+        mock_pinecone.query.return_value = {
+            "matches": [{"id": "chunk_1", "score": 0.9}, {"id": "stale", "score": 0.8}]
+        }
+        
+        retriever = RAGRetriever(
+            embeddings=mock_embeddings,
+            pinecone_client=mock_pinecone,
+            gemini_client=Mock(),
+            content_store=store
+        )
+        
+        result = retriever.retrieve("SPP")
+        
+        assert mock_pinecone.query.call_args.kwargs["include_metadata"] is False
+        assert [chunk["id"] for chunk in result] == ["chunk_1"]
+        assert result[0]["content"] == "Dana SPP dibayarkan per semester"
+        assert result[0]["metadata"]["section"] == "Dana SPP"
+    
+    def test_retrieve_fuses_lexical_results(self, tmp_path):
+        """Test that BM25 hits are fused with dense matches by reciprocal rank"""
+        from src.rag.retriever import RAGRetriever
+        from src.rag.content_store import ContentStore
+        from src.rag.bm25_index import BM25Index
+        
+        documents = [
+            ("dense_only", "Informasi umum pencairan beasiswa", {"page_number": 1}),
+            ("both", "Dana SPP semester dibayarkan ke universitas", {"page_number": 2}),
+            ("lexical_only", "Tagihan SPP wajib dilampirkan", {"page_number": 3}),
+        ]
+        store = ContentStore(tmp_path / "store")
+        store.add_many(documents)
+        lexical_index = BM25Index()
+        lexical_index.build(documents)
+        
+        mock_embeddings = Mock()
+        mock_embeddings.embed_query.return_value = [0.1] * 768
+        
+        mock_pinecone = Mock()
+        mock_pinecone.query.return_value = {
+            "matches": [{"id": "dense_only", "score": 0.9}, {"id": "both", "score": 0.8}]
+        }
+        
+        retriever = RAGRetriever(
+            embeddings=mock_embeddings,
+            pinecone_client=mock_pinecone,
+            gemini_client=Mock(),
+            content_store=store,
+            lexical_index=lexical_index
+        )
+        
+        result = retriever.retrieve("SPP", top_k=3)
+        
+        assert mock_pinecone.query.call_args.kwargs["top_k"] == 9
+        assert [chunk["id"] for chunk in result][0] == "both"
+        assert {chunk["id"] for chunk in result} == {"dense_only", "both", "lexical_only"}
+        lexical_chunk = next(chunk for chunk in result if chunk["id"] == "lexical_only")
+        assert lexical_chunk["score"] == 0.0
+        assert lexical_chunk["content"] == "Tagihan SPP wajib dilampirkan"
+    
     def test_query_returns_answer(self):
         """Test that query returns formatted answer"""
         from src.rag.retriever import RAGRetriever
@@ -150,3 +1441,253 @@ class TestRAGRetriever:
         assert "answer" in result
         assert "sources" in result
         assert "JPY 195,000" in result["answer"]
+    
+    def test_query_runs_each_stage_once(self):
+        """Test that query embeds and searches once and reports stage timings"""
+        from src.rag.retriever import RAGRetriever
+        
+        mock_embeddings = Mock()
+        mock_embeddings.embed_query.return_value = [0.1] * 768
+        
+        mock_pinecone = Mock()
+        mock_pinecone.query.return_value = {
+            "matches": [
+                {"id": "chunk_1", "score": 0.9, "metadata": {"content": "Dana SPP", "page_number": 3}}
+            ]
+        }
+        
+        mock_gemini = Mock()
+        mock_gemini.generate_response.return_value = "Jawaban"
+        
+        retriever = RAGRetriever(
+            embeddings=mock_embeddings,
+            pinecone_client=mock_pinecone,
+            gemini_client=mock_gemini,
+            query_cache=Mock(get=Mock(return_value=None))
+        )
+        
+        result = retriever.query("Apa itu dana SPP?")
+        
+        assert mock_embeddings.embed_query.call_count == 1
+        assert mock_pinecone.query.call_count == 1
+        assert "[Sumber: Halaman 3" in mock_gemini.generate_response.call_args.args[1]
+        assert set(result["timings"]) == {"embed", "search", "post_process", "format", "generate"}
+    
+    def test_query_serves_repeated_question_from_answer_cache(self):
+        """Test that a near-identical question over the same chunks skips Gemini"""
+        from src.rag.retriever import RAGRetriever
+        
+        mock_embeddings = Mock()
+        mock_embeddings.embed_query.return_value = [0.1] * 768
+        
+        mock_pinecone = Mock()
+        mock_pinecone.query.return_value = {
+            "matches": [{"id": "chunk_1", "score": 0.9, "metadata": {"content": "Dana SPP"}}]
+        }
+        
+        mock_gemini = Mock()
+        mock_gemini.generate_response.return_value = "Jawaban"
+        
+        retriever = RAGRetriever(
+            embeddings=mock_embeddings,
+            pinecone_client=mock_pinecone,
+            gemini_client=mock_gemini
+        )
+        
+        first = retriever.query("Apa itu dana SPP?")
+        second = retriever.query("Apa itu dana SPP ?")
+        
+        assert mock_gemini.generate_response.call_count == 1
+        assert first["cached"] is False
+        assert second["cached"] is True
+        assert second["answer"] == "Jawaban"
+    
+    async def test_aquery_interleaves_concurrent_questions(self):
+        """Test that concurrent async queries overlap while waiting on the network"""
+        import asyncio
+        from unittest.mock import AsyncMock
+        from src.rag.retriever import RAGRetriever
+        
+        mock_embeddings = Mock()
+        mock_embeddings.aembed_query = AsyncMock(side_effect=lambda query: [float(len(query))] * 768)
+        
+        mock_pinecone = Mock()
+        mock_pinecone.query.return_value = {
+            "matches": [{"id": "chunk_1", "score": 0.9, "metadata": {"content": "Dana SPP", "page_number": 7}}]
+        }
+        
+        in_flight = []
+        
+        async def generate(question, context):
+            in_flight.append(question)
+            await asyncio.sleep(0.01)
+            return f"Jawaban: {question} ({len(in_flight)} in flight)"
+        
+        mock_gemini = Mock()
+        mock_gemini.agenerate_response = AsyncMock(side_effect=generate)
+        
+        retriever = RAGRetriever(
+            embeddings=mock_embeddings,
+            pinecone_client=mock_pinecone,
+            gemini_client=mock_gemini
+        )
+        
+        first, second = await asyncio.gather(
+            retriever.aquery("Apa itu dana SPP?"),
+            retriever.aquery("Kapan dana SPP cair?")
+        )
+        
+        assert first["answer"].startswith("Jawaban: Apa itu dana SPP?")
+        assert second["answer"] == "Jawaban: Kapan dana SPP cair? (2 in flight)"
+        assert first["sources"] == [{"page": 7, "section": "", "relevance": 0.9}]
+        assert set(first["timings"]) == {"embed", "search", "post_process", "format", "generate"}
+        mock_gemini.generate_response.assert_not_called()
+    
+    async def test_aquery_coalesces_identical_questions(self):
+        """Test that concurrent equivalent questions share one pipeline run"""
+        import asyncio
+        from unittest.mock import AsyncMock
+        from src.rag.retriever import RAGRetriever
+        
+        mock_embeddings = Mock()
+        mock_embeddings.aembed_query = AsyncMock(return_value=[0.1] * 768)
+        
+        mock_pinecone = Mock()
+        mock_pinecone.query.return_value = {
+            "matches": [{"id": "chunk_1", "score": 0.9, "metadata": {"content": "Dana transportasi"}}]
+        }
+        
+        async def generate(question, context):
+            await asyncio.sleep(0.01)
+            return "4 bulan setelah tiba"
+        
+        mock_gemini = Mock()
+        mock_gemini.agenerate_response = AsyncMock(side_effect=generate)
+        
+        retriever = RAGRetriever(
+            embeddings=mock_embeddings,
+            pinecone_client=mock_pinecone,
+            gemini_client=mock_gemini
+        )
+        
+        results = await asyncio.gather(
+            retriever.aquery("Kapan batas waktu dana transportasi?"),
+            retriever.aquery("kapan batas waktu dana  transportasi"),
+            retriever.aquery("Kapan batas waktu dana transportasi?", top_k=3)
+        )
+        
+        assert [result["answer"] for result in results] == ["4 bulan setelah tiba"] * 3
+        assert results[0] is not results[1]
+        assert mock_gemini.agenerate_response.await_count == 2
+        assert mock_pinecone.query.call_count == 2
+    
+    async def test_aquery_streams_answer_pieces(self):
+        """Test that aquery with on_token streams the answer and returns it assembled"""
+        from unittest.mock import AsyncMock
+        from src.rag.retriever import RAGRetriever
+        
+        mock_embeddings = Mock()
+        mock_embeddings.aembed_query = AsyncMock(return_value=[0.1] * 768)
+        
+        mock_pinecone = Mock()
+        mock_pinecone.query.return_value = {
+            "matches": [{"id": "chunk_1", "score": 0.9, "metadata": {"content": "Dana SPP"}}]
+        }
+        
+        async def stream(question, context):
+            for piece in ["Dana SPP ", "per semester."]:
+                yield piece
+        
+        mock_gemini = Mock()
+        mock_gemini.agenerate_response_stream = stream
+        mock_batcher = Mock()
+        
+        retriever = RAGRetriever(
+            embeddings=mock_embeddings,
+            pinecone_client=mock_pinecone,
+            gemini_client=mock_gemini,
+            batcher=mock_batcher
+        )
+        
+        received = []
+        
+        async def on_token(piece):
+            received.append(piece)
+        
+        result = await retriever.aquery("Apa itu dana SPP?", on_token=on_token)
+        
+        assert received == ["Dana SPP ", "per semester."]
+        assert result["answer"] == "Dana SPP per semester."
+        mock_batcher.generate.assert_not_called()
+    
+    async def test_query_and_aquery_share_the_pipeline(self):
+        """Test that sync and async queries run the same stages, including the routed fallback"""
+        from unittest.mock import AsyncMock
+        from src.rag.retriever import RAGRetriever
+        
+        mock_embeddings = Mock()
+        mock_embeddings.embed_query.return_value = [0.1] * 768
+        mock_embeddings.aembed_query = AsyncMock(return_value=[0.1] * 768)
+        match = {"id": "chunk_1", "score": 0.9, "metadata": {"content": "Dana SPP", "page_number": 3}}
+        mock_pinecone = Mock()
+        # The routed search finds nothing, the unfiltered retry finds the chunk
+        mock_pinecone.query.side_effect = lambda **kwargs: {"matches": [] if kwargs["filter"] else [match]}
+        mock_gemini = Mock()
+        mock_gemini.generate_response.return_value = "Jawaban"
+        mock_gemini.agenerate_response = AsyncMock(return_value="Jawaban")
+        
+        retriever = RAGRetriever(
+            embeddings=mock_embeddings,
+            pinecone_client=mock_pinecone,
+            gemini_client=mock_gemini
+        )
+        
+        sync = retriever.query("Apa itu dana SPP?", route="SPP")
+        async_ = await retriever.aquery("Apa itu dana SPP?", route="SPP")
+        
+        assert sync["answer"] == async_["answer"] == "Jawaban"
+        assert sync["sources"] == async_["sources"] == [{"page": 3, "section": "", "relevance": 0.9}]
+        assert list(sync["timings"]) == list(async_["timings"]) == [
+            "embed", "search", "post_process", "format", "generate"
+        ]
+        assert mock_pinecone.query.call_count == 4
+    
+    async def test_concurrent_streamed_aqueries_each_get_pieces(self):
+        """Test that every streaming caller receives the answer, not just the first one"""
+        import asyncio
+        from unittest.mock import AsyncMock
+        from src.rag.retriever import RAGRetriever
+        
+        mock_embeddings = Mock()
+        mock_embeddings.aembed_query = AsyncMock(return_value=[0.1] * 768)
+        mock_pinecone = Mock()
+        mock_pinecone.query.return_value = {
+            "matches": [{"id": "chunk_1", "score": 0.9, "metadata": {"content": "Dana SPP"}}]
+        }
+        
+        async def stream(question, context):
+            for piece in ["Dana SPP ", "per semester."]:
+                await asyncio.sleep(0)
+                yield piece
+        
+        mock_gemini = Mock()
+        mock_gemini.agenerate_response_stream = stream
+        retriever = RAGRetriever(
+            embeddings=mock_embeddings,
+            pinecone_client=mock_pinecone,
+            gemini_client=mock_gemini
+        )
+        
+        received = [[], []]
+        
+        def collector(pieces):
+            async def on_token(piece):
+                pieces.append(piece)
+            return on_token
+        
+        await asyncio.gather(*(
+            retriever.aquery("Apa itu dana SPP?", on_token=collector(pieces)) for pieces in received
+        ))
+        
+        assert ["".join(pieces) for pieces in received] == ["Dana SPP per semester."] * 2
+
@@ -97,3 +97,313 @@ class TestLPDPTools:
         assert "jenis_pengajuan" in result
         assert "dokumen_persyaratan" in result
         assert "Invoice" in result["dokumen_persyaratan"]
+    
+    def test_info_dana_bulanan_from_allowance_table(self):
+        """Test that known locations are answered from the table without RAG"""
+        from src.tools.lpdp_tools import LPDPTools
+        from src.document.allowance_table import AllowanceEntry, AllowanceTable
+        
+        mock_retriever = Mock()
+        mock_retriever.query.return_value = {
+            "answer": "Informasi living allowance tidak ditemukan di tabel.",
+            "sources": [],
+            "context": ""
+        }
+        table = AllowanceTable([
+            AllowanceEntry("Jepang", ["Tokyo"], "JPY", 195000, 54),
+            AllowanceEntry("Jepang", [], "JPY", 170000, 54, other_cities=True),
+        ])
+        
+        tools = LPDPTools(retriever=mock_retriever, allowance_table=table)
+        result = tools.info_dana_bulanan("Jepang")
+        
+        assert "Jepang (Tokyo): JPY 195.000 per bulan" in result["informasi_dana_bulanan"]
+        assert "Jepang (kota lain): JPY 170.000 per bulan" in result["informasi_dana_bulanan"]
+        assert result["sumber"] == [{"page": 54, "section": "Dana Hidup Bulanan", "relevance": 1.0}]
+        mock_retriever.query.assert_not_called()
+        
+        tools.info_dana_bulanan("Kyoto")
+        mock_retriever.query.assert_called_once()
+    
+    def test_cek_batas_waktu_from_deadline_index(self):
+        """Test that known fund types are answered from the deadline index without RAG"""
+        from src.tools.lpdp_tools import LPDPTools
+        from src.rag.deadline_index import DeadlineIndex
+        
+        mock_retriever = Mock()
+        mock_retriever.query.return_value = {
+            "answer": "Batas waktu tidak ditemukan di index.",
+            "sources": [],
+            "context": ""
+        }
+        index = DeadlineIndex([
+            {"section": "Dana Transportasi", "subject": "Dana Transportasi", "page_number": 20,
+             "rule": "3 (tiga) bulan setelah tanggal keberangkatan", "primary": True},
+            {"section": "Dana Transportasi", "subject": "Dana Transportasi", "page_number": 21,
+             "rule": "Tiket dibeli paling lambat 7 hari sebelum keberangkatan", "primary": False},
+        ])
+        
+        tools = LPDPTools(retriever=mock_retriever, deadline_index=index)
+        result = tools.cek_batas_waktu("transportasi")
+        
+        assert "- Dana Transportasi: 3 (tiga) bulan setelah tanggal keberangkatan" in result["batas_waktu"]
+        assert "- Tiket dibeli paling lambat 7 hari sebelum keberangkatan" in result["batas_waktu"]
+        assert [source["page"] for source in result["sumber"]] == [20, 21]
+        mock_retriever.query.assert_not_called()
+        
+        tools.cek_batas_waktu("SPP")
+        mock_retriever.query.assert_called_once()
+    
+    async def test_async_tools_await_retriever(self):
+        """Test that async tool variants go through retriever.aquery"""
+        from unittest.mock import AsyncMock
+        from src.tools.lpdp_tools import LPDPTools
+        
+        mock_retriever = Mock()
+        mock_retriever.aquery = AsyncMock(return_value={
+            "answer": "Batas akhir pengajuan dana transportasi adalah 4 bulan setelah sampai di tujuan.",
+            "sources": [{"page": 21, "section": "Dana Transportasi", "relevance": 0.90}],
+            "context": "test context"
+        })
+        
+        tools = LPDPTools(retriever=mock_retriever)
+        result = await tools.acek_batas_waktu("transportasi")
+        
+        assert result["jenis_dana"] == "transportasi"
+        assert "4 bulan" in result["batas_waktu"]
+        mock_retriever.aquery.assert_awaited_once_with(
+            LPDPTools.BATAS_WAKTU_QUERY.format("transportasi"),
+            top_k=5,
+            on_token=None,
+            adaptive=True,
+            route="transportasi"
+        )
+        mock_retriever.query.assert_not_called()
+
+
+class TestWarmAnswers:
+    """Tests for WarmAnswers class"""
+    
+    def test_build_get_and_version_check(self, tmp_path):
+        """Test that canonical inputs are answered once and only served for the same index version"""
+        from src.tools.warm_answers import WarmAnswers
+        
+        mock_tools = Mock()
+        mock_tools.cari_komponen_dana.side_effect = lambda komponen: {
+            "komponen": komponen, "informasi": f"Info {komponen}", "sumber": [{"page": 7}]
+        }
+        mock_tools.cek_batas_waktu.side_effect = RuntimeError("quota")
+        mock_tools.cari_dokumen_persyaratan.return_value = {
+            "jenis_pengajuan": "Dana SPP", "dokumen_persyaratan": "Tidak ditemukan", "sumber": []
+        }
+        errors = []
+        
+        warm = WarmAnswers.build(
+            mock_tools, "v1", inputs=["Dana SPP"], on_error=lambda *args: errors.append(args[:2])
+        )
+        path = warm.save(tmp_path / "warm.json")
+        
+        assert len(warm) == 1
+        assert errors == [("cek_batas_waktu", "Dana SPP")]
+        loaded = WarmAnswers.load(path, "v1")
+        assert loaded.get("cari_komponen_dana", "spp?") == {
+            "komponen": "spp?", "informasi": "Info Dana SPP", "sumber": [{"page": 7}]
+        }
+        assert loaded.get("cari_komponen_dana", "asuransi") is None
+        assert loaded.get("cari_dokumen_persyaratan", "SPP") is None
+        assert len(WarmAnswers.load(path, "v2")) == 0
+
+
+class TestToolExecutor:
+    """Tests for ToolExecutor class"""
+    
+    async def test_runs_blocking_tools_off_the_event_loop(self):
+        """Test that sync tools run on the pool while the loop stays responsive"""
+        import asyncio
+        import threading
+        import time
+        from src.tools.executor import ToolExecutor
+        
+        executor = ToolExecutor(max_workers=2)
+        
+        def slow_tool(value):
+            time.sleep(0.05)
+            return value, threading.current_thread().name
+        
+        task = asyncio.create_task(executor.run("slow", slow_tool, "ok"))
+        ticks = 0
+        while not task.done():
+            await asyncio.sleep(0.005)
+            ticks += 1
+        
+        value, thread_name = task.result()
+        assert value == "ok"
+        assert thread_name.startswith("tool")
+        assert ticks > 1
+        executor.shutdown()
+    
+    async def test_limits_concurrency_and_rejects_when_saturated(self):
+        """Test that calls beyond the concurrency limit queue, and beyond the queue are rejected"""
+        import asyncio
+        from src.tools.executor import ToolExecutor, ToolRejectedError
+        
+        executor = ToolExecutor(default_concurrency=1, max_queue=1)
+        release = asyncio.Event()
+        running = []
+        
+        async def tool(value):
+            running.append(value)
+            await release.wait()
+            return value
+        
+        first = asyncio.create_task(executor.run("tanya", tool, 1))
+        second = asyncio.create_task(executor.run("tanya", tool, 2))
+        await asyncio.sleep(0.01)
+        
+        with pytest.raises(ToolRejectedError):
+            await executor.run("tanya", tool, 3)
+        assert running == [1]
+        assert await asyncio.wait_for(executor.run("other", lambda: "free"), 1) == "free"
+        
+        release.set()
+        assert await asyncio.gather(first, second) == [1, 2]
+        assert executor.stats() == {"pending": {}, "rejected": 1, "timed_out": 0}
+        executor.shutdown()
+    
+    async def test_deadline_includes_queue_time(self):
+        """Test that a call waiting too long for a slot times out"""
+        import asyncio
+        from src.tools.executor import ToolExecutor, ToolTimeoutError
+        
+        executor = ToolExecutor(default_concurrency=1, timeout=0.02)
+        blocker = asyncio.create_task(executor.run("tanya", asyncio.sleep, 0.2, timeout=1))
+        await asyncio.sleep(0.01)
+        
+        with pytest.raises(ToolTimeoutError):
+            await executor.run("tanya", asyncio.sleep, 0)
+        
+        await blocker
+        assert executor.stats()["timed_out"] == 1
+        executor.shutdown()
+
+
+class TestCallTool:
+    """Tests for the MCP call_tool handler"""
+    
+    def test_concurrent_first_calls_build_one_retriever(self):
+        """Test that tools requested from several threads at once share one retriever"""
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from src import server
+        
+        def slow_retriever(**kwargs):
+            time.sleep(0.05)
+            return Mock()
+        
+        with patch.object(server, '_retriever', None), \
+             patch.object(server, '_tools', None), \
+             patch.object(server, 'GeminiClient'), \
+             patch.object(server, 'RAGRetriever', side_effect=slow_retriever) as mock_retriever_cls, \
+             patch.object(server, 'load_content_store'), \
+             patch.object(server, 'load_lexical_index'), \
+             patch.object(server, 'load_allowance_table'), \
+             patch.object(server, 'load_deadline_index'):
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                tools = list(pool.map(lambda _: server.get_tools(), range(4)))
+        
+        assert mock_retriever_cls.call_count == 1
+        assert all(instance is tools[0] for instance in tools)
+    
+    async def test_call_tool_awaits_async_tool(self):
+        """Test that call_tool awaits the async tool and formats its sources"""
+        from unittest.mock import AsyncMock
+        from src import server
+        
+        mock_tools = Mock()
+        mock_tools.atanya_pencairan_lpdp = AsyncMock(return_value={
+            "jawaban": "Dana SPP dibayarkan langsung ke universitas.",
+            "sumber": [{"page": 7, "section": "Dana SPP", "relevance": 0.9}]
+        })
+        
+        with patch.object(server, 'get_tools', return_value=mock_tools):
+            content = await server.call_tool("tanya_pencairan_lpdp", {"pertanyaan": "Dana SPP?"})
+        
+        assert content[0].text.startswith("Dana SPP dibayarkan langsung ke universitas.")
+        assert "- Halaman 7 (Dana SPP)" in content[0].text
+        mock_tools.tanya_pencairan_lpdp.assert_not_called()
+    
+    async def test_call_tool_serves_warm_answers(self):
+        """Test that canonical inputs are answered from warm answers without running the tool"""
+        from unittest.mock import AsyncMock
+        from src import server
+        from src.tools.warm_answers import WarmAnswers
+        
+        warm = WarmAnswers("v1")
+        warm.put("cari_dokumen_persyaratan", "Dana Aplikasi Visa", {
+            "jenis_pengajuan": "Dana Aplikasi Visa",
+            "dokumen_persyaratan": "Invoice pembayaran visa",
+            "sumber": [{"page": 30}]
+        })
+        mock_executor = Mock()
+        mock_executor.run = AsyncMock()
+        
+        with patch.object(server, 'get_tools', return_value=Mock()), \
+             patch.object(server, 'get_executor', return_value=mock_executor), \
+             patch.object(server, 'get_warm_answers', return_value=warm):
+            content = await server.call_tool("cari_dokumen_persyaratan", {"jenis_pengajuan": "aplikasi visa"})
+        
+        assert content[0].text.startswith("📄 Dokumen Persyaratan untuk Aplikasi Visa")
+        assert "Invoice pembayaran visa" in content[0].text
+        mock_executor.run.assert_not_called()
+    
+    async def test_call_tool_reports_saturation(self):
+        """Test that a rejected call returns a busy message instead of raising"""
+        from unittest.mock import AsyncMock
+        from src import server
+        from src.tools.executor import ToolRejectedError
+        
+        mock_executor = Mock()
+        mock_executor.run = AsyncMock(side_effect=ToolRejectedError("saturated"))
+        
+        with patch.object(server, 'get_tools', return_value=Mock()), \
+             patch.object(server, 'get_executor', return_value=mock_executor):
+            content = await server.call_tool("cek_batas_waktu", {"jenis_dana": "transportasi"})
+        
+        assert "sibuk" in content[0].text
+    
+    async def test_call_tool_streams_progress_notifications(self):
+        """Test that partial answers are sent as progress notifications when requested"""
+        from unittest.mock import AsyncMock
+        from mcp.server.lowlevel.server import request_ctx
+        from mcp.shared.context import RequestContext
+        from mcp.types import RequestParams
+        from src import server
+        
+        async def answer(pertanyaan, on_token=None):
+            await on_token("Dana SPP ")
+            await on_token("per semester.")
+            return {"jawaban": "Dana SPP per semester.", "sumber": []}
+        
+        mock_tools = Mock()
+        mock_tools.atanya_pencairan_lpdp = answer
+        session = Mock(send_progress_notification=AsyncMock())
+        ctx = RequestContext(
+            request_id=1,
+            meta=RequestParams.Meta(progressToken="tok"),
+            session=session,
+            lifespan_context=None
+        )
+        
+        token = request_ctx.set(ctx)
+        try:
+            with patch.object(server, 'get_tools', return_value=mock_tools):
+                content = await server.call_tool("tanya_pencairan_lpdp", {"pertanyaan": "Dana SPP?"})
+        finally:
+            request_ctx.reset(token)
+        
+        assert content[0].text == "Dana SPP per semester."
+        calls = session.send_progress_notification.await_args_list
+        assert [call.kwargs["message"] for call in calls] == ["Dana SPP ", "per semester."]
+        assert all(call.kwargs["related_request_id"] == 1 for call in calls)
+        assert [call.args for call in calls] == [("tok", 9), ("tok", 22)]
+